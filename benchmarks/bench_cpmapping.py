@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+
+"""
+Description
+-----------
+
+Benchmarks :class:`mcc.complex_analyses.CPMappingEngine` on a synthetic
+function-mapping step.
+
+The function layer consists of the given number of nodes connected by random
+edges. Every node has a few dependency candidates with random providers and
+can be mapped to every platform component. Platform components are grouped
+into domains, i.e. only components of the same domain are native to each
+other.
+
+A backtracking run is mimicked by calling batch_assign repeatedly and
+forbidding every found solution as a bad combination in the subsequent tries.
+The persistent engine (model kept across tries, previous solution as hint) is
+compared with an engine that builds and solves the model from scratch. For
+every engine, the number of tries, the number of tries solved to optimality,
+the run time and the mean objective value are reported. With a time limit,
+the mean objective shows the solution quality reached within the limit.
+
+:Authors:
+    - Johannes Schlatow
+
+"""
+
+import os
+import sys
+import time
+import random
+import logging
+from argparse import ArgumentParser
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from mcc.framework import Registry, Layer
+from mcc.graph import Edge
+from mcc.complex_analyses import CPMappingEngine
+
+
+class Function:
+    def __init__(self, i):
+        self.i = i
+
+    def __repr__(self):
+        return 'f%d' % self.i
+
+
+class PfComponent:
+    def __init__(self, i, domain):
+        self.i      = i
+        self.domain = domain
+
+    def in_native_domain(self, rhs):
+        return self.domain == rhs.domain
+
+    def __repr__(self):
+        return 'pf%d' % self.i
+
+
+class Dependency:
+    def __init__(self, provider):
+        self.provider = provider
+
+
+def build(nodes, edges, platforms, domains, seed):
+    rng = random.Random(seed)
+
+    registry = Registry()
+    layer = Layer('func_arch')
+    registry.add_layer(layer)
+
+    objects = [layer._add_node(Layer.Node(Function(i))) for i in range(nodes)]
+    for i in range(edges):
+        src, dst = rng.sample(objects, 2)
+        layer.graph.add_edge(Edge(src, dst))
+
+    pfcs = { PfComponent(i, i % domains) for i in range(platforms) }
+    for o in objects:
+        layer.untracked_set_param_candidates('mapping', o, set(pfcs))
+
+        candidates = set()
+        for c in range(rng.randint(1, 3)):
+            providers = rng.sample([p for p in objects if p is not o], rng.randint(0, 2))
+            candidates.add(tuple(Dependency(p) for p in providers))
+        layer.untracked_set_param_candidates('dependencies', o, candidates)
+
+    return layer, objects
+
+
+def run(layer, objects, tries, persistent, workers, time_limit):
+    engine = CPMappingEngine(layer, None, None, workers=workers, time_limit=time_limit,
+                             persistent=persistent)
+
+    candidates = { o : layer.untracked_get_param_candidates('mapping', o) for o in objects }
+    bad_combinations = set()
+    found = list()
+
+    start = time.perf_counter()
+    for t in range(tries):
+        result = engine.batch_assign(candidates, objects if t > 0 else None, bad_combinations)
+        if result is False:
+            break
+
+        combination = tuple(result[o] for o in objects)
+        found.append(combination)
+        bad_combinations.add(combination)
+
+    objectives = [s['objective'] for s in engine.solver_stats if s['objective'] is not None]
+    optimal    = len([s for s in engine.solver_stats if s['status'] == 'OPTIMAL'])
+
+    return time.perf_counter() - start, found, objectives, optimal
+
+
+def get_args():
+    parser = ArgumentParser(description='CP-SAT mapping benchmark')
+    parser.add_argument('--nodes', type=int, default=10)
+    parser.add_argument('--edges', type=int, default=14)
+    parser.add_argument('--platforms', type=int, default=4)
+    parser.add_argument('--domains', type=int, default=2)
+    parser.add_argument('--tries', type=int, default=5,
+                        help='number of backtracking tries')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='number of CP-SAT search workers')
+    parser.add_argument('--time-limit', type=float, default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = get_args()
+
+    logging.disable(logging.CRITICAL)
+
+    layer, objects = build(args.nodes, args.edges, args.platforms, args.domains, args.seed)
+
+    print('%-12s %8s %8s %12s %12s %14s' % ('engine', 'tries', 'optimal', 'total [s]', 'per try [s]',
+                                            'mean objective'))
+    for name, persistent in [('cold', False), ('persistent', True)]:
+        elapsed, found, objectives, optimal = run(layer, objects, args.tries, persistent, args.workers,
+                                                  args.time_limit)
+        print('%-12s %8d %8d %12.3f %12.3f %14.2f' % (name, len(found), optimal, elapsed,
+              elapsed / max(1, len(found)), sum(objectives) / max(1, len(objectives))))
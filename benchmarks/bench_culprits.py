@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+
+"""
+Description
+-----------
+
+Benchmarks culprit-directed backtracking (see :class:`mcc.framework.DecisionGraph.Culprits`).
+
+The synthetic colouring model (see synthetic.py) is solved with a single
+BatchCheck of all edges, which mimics the CPA: It reads the colours of all
+nodes, hence a failed check without culprits makes the latest colour
+decision responsible. With culprits, the check reports the colour decisions
+of the first conflicting edge so that backtracking revises the latest of these.
+For every graph size, the number of backtracking iterations, the number of
+rolled-back operations and the run time are reported for both variants.
+
+:Authors:
+    - Johannes Schlatow
+
+"""
+
+import os
+import io
+import sys
+import time
+import logging
+import contextlib
+from argparse import ArgumentParser
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import synthetic
+
+
+def solve(nodes, culprits, seed, chronological):
+    model = synthetic.ColouringModel(nodes, int(nodes * 1.5), colours=3, seed=seed,
+                                     batch_check=True, culprits=culprits)
+
+    start = time.process_time()
+    with contextlib.redirect_stdout(io.StringIO()):
+        model.execute(nonchronological=not chronological)
+
+    return model.stats['iterations'], model.stats['rolled-back operations'], time.process_time() - start
+
+
+def get_args():
+    parser = ArgumentParser(description='culprit-directed backtracking benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[6, 8, 10])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--chronological', action='store_true', default=False)
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = get_args()
+
+    logging.disable(logging.CRITICAL)
+
+    print('%6s %-10s %12s %14s %10s' % ('nodes', 'check', 'iterations', 'rolled back', 'time [s]'))
+    for n in args.sizes:
+        for name, culprits in [('blame all', False), ('culprits', True)]:
+            iterations, rolled_back, elapsed = solve(n, culprits, args.seed, args.chronological)
+            print('%6d %-10s %12d %14d %10.3f' % (n, name, iterations, rolled_back, elapsed))
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+
+"""
+Description
+-----------
+
+Benchmarks the import time of the MCC modules and command line tools.
+
+Every target is imported in a fresh interpreter with ``python -X importtime``.
+For every target, the cumulative import time (minimum over the repetitions),
+the import time per package (sum of the self times of its modules) and the
+loaded heavy optional dependencies (solvers, analysis tools) are reported. The
+latter should only be imported once the engines are used.
+
+The scripts (mcc.py, check_xml.py) parse their arguments at module level,
+hence only their imports are measured.
+
+:Authors:
+    - Johannes Schlatow
+
+"""
+
+import os
+import re
+import sys
+import ast
+import json
+import subprocess
+from argparse import ArgumentParser
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+TARGETS = { 'mcc.parser'    : 'import mcc.parser',
+            'mcc.model'     : 'import mcc.model',
+            'mcc.lib'       : 'import mcc.lib',
+            'mcc.rosmodel'  : 'import mcc.rosmodel',
+            'mcc.py'        : 'from mcc import parser, model, lib, configurator',
+            'check_xml.py'  : 'from mcc import parser, model' }
+
+# modules that must not be imported before an engine needs them
+HEAVY = ['ortools', 'pycpa', 'taskchain', 'yaml']
+
+IMPORTTIME = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+
+def measure(statement):
+    """ Imports in a fresh interpreter.
+
+    Returns:
+        (cumulative time [us], { top-level package : self time [us] }, set of loaded heavy modules)
+    """
+    code = '%s\nimport sys\nprint(sorted(m for m in sys.modules if m.split(".")[0] in %r))' % (statement, HEAVY)
+    env  = dict(os.environ, PYTHONPATH=ROOT)
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=ROOT, env=env,
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+
+    total    = 0
+    packages = dict()
+    for line in proc.stderr.splitlines():
+        match = IMPORTTIME.match(line)
+        if match is None:
+            continue
+
+        # outermost imports (nesting level 0) add up to the total time
+        if len(match.group(3)) == 1:
+            total += int(match.group(2))
+
+        package = match.group(4).split('.')[0]
+        packages[package] = packages.get(package, 0) + int(match.group(1))
+
+    heavy = set(m.split('.')[0] for m in ast.literal_eval(proc.stdout.strip().splitlines()[-1]))
+    return total, packages, heavy
+
+
+def get_args():
+    parser = ArgumentParser(description='import time benchmark')
+    parser.add_argument('targets', type=str, nargs='*', default=None,
+                        help='targets to measure (default: all), available: %s' % ', '.join(TARGETS))
+    parser.add_argument('-n', '--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=3,
+                        help='number of slowest packages to show')
+    parser.add_argument('-o', '--output', type=str, default=None,
+                        help='write results to this JSON file')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = get_args()
+
+    results = dict()
+    print('%-14s %10s  %-12s %s' % ('target', 'time [ms]', 'heavy', 'slowest packages [ms]'))
+    for target in args.targets or TARGETS.keys():
+        try:
+            runs = [measure(TARGETS[target]) for i in range(args.repeat)]
+        except RuntimeError as e:
+            print('%-14s %s' % (target, e))
+            continue
+
+        total, packages, heavy = min(runs, key=lambda r: r[0])
+        slowest = sorted(packages.items(), key=lambda p: p[1], reverse=True)[:args.top]
+        results[target] = { 'time [ms]' : total / 1000,
+                            'heavy'     : sorted(heavy),
+                            'packages'  : { p : t / 1000 for p, t in packages.items() } }
+
+        print('%-14s %10.1f  %-12s %s' % (target, total / 1000, ','.join(sorted(heavy)) or '-',
+              ', '.join('%s %.1f' % (p, t / 1000) for p, t in slowest)))
+
+    if args.output is not None:
+        with open(args.output, 'w') as jsonfile:
+            json.dump(results, jsonfile, indent=2)
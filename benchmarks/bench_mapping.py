@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+
+"""
+Description
+-----------
+
+Benchmarks the cost-sensitive :func:`mcc.analyses.MappingEngine.batch_assign`
+(vectorised cost evaluation with branch and bound, see
+:class:`mcc.analyses.MappingEngine.CostModel`) against the previous
+implementation, which calculates the costs of every combination separately.
+
+The function layer consists of the given number of nodes connected by random
+edges. Every node has a few dependency candidates with random providers and a
+random subset of the platform components as mapping candidates. Platform
+components are grouped into domains, i.e. only components of the same domain
+are native to each other.
+
+For every size, both implementations must find the same optimal combinations
+(in the same order) and, with the same random seed, select the same one. The
+run times of the full enumeration and of a re-assignment of the first half of
+the nodes (with the previously selected combination as a bad combination) are
+reported.
+
+:Authors:
+    - Johannes Schlatow
+
+"""
+
+import os
+import sys
+import time
+import random
+import logging
+import itertools
+from argparse import ArgumentParser
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from mcc.framework import Registry, Layer
+from mcc.graph import Edge
+from mcc.analyses import MappingEngine
+
+
+class EnumeratingMappingEngine(MappingEngine):
+    """ Previous implementation of batch_assign.
+    """
+    def optimal_combinations(self, objects, sets, bad_combinations):
+        best_costs        = 0
+        best_combinations = None
+        for combination in itertools.product(*sets):
+            if combination not in bad_combinations:
+                result = dict(zip(objects, combination))
+                costs = self._calculate_costs(result)
+                if best_combinations is None or costs < best_costs:
+                    best_costs = costs
+                    best_combinations = [combination]
+                elif costs == best_costs:
+                    best_combinations.append(combination)
+
+        return best_combinations or []
+
+    def batch_assign(self, data, objects, bad_combinations):
+        if objects is None:
+            objects = data.keys()
+
+        best_combinations = self.optimal_combinations(objects, [data[o] for o in objects], bad_combinations)
+        if not best_combinations:
+            return False
+
+        return dict(zip(objects, self.random_choice(best_combinations)))
+
+
+class Function:
+    def __init__(self, i):
+        self.i = i
+
+    def __repr__(self):
+        return 'f%d' % self.i
+
+
+class PfComponent:
+    def __init__(self, i, domain):
+        self.i      = i
+        self.domain = domain
+
+    def in_native_domain(self, rhs):
+        return self.domain == rhs.domain
+
+    def __repr__(self):
+        return 'pf%d' % self.i
+
+
+class Dependency:
+    def __init__(self, provider):
+        self.provider = provider
+
+
+def build(nodes, edges, platforms, domains, seed):
+    rng = random.Random(seed)
+
+    registry = Registry()
+    layer = Layer('func_arch')
+    registry.add_layer(layer)
+
+    objects = [layer._add_node(Layer.Node(Function(i))) for i in range(nodes)]
+    for i in range(edges):
+        src, dst = rng.sample(objects, 2)
+        layer.graph.add_edge(Edge(src, dst))
+
+    pfcs = [PfComponent(i, i % domains) for i in range(platforms)]
+    for o in objects:
+        layer.untracked_set_param_candidates('mapping', o, set(rng.sample(pfcs, rng.randint(2, platforms))))
+
+        candidates = set()
+        for c in range(rng.randint(1, 3)):
+            providers = rng.sample([p for p in objects if p is not o], rng.randint(0, min(2, nodes-1)))
+            candidates.add(frozenset(Dependency(p) for p in providers))
+        layer.untracked_set_param_candidates('dependencies', o, candidates)
+
+    return layer, objects
+
+
+def run(engine, layer, objects, seed):
+    """ Assigns all nodes, then re-assigns the first half with the remaining nodes fixed.
+    """
+    engine.rng = random.Random(seed)
+    data = { o : layer.untracked_get_param_candidates('mapping', o) for o in objects }
+
+    start = time.perf_counter()
+    first = engine.batch_assign(data, None, set())
+    t_full = time.perf_counter() - start
+
+    for o, pfc in first.items():
+        layer.untracked_set_param_value('mapping', o, pfc)
+
+    half = objects[:len(objects)//2]
+    bad  = { tuple(first[o] for o in half) }
+    start = time.perf_counter()
+    second = engine.batch_assign(data, half, bad)
+    t_half = time.perf_counter() - start
+
+    for o in objects:
+        layer.untracked_clear_param_value('mapping', o)
+
+    return t_full, t_half, first, second
+
+
+def get_args():
+    parser = ArgumentParser(description='mapping cost benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[4, 6, 8])
+    parser.add_argument('--platforms', type=int, default=4)
+    parser.add_argument('--domains', type=int, default=2)
+    parser.add_argument('--seed', type=int, default=0)
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = get_args()
+
+    logging.disable(logging.CRITICAL)
+
+    print('%6s %12s %10s %14s %14s %14s %14s' % ('nodes', 'combinations', 'optimal', 'enum [s]',
+                                                 'enum half [s]', 'vector [s]', 'vector half [s]'))
+    for n in args.sizes:
+        layer, objects = build(n, int(n * 1.5), args.platforms, args.domains, args.seed + n)
+
+        enum   = EnumeratingMappingEngine(layer, None, None)
+        vector = MappingEngine(layer, None, None)
+
+        sets = [layer.untracked_get_param_candidates('mapping', o) for o in objects]
+        optimal = enum.optimal_combinations(objects, sets, set())
+        assert optimal == vector.CostModel(vector, objects, sets).optimal_combinations(set())
+
+        e_full, e_half, e_first, e_second = run(enum,   layer, objects, args.seed)
+        v_full, v_half, v_first, v_second = run(vector, layer, objects, args.seed)
+        assert e_first == v_first and e_second == v_second
+
+        print('%6d %12d %10d %14.3f %14.3f %14.3f %14.3f' % (n, vector._count_combinations(sets),
+              len(optimal), e_full, e_half, v_full, v_half))
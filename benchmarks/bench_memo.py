@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+
+"""
+Description
+-----------
+
+Benchmarks memoised check results (see :func:`mcc.framework.AnalysisEngine.memoise`).
+
+The synthetic colouring model (see synthetic.py) checks every edge separately.
+After a rollback, the check operation is re-executed for all edges although
+most of them still connect nodes with the same colours. With memoisation, these
+checks are answered from the memo. As the colour check itself is trivial, an
+artificial cost per executed check can be added to mimic an expensive analysis.
+
+For every graph size, the number of backtracking iterations, the number of
+executed checks, the memo hits and the run time are reported with and without
+memoisation. Both variants must take the same decisions.
+
+:Authors:
+    - Johannes Schlatow
+
+"""
+
+import os
+import io
+import sys
+import time
+import logging
+import contextlib
+from argparse import ArgumentParser
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from mcc.framework import Check
+import synthetic
+
+
+def expensive(check, cost):
+    """ Busy-waits for `cost` seconds before every call of the check.
+    """
+    def wrapper(obj):
+        end = time.perf_counter() + cost
+        while time.perf_counter() < end:
+            pass
+        return check(obj)
+
+    return wrapper
+
+
+def solve(nodes, memo_size, cost, seed, chronological):
+    model = synthetic.ColouringModel(nodes, int(nodes * 1.5), colours=3, seed=seed)
+
+    checks = [0]
+    for step in model.steps:
+        for op in step.operations:
+            if isinstance(op, Check):
+                for ae in op.analysis_engines:
+                    check = expensive(ae.check, cost)
+                    def counted(obj, check=check):
+                        checks[0] += 1
+                        return check(obj)
+                    ae.check = counted
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        model.execute(nonchronological=not chronological, memo_size=memo_size)
+    elapsed = time.perf_counter() - start
+
+    layer = model.by_order[0]
+    colours = [layer.untracked_get_param_value('colour', n) for n in
+               sorted(layer.graph.nodes(), key=lambda n: n.untracked_obj().i)]
+    hits = model.stats['memoised checks']['hits'] if memo_size else 0
+
+    return model.stats['iterations'], checks[0], hits, elapsed, colours
+
+
+def get_args():
+    parser = ArgumentParser(description='memoised check benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[8, 10, 12])
+    parser.add_argument('--memo-size', type=int, default=1024)
+    parser.add_argument('--cost', type=float, default=0.0,
+                        help='artificial cost of every executed check [ms]')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--chronological', action='store_true', default=False)
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = get_args()
+
+    logging.disable(logging.CRITICAL)
+
+    print('%6s %-10s %12s %10s %10s %10s' % ('nodes', 'memo', 'iterations', 'checks', 'hits', 'time [s]'))
+    for n in args.sizes:
+        results = list()
+        for name, memo_size in [('off', 0), ('on', args.memo_size)]:
+            iterations, checks, hits, elapsed, colours = solve(n, memo_size, args.cost / 1000,
+                                                               args.seed, args.chronological)
+            results.append((iterations, colours))
+            print('%6d %-10s %12d %10d %10d %10.3f' % (n, name, iterations, checks, hits, elapsed))
+
+        assert results[0] == results[1], "memoisation changed the search"
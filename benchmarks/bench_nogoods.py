@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+
+"""
+Description
+-----------
+
+Benchmarks learned nogoods (see :class:`mcc.framework.DecisionGraph.Nogoods`).
+
+The synthetic colouring model (see synthetic.py) is solved with
+non-chronological backtracking, either with a check per edge or with a single
+BatchCheck that reports the colour decisions of the first conflicting edge as
+culprits. Every failed check records the colours on which it depends as a
+nogood, which excludes these colours in later assignments once the other
+colours of the nogood are assigned again.
+
+For every graph size, the number of backtracking iterations, the number of
+rolled-back operations and the run time are summed over the given seeds with
+and without nogoods. The number of learned nogoods and of pruned candidates
+is reported as well.
+
+:Authors:
+    - Johannes Schlatow
+
+"""
+
+import os
+import io
+import sys
+import time
+import logging
+import contextlib
+from argparse import ArgumentParser
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import synthetic
+
+
+def solve(nodes, nogoods, seed, batch_check):
+    model = synthetic.ColouringModel(nodes, int(nodes * 1.5), colours=3, seed=seed,
+                                     batch_check=batch_check, culprits=batch_check)
+
+    start = time.process_time()
+    with contextlib.redirect_stdout(io.StringIO()):
+        model.execute(nonchronological=True, nogoods=nogoods)
+    elapsed = time.process_time() - start
+
+    layer = model.by_order[0]
+    for e in layer.graph.edges():
+        assert layer.untracked_get_param_value('colour', e.source) != \
+               layer.untracked_get_param_value('colour', e.target)
+
+    stats = model.stats.get('nogoods', { 'learned' : 0, 'pruned' : 0 })
+    return (model.stats['iterations'], model.stats['rolled-back operations'], elapsed,
+            stats['learned'], stats['pruned'])
+
+
+def get_args():
+    parser = ArgumentParser(description='learned nogoods benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 12, 14])
+    parser.add_argument('--seeds', type=int, default=8,
+                        help='number of random graphs per size')
+    parser.add_argument('--nogoods', type=int, default=100,
+                        help='maximum number of learned nogoods')
+    parser.add_argument('--batch-check', action='store_true', default=False,
+                        help='check all edges at once and report culprits')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = get_args()
+
+    logging.disable(logging.CRITICAL)
+
+    print('%6s %-8s %12s %14s %10s %10s %10s' % ('nodes', 'nogoods', 'iterations', 'rolled back',
+                                                 'time [s]', 'learned', 'pruned'))
+    for n in args.sizes:
+        for nogoods in [0, args.nogoods]:
+            total = [0] * 5
+            for seed in range(args.seeds):
+                result = solve(n, nogoods, seed, args.batch_check)
+                total = [t + r for t, r in zip(total, result)]
+
+            print('%6d %-8d %12d %14d %10.3f %10d %10d' % (n, nogoods, *total))
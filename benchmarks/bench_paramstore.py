@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+
+"""
+Description
+-----------
+
+Compares the default (dict-based) and the compact (columnar) param store of
+:class:`mcc.framework.Layer` w.r.t. run time and memory.
+
+The synthetic benchmark mimics the map/assign loop on a single layer.
+With --tubs or --ros, the corresponding use case models are solved with both stores.
+
+:Authors:
+    - Johannes Schlatow
+
+"""
+
+import os
+import sys
+import copy
+import time
+import pickle
+import logging
+import tracemalloc
+from argparse import ArgumentParser
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from mcc.framework import Registry, Layer, ImmutableParam
+from mcc.graph import Edge
+
+
+class Item:
+    def __init__(self, i):
+        self.i = i
+
+    def __repr__(self):
+        return 'item%d' % self.i
+
+
+def build(compact, nodes, params):
+    registry = Registry(compact_params=compact)
+    layer = Layer('bench')
+    registry.add_layer(layer)
+
+    objects = list()
+    prev = None
+    for i in range(nodes):
+        node = layer._add_node(Layer.Node(Item(i)))
+        objects.append(node)
+        if prev is not None:
+            objects.append(layer.graph.add_edge(Edge(prev, node)))
+        prev = node
+
+    for obj in objects:
+        for p in params:
+            layer.untracked_set_param_candidates(p, obj, {0, 1, 2})
+
+    return layer, objects
+
+
+def check_pickle():
+    """ Asserts that pickling and copying of interned params neither breaks interning nor the pool.
+    """
+    item = Item(0)
+    values = ['a', 'b', None, 3, (1, 2), item]
+    params = [ImmutableParam(v) for v in values]
+
+    unpickled = pickle.loads(pickle.dumps(params))
+    assert [p.data for p in unpickled[:-1]] == values[:-1]
+    # tuples are not interned
+    assert all(p is q for p, q in zip(unpickled[:-2], params))
+    assert unpickled[-1].data.i == item.i
+
+    assert copy.deepcopy(params[0]) is params[0]
+    assert copy.copy(params[-1]) is params[-1]
+    assert copy.deepcopy(params[-1]).data is not item
+
+    # the pool must be left untouched
+    assert ImmutableParam(None).data is None
+    assert [ImmutableParam(v).data for v in values] == values
+
+
+def run_synthetic(compact, nodes, nparams, rounds):
+    params = ['param%d' % i for i in range(nparams)]
+
+    tracemalloc.start()
+    build(compact, nodes, params)
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.process_time()
+    layer, objects = build(compact, nodes, params)
+    build_time = time.process_time() - start
+
+    start = time.process_time()
+    for r in range(rounds):
+        for obj in objects:
+            for p in params:
+                # map, assign, check, rollback
+                cands = layer.untracked_get_param_candidates(p, obj)
+                layer.untracked_set_param_value(p, obj, r % len(cands))
+                layer.untracked_isset_param_value(p, obj)
+                layer.untracked_get_param_value(p, obj)
+                layer.get_param_failed(p, obj)
+                layer.untracked_clear_param_value(p, obj)
+    loop_time = time.process_time() - start
+
+    return build_time, loop_time, memory
+
+
+def run_tubs(compact, query):
+    sys.path.insert(0, os.path.join(ROOT, 'usecases', 'TUBS21'))
+    from tubs import Mcc
+
+    outpath = '/tmp/mcc-bench-paramstore/'
+    os.makedirs(outpath, exist_ok=True)
+    mcc = Mcc(query, basepath=os.path.join(ROOT, 'models', 'tubs') + '/', outpath=outpath)
+
+    start = time.process_time()
+    mcc.execute(compact_params=compact)
+    return time.process_time() - start
+
+
+def run_ros(compact):
+    from mcc import rosmodel
+
+    outpath = '/tmp/mcc-bench-paramstore/'
+    os.makedirs(outpath, exist_ok=True)
+    repo  = rosmodel.Repository(os.path.join(ROOT, 'models', 'ros', 'repo.xml'))
+    query = rosmodel.SystemParser(os.path.join(ROOT, 'models', 'ros', 'query.xml'))
+    mcc   = rosmodel.MccBase(repo, ecus={'ECU1', 'ECU2'}, compact_params=compact)
+
+    start = time.process_time()
+    mcc.search_config(query, outpath=outpath, dot_mcc=False)
+    return time.process_time() - start
+
+
+def get_args():
+    parser = ArgumentParser(description='param store benchmark')
+    parser.add_argument('--nodes', type=int, default=5000)
+    parser.add_argument('--params', type=int, default=8)
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--tubs', type=str, default=None, metavar='QUERY',
+                        help='also solve the given TUBS query (e.g. models/tubs/queries/obj_fpga_low_rel.xml)')
+    parser.add_argument('--ros', action='store_true', default=False,
+                        help='also solve the ROS model')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = get_args()
+
+    logging.basicConfig(format='%(levelname)s: %(message)s')
+    logging.getLogger().setLevel(logging.ERROR)
+
+    check_pickle()
+
+    print('synthetic: %d nodes, %d params, %d rounds' % (args.nodes, args.params, args.rounds))
+    print('%-8s %10s %10s %12s' % ('store', 'build [s]', 'loop [s]', 'memory [kB]'))
+    for compact in [False, True]:
+        build_time, loop_time, memory = run_synthetic(compact, args.nodes, args.params, args.rounds)
+        print('%-8s %10.3f %10.3f %12d' % ('compact' if compact else 'dict',
+                                           build_time, loop_time, memory / 1024))
+
+    if args.ros:
+        for compact in [False, True]:
+            print('ros (%s): %.3fs' % ('compact' if compact else 'dict', run_ros(compact)))
+
+    if args.tubs:
+        for compact in [False, True]:
+            print('tubs (%s): %.3fs' % ('compact' if compact else 'dict', run_tubs(compact, args.tubs)))
@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+
+"""
+Description
+-----------
+
+Regression benchmark of the entire MCC pipeline on the shipped models.
+
+The following cases are available:
+
+* ``ros``: :func:`mcc.rosmodel.MccBase.search_config` on models/ros
+* ``c1``: :func:`mcc.lib.SimpleMcc.search_config` on the C1 models (usecases/C1/mcc_control.xml)
+* ``tubs/<query>``: :func:`mcc.lib.SimpleMcc.search_config` on every query in models/tubs/queries
+
+Every case is solved in a separate process with a fixed seed (see
+:class:`mcc.framework.Registry`) and a fixed PYTHONHASHSEED. For every phase,
+i.e. every call of search_config, the wall time, process time, peak RSS (of the
+process, hence including previous phases of the same case), the number of
+operations in the found solution (per operation type), the number of rolled-back
+operations and the number of backtracking iterations are reported.
+
+The results can be written to a JSON file (--output) and compared with the
+results of another commit (--compare).
+
+A phase that raised an exception (e.g. because no config could be found) is
+reported as an error (in the table and in the JSON file) and is not compared.
+If any case failed, the benchmark exits with a non-zero exit code.
+
+With --indexed_tracking, the cases are solved with the decision graph with
+numbered params (see :class:`mcc.tracking.IndexedTracking`).
+
+:Authors:
+    - Johannes Schlatow
+
+"""
+
+import os
+import io
+import sys
+import json
+import time
+import glob
+import logging
+import platform
+import resource
+import subprocess
+import contextlib
+from argparse import ArgumentParser, SUPPRESS
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+OUTPATH = '/tmp/mcc-bench-pipeline/'
+
+
+def all_cases():
+    cases = ['ros', 'c1']
+    for query in sorted(glob.glob(os.path.join(ROOT, 'models', 'tubs', 'queries', '*.xml'))):
+        cases.append('tubs/' + os.path.splitext(os.path.basename(query))[0])
+    return cases
+
+
+class Phases:
+    """ Measures the phases of a single case.
+    """
+    def __init__(self):
+        self.results = list()
+
+    @contextlib.contextmanager
+    def measure(self, name):
+        result = { 'phase' : name, 'error' : None }
+        wall = time.perf_counter()
+        proc = time.process_time()
+        try:
+            yield result
+        except Exception as e:
+            result['error'] = error_string(e)
+            raise
+        finally:
+            result['wall [s]']     = time.perf_counter() - wall
+            result['process [s]']  = time.process_time() - proc
+            result['peak rss [kB]'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            self.results.append(result)
+
+    @staticmethod
+    def model_stats(result, model):
+        operations = dict()
+        for node in model.decision_graph.nodes():
+            if node.operation is None:
+                continue
+            name = type(node.operation).__name__
+            operations[name] = operations.get(name, 0) + 1
+
+        result['operations']             = operations
+        result['iterations']             = model.stats['iterations']
+        result['rolled-back operations'] = model.stats['rolled-back operations']
+        result['failed operations']      = sum(model.stats['failed_ops'].values())
+
+
+def error_string(exception):
+    return '%s: %s' % (type(exception).__name__, exception)
+
+
+def run_ros(phases, seed, options):
+    from mcc import rosmodel
+
+    repo  = rosmodel.Repository(os.path.join(ROOT, 'models', 'ros', 'repo.xml'))
+    query = rosmodel.SystemParser(os.path.join(ROOT, 'models', 'ros', 'query.xml'))
+    mcc   = rosmodel.MccBase(repo, ecus={'ECU1', 'ECU2'}, seed=seed, **options)
+
+    with phases.measure('query') as result:
+        model = mcc.search_config(query, outpath=OUTPATH + 'ros-', dot_mcc=False)
+        Phases.model_stats(result, model)
+
+
+def _search_devices(phases, seed, options, devices, outpath):
+    """ Searches the base and query config of every device as done by the use cases.
+
+    Args:
+        :param devices: list of (name, device control, kwargs for search_config)
+    """
+    from mcc import lib
+    from mcc import parser as cfgparser
+    from mcc.model import SimplePlatformModel
+
+    for name, device, search_args in devices:
+        pffile   = device.platform_filename()
+        pf_model = SimplePlatformModel(cfgparser.PlatformParser(pffile))
+
+        repos = [cfgparser.Repository(pffile), cfgparser.Repository(device.repo_filename())]
+        mcc   = lib.SimpleMcc(repo=cfgparser.AggregateRepository(repos), seed=seed, **options)
+
+        base    = lib.BaseModelQuery()
+        basesys = cfgparser.SystemParser(pffile)
+        with phases.measure('%s-base' % name) as result:
+            query, basemodel = mcc.search_config(pf_model, basesys,
+                                                 outpath=outpath+name+'-'+basesys.name()+'-',
+                                                 with_da=False)
+            Phases.model_stats(result, basemodel)
+
+        base.insert(name=basesys.name(),
+                    query_graph=query,
+                    comp_inst=basemodel.by_name['comp_inst'],
+                    filename=pffile)
+
+        system = cfgparser.SystemParser(device.query_filename())
+        with phases.measure('%s-query' % name) as result:
+            query, model = mcc.search_config(pf_model, system, base,
+                                             outpath=outpath+name+'-',
+                                             with_da=False, **search_args)
+            Phases.model_stats(result, model)
+
+
+def run_c1(phases, seed, options):
+    sys.path.insert(0, os.path.join(ROOT, 'usecases', 'C1'))
+    import c1
+
+    parser = c1.ControlParser(os.path.join(ROOT, 'usecases', 'C1', 'mcc_control.xml'),
+                              os.path.join(ROOT, 'models') + '/')
+    devices = list()
+    for name in ['doris', 'boris']:
+        device = parser.find_device(name)
+        devices.append((name, device, { 'envmodel' : c1.EnvironmentModel(device) }))
+
+    _search_devices(phases, seed, options, devices, OUTPATH + 'c1-')
+
+
+def run_tubs(phases, seed, options, query):
+    sys.path.insert(0, os.path.join(ROOT, 'usecases', 'TUBS21'))
+    import tubs
+
+    parser = tubs.ControlParser(os.path.join(ROOT, 'models', 'tubs', 'queries', query + '.xml'),
+                                os.path.join(ROOT, 'models', 'tubs') + '/')
+    devices = list()
+    for device in sorted(parser.find_devices(), key=lambda d: d.name()):
+        devices.append((device.name(), device, { 'constrmodel' : tubs.ConstraintsModel(device) }))
+
+    _search_devices(phases, seed, options, devices, OUTPATH + 'tubs-%s-' % query)
+
+
+def run_case(case, seed, options):
+    """ Solves the given case in the current process.
+
+    Args:
+        :param options: further arguments of SimpleMcc/MccBase (e.g. indexed_tracking)
+        :type  options: dict
+    """
+    os.makedirs(OUTPATH, exist_ok=True)
+
+    phases = Phases()
+    result = { 'case' : case, 'error' : None, 'phases' : phases.results }
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            if case == 'ros':
+                run_ros(phases, seed, options)
+            elif case == 'c1':
+                run_c1(phases, seed, options)
+            elif case.startswith('tubs/'):
+                run_tubs(phases, seed, options, case[len('tubs/'):])
+            else:
+                raise ValueError('unknown case %s' % case)
+    except Exception as e:
+        result['error'] = error_string(e)
+
+    return result
+
+
+def spawn_case(case, seed, hashseed, options):
+    """ Solves the given case in a separate process.
+    """
+    env = dict(os.environ, PYTHONHASHSEED=str(hashseed))
+    argv = [sys.executable, os.path.abspath(__file__), '--worker', case, '--seed', str(seed)]
+    if options.get('indexed_tracking'):
+        argv.append('--indexed_tracking')
+    proc = subprocess.run(argv, env=env, stdout=subprocess.PIPE, universal_newlines=True)
+    if proc.returncode != 0:
+        return { 'case' : case, 'error' : 'exit code %d' % proc.returncode, 'phases' : [] }
+
+    return json.loads(proc.stdout)
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL, universal_newlines=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def failed(results):
+    """
+    Returns:
+        True if any case failed
+    """
+    return any(case['error'] is not None for case in results['cases'])
+
+
+def print_results(results, reference=None):
+    print('%-28s %-16s %10s %10s %12s %10s %10s %10s' % ('case', 'phase', 'wall [s]', 'proc [s]',
+                                                          'rss [MB]', 'ops', 'rolledback', 'iterations'))
+    for case in results['cases']:
+        for phase in case['phases']:
+            # remark: failed phases are not comparable
+            if phase.get('error') is not None:
+                print('%-28s %-16s ERROR (after %.3f s): %s' % (case['case'], phase['phase'],
+                      phase['wall [s]'], phase['error']))
+                continue
+
+            print('%-28s %-16s %10.3f %10.3f %12.1f %10d %10d %10d' % (case['case'], phase['phase'],
+                  phase['wall [s]'], phase['process [s]'], phase['peak rss [kB]'] / 1024,
+                  sum(phase.get('operations', {}).values()),
+                  phase.get('rolled-back operations', 0), phase.get('iterations', 0)))
+
+            if reference is not None:
+                ref = reference.get((case['case'], phase['phase']))
+                if ref is None:
+                    continue
+
+                print('%-28s %-16s %9.2fx %9.2fx %11.2fx %10d %10d %10d' % ('', '(vs. %s)' % reference['revision'],
+                      phase['wall [s]'] / ref['wall [s]'], phase['process [s]'] / ref['process [s]'],
+                      phase['peak rss [kB]'] / ref['peak rss [kB]'],
+                      sum(ref.get('operations', {}).values()),
+                      ref.get('rolled-back operations', 0), ref.get('iterations', 0)))
+
+        # errors outside of a phase (e.g. a crashed process)
+        if case['error'] is not None and all(phase.get('error') is None for phase in case['phases']):
+            print('%-28s %-16s ERROR: %s' % (case['case'], '', case['error']))
+
+
+def load_reference(filename):
+    with open(filename, 'r') as jsonfile:
+        data = json.load(jsonfile)
+
+    reference = { 'revision' : data['revision'] }
+    for case in data['cases']:
+        for phase in case['phases']:
+            if phase.get('error') is None:
+                reference[(case['case'], phase['phase'])] = phase
+
+    return reference
+
+
+def get_args():
+    parser = ArgumentParser(description='MCC pipeline benchmark')
+    parser.add_argument('cases', type=str, nargs='*', default=None,
+                        help='cases to run (default: all), available: %s' % ', '.join(all_cases()))
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--hashseed', type=int, default=0,
+                        help='PYTHONHASHSEED of the processes solving the cases')
+    parser.add_argument('-o', '--output', type=str, default=None,
+                        help='write results to this JSON file')
+    parser.add_argument('--compare', type=str, default=None, metavar='JSON',
+                        help='compare with results of a previous run')
+    parser.add_argument('--indexed_tracking', action='store_true',
+                        help='use the decision graph with numbered params (see mcc.tracking.IndexedTracking)')
+    parser.add_argument('--worker', type=str, default=None, help=SUPPRESS)
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = get_args()
+
+    logging.basicConfig(format='%(levelname)s: %(message)s')
+    logging.getLogger().setLevel(logging.ERROR)
+
+    options = { 'indexed_tracking' : args.indexed_tracking }
+
+    if args.worker is not None:
+        print(json.dumps(run_case(args.worker, args.seed, options)))
+        sys.exit(0)
+
+    results = { 'revision' : git_revision(),
+                'python'   : platform.python_version(),
+                'seed'     : args.seed,
+                'hashseed' : args.hashseed,
+                'options'  : options,
+                'cases'    : list() }
+
+    for case in args.cases or all_cases():
+        results['cases'].append(spawn_case(case, args.seed, args.hashseed, options))
+
+    print_results(results, load_reference(args.compare) if args.compare else None)
+
+    if args.output is not None:
+        with open(args.output, 'w') as jsonfile:
+            json.dump(results, jsonfile, indent=2)
+
+    if failed(results):
+        sys.exit(1)
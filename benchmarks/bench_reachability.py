@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+
+"""
+Description
+-----------
+
+Benchmarks the incremental reachability index of :class:`mcc.tracking.TopologicalGraph`.
+
+The micro benchmark grows a random decision graph in which every n-th insertion
+is forced sequential, i.e. requires the transitive reduction and the ancestors
+of the new node. It compares the :class:`mcc.tracking.ReachabilityIndex` with
+recomputing both by networkx on every forced insertion (previous implementation).
+
+The model benchmark solves the synthetic graph colouring model (see synthetic.py)
+with non-chronological backtracking for several seeds.
+
+:Authors:
+    - Johannes Schlatow
+
+"""
+
+import os
+import io
+import sys
+import time
+import random
+import logging
+import contextlib
+from argparse import ArgumentParser
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import networkx as nx
+from networkx.algorithms import dag
+
+from mcc.tracking import ReachabilityIndex
+
+import synthetic
+
+
+def random_inserts(nodes, writers, seed):
+    """ Returns a list of (node, dependencies) tuples.
+    """
+    rng = random.Random(seed)
+    result = list()
+    for n in range(nodes):
+        deps = set(rng.sample(range(n), min(n, writers))) if n else set()
+        result.append((n, deps))
+
+    return result
+
+
+def run_networkx(inserts, forced):
+    graph = nx.DiGraph()
+    start = time.process_time()
+    for n, deps in inserts:
+        graph.add_node(n)
+        for d in deps:
+            graph.add_edge(d, n)
+
+        if n % forced == 0:
+            reduced = dag.transitive_reduction(graph)
+            reduced.add_nodes_from(graph.nodes())
+            graph = reduced
+            nx.ancestors(graph, n)
+
+    return time.process_time() - start, graph.number_of_edges()
+
+
+def run_index(inserts, forced):
+    graph = nx.DiGraph()
+    index = ReachabilityIndex()
+    dirty = 0
+    start = time.process_time()
+    for n, deps in inserts:
+        graph.add_node(n)
+        index.add_node(n)
+        for d in deps:
+            graph.add_edge(d, n)
+            dirty |= index.add_edge(d, n)
+
+        if n % forced == 0:
+            for v in index.decode(dirty):
+                preds = list(graph.predecessors(v))
+                reachable = 0
+                for u in preds:
+                    reachable |= index.anc[u]
+                for u in preds:
+                    if reachable & index.bit(u):
+                        graph.remove_edge(u, v)
+            dirty = 0
+            index.ancestors(n)
+
+    return time.process_time() - start, graph.number_of_edges()
+
+
+def run_model(nodes, seed):
+    model = synthetic.ColouringModel(nodes, int(nodes * 1.5), colours=3, seed=seed)
+    start = time.process_time()
+    with contextlib.redirect_stdout(io.StringIO()):
+        model.execute(nonchronological=True)
+
+    return time.process_time() - start, model.stats['iterations']
+
+
+def get_args():
+    parser = ArgumentParser(description='reachability index benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[250, 500, 1000])
+    parser.add_argument('--writers', type=int, default=3,
+                        help='number of dependencies per node')
+    parser.add_argument('--forced', type=int, default=5,
+                        help='every n-th insertion is forced sequential')
+    parser.add_argument('--model', type=int, nargs='*', default=[10, 15],
+                        help='sizes of the colouring model')
+    parser.add_argument('--seeds', type=int, default=3)
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = get_args()
+
+    logging.disable(logging.CRITICAL)
+
+    print('micro: %d writers, every %d. insertion forced' % (args.writers, args.forced))
+    print('%8s %14s %14s' % ('nodes', 'networkx [s]', 'index [s]'))
+    for n in args.sizes:
+        inserts = random_inserts(n, args.writers, seed=n)
+        t_nx, e_nx = run_networkx(inserts, args.forced)
+        t_ix, e_ix = run_index(inserts, args.forced)
+        assert e_nx == e_ix
+        print('%8d %14.3f %14.3f' % (n, t_nx, t_ix))
+
+    if args.model:
+        print('colouring model (non-chronological)')
+        print('%8s %6s %10s %10s %14s' % ('nodes', 'seed', 'iterations', 'time [s]', 'ms/iteration'))
+        for n in args.model:
+            for seed in range(args.seeds):
+                t, it = run_model(n, seed)
+                print('%8d %6d %10d %10.3f %14.2f' % (n, seed, it, t, 1000 * t / it))
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+
+"""
+Description
+-----------
+
+Benchmarks the queries on :class:`mcc.parser.Repository` (lookup tables built
+at load time) against the previous implementation, which scans the XML tree
+on every query.
+
+A synthetic repository with the given number of components is generated. Every
+component provides a function and a service and is located in a binary with a
+few other components. Some of the components are proxies, muxers or protocol
+stacks. The queries resemble those of the analysis engines during a search
+(functions, component names, binaries, proxies, muxers and protocol stacks).
+
+:Authors:
+    - Johannes Schlatow
+
+"""
+
+import os
+import sys
+import time
+import random
+import logging
+import tempfile
+from argparse import ArgumentParser
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from mcc.parser import Repository
+
+
+class ScanningRepository(Repository):
+    """ Previous implementation of the queries.
+    """
+    def _find_function_by_name(self, name):
+        function_providers = list()
+        for tag in ['component', 'composite']:
+            for c in self._root.findall(tag):
+                for f in self._find_element_by_attribute("function", { "name" : name }, root=c):
+                    function_providers.append(c)
+
+        return function_providers
+
+    def _find_component_by_class(self, classification=None):
+        components = list()
+        for tag in ['component', 'composite']:
+            for c in self._root.findall(tag):
+                classes = set()
+                for cls in ['protocol', 'proxy', 'filter', 'mux', 'function']:
+                    if c.find(cls) is not None:
+                        classes.add(cls)
+
+                if classification is None and len(classes) == 0:
+                    components.append(c)
+                elif classification is not None and classification in classes:
+                    components.append(c)
+
+        return components
+
+    def find_components_by_type(self, query, querytype):
+        return self._find_components_by_type(query, querytype)
+
+    def _find_components_by_type(self, query, querytype):
+        if querytype in ['component', 'composite']:
+            components = self._find_element_by_attribute('component', { "name" : query }) + \
+                         self._find_element_by_attribute('composite', { "name" : query })
+            return [Repository.Component(c, self) for c in components]
+
+        return super()._find_components_by_type(query, querytype)
+
+    def get_binary_name(self, component_name):
+        cand = self._root.find("binary[@name='%s']" % component_name)
+        if cand is not None:
+            return cand.get('name')
+
+        cand = self._root.find("binary/component[@name='%s']/.." % component_name)
+        if cand is not None:
+            return cand.get('name')
+
+        return None
+
+
+def generate(filename, components, per_binary=4):
+    with open(filename, 'w') as xml:
+        xml.write('<xml>\n<repository>\n')
+        for b in range(0, components, per_binary):
+            xml.write('<binary name="bin%d">\n' % b)
+            for i in range(b, min(b + per_binary, components)):
+                xml.write('  <component name="comp%d"/>\n' % i)
+            xml.write('</binary>\n')
+
+        for i in range(components):
+            xml.write('<component name="comp%d">\n' % i)
+            if i % 10 == 1:
+                xml.write('  <proxy carrier="Nic" />\n')
+            elif i % 10 == 2:
+                xml.write('  <mux service="svc%d" />\n' % (i - 1))
+            elif i % 10 == 3:
+                xml.write('  <protocol from="svc%d" to="svc%d" />\n' % (i - 1, i))
+            else:
+                xml.write('  <function name="func%d" />\n' % i)
+            xml.write('  <provides><service name="svc%d" /></provides>\n' % i)
+            xml.write('  <requires><service name="svc%d" /><spec name="cpu" /></requires>\n' % max(0, i - 1))
+            xml.write('</component>\n')
+        xml.write('</repository>\n</xml>\n')
+
+
+def queries(components, count, seed):
+    rng = random.Random(seed)
+    result = list()
+    for n in range(count):
+        i = rng.randrange(components)
+        result.append([('func%d' % i, 'function'),
+                       ('comp%d' % i, 'component'),
+                       ({ 'service' : 'svc%d' % i, 'carrier' : 'Nic' }, 'proxy'),
+                       ({ 'service' : 'svc%d' % i }, 'mux'),
+                       ({ 'from_service' : 'svc%d' % i, 'to_service' : 'svc%d' % (i+1) }, 'proto')])
+    return result
+
+
+def run(repo, components, queries):
+    start = time.process_time()
+    found = 0
+    for qs in queries:
+        for query, querytype in qs:
+            for c in repo.find_components_by_type(query, querytype):
+                found += 1
+                c.binary_name()
+                c.type()
+    return time.process_time() - start, found
+
+
+def get_args():
+    parser = ArgumentParser(description='repository lookup benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[500, 1000, 2000])
+    parser.add_argument('--queries', type=int, default=200)
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = get_args()
+
+    logging.disable(logging.CRITICAL)
+
+    print('%10s %10s %12s %12s %12s' % ('components', 'queries', 'load [s]', 'scan [s]', 'indexed [s]'))
+    for n in args.sizes:
+        with tempfile.NamedTemporaryFile(suffix='.xml') as tmp:
+            generate(tmp.name, n)
+            qs = queries(n, args.queries, seed=n)
+
+            t_scan, found_scan = run(ScanningRepository(tmp.name), n, qs)
+
+            start = time.process_time()
+            repo  = Repository(tmp.name)
+            t_load = time.process_time() - start
+
+            t_idx, found_idx = run(repo, n, qs)
+            assert found_scan == found_idx
+
+            print('%10d %10d %12.3f %12.3f %12.3f' % (n, args.queries * 5, t_load, t_scan, t_idx))
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+
+"""
+Description
+-----------
+
+Benchmarks :func:`mcc.graph.Graph.reversed_subtree`, which determines the
+operations to be rolled back by :func:`mcc.backtracking.BacktrackRegistry.invalidate_subtree`.
+
+Synthetic decision graphs are either chains (as built by :class:`mcc.tracking.LinearGraph`)
+or random DAGs in which every node depends on a few recent nodes. The culprit is
+chosen such that the rolled-back subtree is small compared to the entire graph.
+The previous implementation, which sorts the entire graph, serves as reference.
+
+Moreover, the culprit search (:func:`mcc.framework.DecisionGraph.root_path`)
+is compared between the parent pointers of :class:`mcc.tracking.LinearGraph`
+and a shortest path search.
+
+:Authors:
+    - Johannes Schlatow
+
+"""
+
+import os
+import sys
+import time
+import random
+import itertools
+from argparse import ArgumentParser
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from networkx import DiGraph
+from networkx.algorithms import dag
+
+from mcc.graph import Graph
+from mcc.framework import DecisionGraph
+from mcc.tracking import LinearGraph
+
+
+def reversed_subtree_fullsort(graph, node):
+    """ Previous implementation of :func:`mcc.graph.Graph.reversed_subtree`.
+    """
+    return itertools.chain(
+            itertools.takewhile(
+                lambda x: x != node,
+                reversed(list(dag.topological_sort(graph.graph)))),
+            {node})
+
+
+def chain(nodes, seed):
+    graph = Graph(graphtype=DiGraph)
+    graph.add_node(0)
+    for n in range(1, nodes):
+        graph.add_node(n)
+        graph.create_edge(n-1, n)
+
+    return graph
+
+
+def random_dag(nodes, seed, deps=3, window=50):
+    rng = random.Random(seed)
+    graph = Graph(graphtype=DiGraph)
+    graph.add_node(0)
+    for n in range(1, nodes):
+        graph.add_node(n)
+        for d in set(rng.randrange(max(0, n-window), n) for i in range(deps)):
+            graph.create_edge(d, n)
+
+    return graph
+
+
+def linear_graph(nodes):
+    graph = LinearGraph()
+    for n in range(1, nodes):
+        node = graph.add_node(None, n, None)
+        graph.create_edge(graph.latest, node)
+        graph.latest = node
+
+    return graph
+
+
+def run(graph, culprits, func):
+    start = time.process_time()
+    for c in culprits:
+        result = list(func(graph, c))
+    return (time.process_time() - start) / len(culprits), len(result)
+
+
+def get_args():
+    parser = ArgumentParser(description='rollback benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 20000, 50000])
+    parser.add_argument('--subtree', type=int, default=100,
+                        help='distance of the culprit from the end of the graph')
+    parser.add_argument('--rollbacks', type=int, default=20)
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = get_args()
+
+    print('%8s %10s %10s %16s %16s' % ('nodes', 'graph', 'subtree', 'full sort [ms]', 'subtree [ms]'))
+    for n in args.sizes:
+        for name, build in [('chain', chain), ('random', random_dag)]:
+            graph = build(n, seed=n)
+            culprits = [n - args.subtree] * args.rollbacks
+
+            t_full, k_full = run(graph, culprits, reversed_subtree_fullsort)
+            t_sub,  k_sub  = run(graph, culprits, Graph.reversed_subtree)
+            assert k_sub <= k_full
+            print('%8d %10s %10d %16.2f %16.2f' % (n, name, k_sub, 1000 * t_full, 1000 * t_sub))
+
+    print('%8s %16s %16s' % ('nodes', 'BFS [ms]', 'parents [ms]'))
+    for n in args.sizes:
+        graph = linear_graph(n)
+        leaves = [graph.latest] * args.rollbacks
+
+        t_bfs, l_bfs = run(graph, leaves, DecisionGraph.root_path)
+        t_par, l_par = run(graph, leaves, LinearGraph.root_path)
+        assert l_bfs == l_par == n
+        print('%8d %16.2f %16.2f' % (n, 1000 * t_bfs, 1000 * t_par))
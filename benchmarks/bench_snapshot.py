@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+
+"""
+Description
+-----------
+
+Compares the fine-grained rollback of :func:`mcc.backtracking.BacktrackRegistry.invalidate_subtree`
+with the checkpoint/restore mode (see :mod:`mcc.checkpoint`) in chronological backtracking.
+
+The synthetic colouring model (see synthetic.py) is solved with and without
+snapshots. With --copies, the coloured graph is copied to further layers so that
+every rollback also reverts Transform operations. Both modes must take the same
+number of iterations.
+
+With --tubs, the given TUBS queries are additionally explored chronologically
+as done by usecases/TUBS21/sweep.sh (requires pycpa).
+
+:Authors:
+    - Johannes Schlatow
+
+"""
+
+import os
+import io
+import sys
+import time
+import logging
+import contextlib
+from argparse import ArgumentParser
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+import synthetic
+
+
+def solve(nodes, copies, seed, snapshots):
+    model = synthetic.ColouringModel(nodes, int(nodes * 1.5), colours=3, seed=seed, copies=copies)
+    start = time.process_time()
+    with contextlib.redirect_stdout(io.StringIO()):
+        model.execute(nonchronological=False, snapshots=snapshots)
+
+    return time.process_time() - start, model.stats['iterations']
+
+
+def run_tubs(query, snapshots):
+    sys.path.insert(0, os.path.join(ROOT, 'usecases', 'TUBS21'))
+    from tubs import Mcc
+
+    outpath = '/tmp/mcc-bench-snapshot/%s/%s/' % (os.path.basename(query),
+                                                  'snapshots' if snapshots else 'undo')
+    os.makedirs(outpath, exist_ok=True)
+    mcc = Mcc(query, basepath=os.path.join(ROOT, 'models', 'tubs') + '/', outpath=outpath)
+
+    start = time.process_time()
+    with contextlib.redirect_stdout(io.StringIO()):
+        mcc.execute(explore=True, chronological=True, snapshots=snapshots)
+    return time.process_time() - start
+
+
+def get_args():
+    parser = ArgumentParser(description='checkpoint/restore benchmark')
+    parser.add_argument('--nodes', type=int, nargs='+', default=[8, 10])
+    parser.add_argument('--copies', type=int, nargs='+', default=[0, 1, 2],
+                        help='number of layers to which the coloured graph is copied')
+    parser.add_argument('--seeds', type=int, default=2)
+    parser.add_argument('--tubs', type=str, nargs='*', default=[], metavar='QUERY',
+                        help='also explore the given TUBS queries (e.g. models/tubs/queries/obj_fpga_low_rel.xml)')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = get_args()
+
+    logging.disable(logging.CRITICAL)
+
+    print('colouring model (chronological)')
+    print('%8s %8s %6s %10s %12s %12s %12s %12s' % ('nodes', 'copies', 'seed', 'iterations',
+                                                    'undo [s]', 'restore [s]',
+                                                    'undo [ms/it]', 'restore [ms/it]'))
+    for n in args.nodes:
+        for copies in args.copies:
+            for seed in range(args.seeds):
+                t_undo, it_undo = solve(n, copies, seed, snapshots=False)
+                t_snap, it_snap = solve(n, copies, seed, snapshots=True)
+                assert it_undo == it_snap
+                print('%8d %8d %6d %10d %12.3f %12.3f %12.3f %12.3f' % (n, copies, seed, it_undo,
+                                                                        t_undo, t_snap,
+                                                                        1000 * t_undo / it_undo,
+                                                                        1000 * t_snap / it_snap))
+
+    for query in args.tubs:
+        t_undo = run_tubs(query, snapshots=False)
+        t_snap = run_tubs(query, snapshots=True)
+        print('%s: undo %.3fs, restore %.3fs' % (os.path.basename(query), t_undo, t_snap))
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+
+"""
+Description
+-----------
+
+Compares the per-operation overhead of the decision graphs with and without
+numbered params (see :class:`mcc.tracking.IndexedTracking`).
+
+The benchmark replays the read/write accesses of a Map, an Assign and a Check
+operation for every node and edge of the synthetic colouring model
+(see synthetic.py) on the dependency tracker and finally rolls back all operations.
+With --solve, the colouring model is additionally solved with both decision graphs.
+
+:Authors:
+    - Johannes Schlatow
+
+"""
+
+import os
+import io
+import sys
+import time
+import logging
+import contextlib
+from argparse import ArgumentParser
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from mcc.framework import Map, Assign, Check
+from mcc.tracking import LinearGraph, TopologicalGraph
+from mcc.tracking import IndexedLinearGraph, IndexedTopologicalGraph
+
+import synthetic
+
+TRACKERS = [('linear',          LinearGraph),
+            ('linear-indexed',  IndexedLinearGraph),
+            ('topo',            TopologicalGraph),
+            ('topo-indexed',    IndexedTopologicalGraph)]
+
+
+def replay(tracker, layer, engine, reads):
+    ops = { 'map'    : Map(engine, 'map'),
+            'assign' : Assign(engine, 'assign'),
+            'check'  : Check(engine, 'check') }
+
+    nodes = list(layer.graph.nodes())
+    edges = list(layer.graph.edges())
+
+    added = list()
+    def operation(obj, op, read, written):
+        tracker.start_tracking()
+        for o, p in read:
+            tracker.track_read(layer, o, p)
+        for o, p in written:
+            tracker.track_written(layer, o, p)
+        added.append(tracker.stop_tracking(layer, obj, op))
+
+    start = time.process_time()
+    for n in nodes:
+        operation(n, ops['map'], [(n, 'param%d' % i) for i in range(reads)], [(n, 'colour')])
+    for n in nodes:
+        operation(n, ops['assign'], [(n, 'colour')], [(n, 'colour')])
+    for e in edges:
+        operation(e, ops['check'], [(e.source, 'colour'), (e.target, 'colour')], [])
+
+    # roll back in reverse order
+    for n in reversed(added):
+        tracker.remove(n)
+
+    return time.process_time() - start, len(added)
+
+
+def solve(nodes, indexed, seed):
+    model = synthetic.ColouringModel(nodes, int(nodes * 1.5), colours=3, seed=seed)
+    start = time.process_time()
+    with contextlib.redirect_stdout(io.StringIO()):
+        model.execute(nonchronological=True, indexed_tracking=indexed)
+
+    return time.process_time() - start, model.stats['iterations']
+
+
+def get_args():
+    parser = ArgumentParser(description='decision graph benchmark')
+    parser.add_argument('--nodes', type=int, nargs='+', default=[500, 1000, 2000])
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='report the minimum of the given number of replays')
+    parser.add_argument('--reads', type=int, default=4,
+                        help='number of additional params read by each map operation')
+    parser.add_argument('--solve', type=int, nargs='*', default=[],
+                        help='sizes of the colouring model to solve')
+    parser.add_argument('--seeds', type=int, default=3)
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = get_args()
+
+    logging.disable(logging.CRITICAL)
+
+    print('replay (%d reads per map operation)' % args.reads)
+    print('%8s %16s %10s %12s' % ('nodes', 'tracker', 'time [s]', 'us/operation'))
+    for n in args.nodes:
+        model = synthetic.ColouringModel(n, int(n * 1.5), colours=3, seed=n)
+        layer = model.by_name['vars']
+        engine = synthetic.ColourEngine(layer, 3)
+        for name, cls in TRACKERS:
+            t, ops = min(replay(cls(), layer, engine, args.reads) for i in range(args.repeat))
+            print('%8d %16s %10.3f %12.1f' % (n, name, t, 1e6 * t / ops))
+
+    if args.solve:
+        print('colouring model (non-chronological)')
+        print('%8s %6s %8s %10s %10s' % ('nodes', 'seed', 'indexed', 'iterations', 'time [s]'))
+        for n in args.solve:
+            for seed in range(args.seeds):
+                for indexed in [False, True]:
+                    t, it = solve(n, indexed, seed)
+                    print('%8d %6d %8s %10d %10.3f' % (n, seed, indexed, it, t))
@@ -0,0 +1,133 @@
+"""
+Description
+-----------
+
+Synthetic cross-layer model for benchmarking the backtracking machinery
+without solver or CPA dependencies.
+
+The model is a graph colouring problem on a single layer: a Map/Assign step
+selects a colour for every node and an EdgeStep checks that adjacent nodes
+have different colours. With few colours, this results in a backtracking-heavy
+search. Optionally, the coloured graph is copied to further layers before the
+check so that rolling back a colour also involves Transform operations.
+
+Alternatively, all edges are checked by a single BatchCheck (like the CPA),
+which optionally reports the colour decisions of the first conflicting edge
+as culprits (see :class:`mcc.framework.DecisionGraph.Culprits`).
+
+:Authors:
+    - Johannes Schlatow
+
+"""
+
+import os
+import sys
+import random
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from mcc.framework import *
+from mcc.backtracking import BacktrackRegistry
+
+
+class Var:
+    def __init__(self, i):
+        self.i = i
+
+    def __repr__(self):
+        return 'v%d' % self.i
+
+
+class ColourEngine(AnalysisEngine):
+    memoisable = True
+
+    def __init__(self, layer, colours):
+        AnalysisEngine.__init__(self, layer, param='colour')
+        self.colours = colours
+
+    def map(self, obj, candidates):
+        return set(range(self.colours))
+
+    def assign(self, obj, candidates):
+        return self.rng.choice(sorted(candidates, key=lambda c: c.copy()))
+
+    def check(self, obj):
+        return self.layer.get_param_value(self, 'colour', obj.source) != \
+               self.layer.get_param_value(self, 'colour', obj.target)
+
+
+class ConflictEngine(AnalysisEngine):
+    """ Checks all edges at once. Returns False or the culprits of the first conflicting edge.
+    """
+    memoisable = True
+
+    def __init__(self, layer, culprits):
+        acl = { layer : {'reads' : {'colour'}} }
+        AnalysisEngine.__init__(self, layer, param=None, acl=acl)
+        self.culprits = culprits
+
+    def batch_check(self, iterable):
+        objs = sorted(iterable, key=lambda o: o.obj(self.layer).i)
+        colours = { o : self.layer.get_param_value(self, 'colour', o) for o in objs }
+        for o in objs:
+            for e in self.layer.out_edges(o):
+                if colours[e.source] != colours[e.target]:
+                    continue
+
+                if not self.culprits:
+                    return False
+
+                graph = self.layer.dependency_tracker
+                result = DecisionGraph.Culprits()
+                for n in (e.source, e.target):
+                    result.update(graph.find_writers(self.layer, n, 'colour').all())
+                return result
+
+        return True
+
+
+class ColouringModel(BacktrackRegistry):
+    """ Graph colouring on a random (but colourable) graph with `nodes` nodes and `edges` edges.
+
+    If `batch_check` is set, the edges are checked by a :class:`ConflictEngine`.
+    """
+    def __init__(self, nodes, edges, colours=3, seed=0, copies=0, batch_check=False, culprits=False, **kwargs):
+        # the colours are assigned randomly by the registry's random number generator
+        super().__init__(seed=seed + 1, **kwargs)
+
+        layer = Layer('vars', nodetypes={Var})
+        self.add_layer(layer)
+
+        rng = random.Random(seed)
+        objs = [layer._add_node(Layer.Node(Var(i))) for i in range(nodes)]
+
+        # only connect nodes with different planted colours so that a solution exists
+        planted = [rng.randrange(colours) for i in range(nodes)]
+        pairs = set()
+        while len(pairs) < edges:
+            u, v = rng.sample(range(nodes), 2)
+            if planted[u] != planted[v] and (v, u) not in pairs:
+                pairs.add((u, v))
+        for u, v in sorted(pairs):
+            layer.create_edge(objs[u], objs[v])
+
+        ce = ColourEngine(layer, colours)
+        step = NodeStep(Map(ce, 'colours'))
+        step.add_operation(Assign(ce, 'colours'))
+        self.add_step(step)
+
+        # copy nodes, edges and colours to further layers before checking
+        for i in range(copies):
+            copy = Layer('copy%d' % i, nodetypes={Var})
+            self.add_layer(copy)
+            self.add_step(CopyNodeStep(layer, copy, ['colour']))
+            self.add_step(CopyEdgeStep(layer, copy, ['colour']))
+            layer = copy
+
+        if batch_check:
+            self.add_step(NodeStep(BatchCheck(ConflictEngine(layer, culprits), 'conflicts')))
+            return
+
+        if copies:
+            ce = ColourEngine(layer, colours)
+        self.add_step(EdgeStep(Check(ce, 'colours')))
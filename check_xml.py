@@ -5,7 +5,6 @@ import argparse
 import os
 from mcc import parser as cfgparser
 from mcc import model
-from mcc import lib
 
 from lxml import etree
 
@@ -6,6 +6,7 @@ import argparse
 from mcc import parser as cfgparser
 from mcc import model
 from mcc import lib
+from mcc.modelcache import ModelCache
 from mcc.configurator import GenodeConfigurator
 try:
     from lxml import etree as ET
@@ -28,6 +29,18 @@ parser.add_argument('--dotpath', type=str,
 parser.add_argument('--config_xsd', type=str, default='xsd/genode/config.xsd',
         help='Config XSD schema.')
 parser.add_argument('--dependency_analysis', action='store_true')
+parser.add_argument('--seed', type=int, default=None,
+        help='Seed for the random decisions of the analysis engines.')
+parser.add_argument('--profile', action='store_true',
+        help='Profile operations and analysis engines (writes profile.json and profile.folded to dotpath).')
+parser.add_argument('--trace', action='store_true',
+        help='Record a timeline of the search (writes trace.json to dotpath, see chrome://tracing or Perfetto).')
+parser.add_argument('--cache', type=str, default=None,
+        help='Directory for caching the parsed and validated XML files.')
+parser.add_argument('--compact_params', action='store_true',
+        help='Store params in columnar arrays (see mcc.paramstore).')
+parser.add_argument('--streaming', action='store_true',
+        help='Load repositories incrementally and only keep their components and binaries.')
 
 args = parser.parse_args()
 
@@ -48,18 +61,22 @@ if __name__ == '__main__':
         else:
             pffile = args.base
 
-    pf = cfgparser.PlatformParser(pffile, args.schema)
+    cache = ModelCache(args.cache) if args.cache is not None else None
+
+    pf = cfgparser.PlatformParser(pffile, args.schema, cache=cache)
     pf_model = model.SimplePlatformModel(pf)
 
     # try to create repositories from given files
     repos = list()
     if args.base is not None:
-        repo = cfgparser.Repository(args.base, args.schema)
+        repo = cfgparser.Repository(args.base, args.schema, cache=cache,
+                                    streaming=args.streaming)
         repos.append(repo)
 
     for repofile in args.repos:
         try:
-            repo = cfgparser.Repository(repofile, args.schema)
+            repo = cfgparser.Repository(repofile, args.schema, cache=cache,
+                                        streaming=args.streaming)
             repos.append(repo)
         except ET.XMLSyntaxError as e:
             print('%s - FAIL : \n\t%s' % (repofile, e))
@@ -71,7 +88,8 @@ if __name__ == '__main__':
         if repofile in args.repos:
             continue
         try:
-            repo = cfgparser.Repository(repofile, args.schema)
+            repo = cfgparser.Repository(repofile, args.schema, cache=cache,
+                                        streaming=args.streaming)
             repos.append(repo)
         except ET.XMLSyntaxError as e:
             print('%s - FAIL : \n\t%s' % (repofile, e))
@@ -80,11 +98,13 @@ if __name__ == '__main__':
             continue
 
     cfg = cfgparser.AggregateRepository(repos)
-    mcc = lib.SimpleMcc(repo=cfg, test_backtracking=False)
+    mcc = lib.SimpleMcc(repo=cfg, test_backtracking=False, seed=args.seed,
+                        profile=args.profile, trace=args.trace,
+                        compact_params=args.compact_params)
 
     base = lib.BaseModelQuery()
 
-    basesys   = cfgparser.SystemParser(args.base, args.schema)
+    basesys   = cfgparser.SystemParser(args.base, args.schema, cache=cache)
     query, basemodel = mcc.search_config(pf_model, basesys,
                            outpath=args.dotpath+'-'+basesys.name()+'-',
                            with_da=False)
@@ -97,7 +117,7 @@ if __name__ == '__main__':
 
     sys = cfgparser.AggregateSystemParser()
     for sysfile in args.files:
-        sys.append(cfgparser.SystemParser(sysfile, args.schema))
+        sys.append(cfgparser.SystemParser(sysfile, args.schema, cache=cache))
 
     try:
         query, model = mcc.search_config(pf_model, sys, base,
@@ -18,7 +18,6 @@ from mcc.taskmodel import *
 
 import itertools
 import copy
-import random
 from collections import deque
 
 class WcetEngine(AnalysisEngine):
@@ -118,7 +117,7 @@ class ActivationEngine(AnalysisEngine):
         return result
 
     def assign(self, obj, candidates):
-        return random.choice(list(candidates))
+        return self.random_choice(candidates)
 
 
 class PriorityEngine(AnalysisEngine):
@@ -265,10 +264,12 @@ class AffinityEngine(AnalysisEngine):
         return available
 
     def assign(self, obj, candidates):
-        return random.choice(list(candidates))
+        return self.random_choice(candidates)
 
 
 class ReliabilityEngine(AnalysisEngine):
+    memoisable = True
+
     def __init__(self, layer, layers, constrmodel):
         """ Dummy implementation for excluding task graphs that
             do not achieve a certain reliability.
@@ -684,6 +685,8 @@ class TaskgraphEngine(AnalysisEngine):
         return tuple({Task})
 
 class NetworkEngine(AnalysisEngine):
+    memoisable = True
+
     def __init__(self, layer, max_byte_s=10*1024*1024):
         acl = { layer        : {'reads' : set(['mapping','component','service','connections']) }}
         AnalysisEngine.__init__(self, layer, param=None, acl=acl)
@@ -734,6 +737,9 @@ class NetworkEngine(AnalysisEngine):
         for obj in iterable:
             self._check(obj)
 
+        return self._update_state()
+
+    def _update_state(self):
         for (pfc, out_traffic) in self.state.items():
             pfc.set_state('out_traffic', int(out_traffic))
 
@@ -744,6 +750,13 @@ class NetworkEngine(AnalysisEngine):
 
         return True
 
+    def memo_state(self):
+        return self.state
+
+    def restore_memo_state(self, state):
+        self.state = state
+        self._update_state()
+
     def _check(self, obj):
         if not self.layer.isset_param_value(self, 'mapping', obj):
             # skip unmapped components (proxies)
@@ -782,6 +795,8 @@ class NetworkEngine(AnalysisEngine):
 
 
 class QuantumEngine(AnalysisEngine):
+    memoisable = True
+
     def __init__(self, layer, name):
         acl = { layer        : {'reads' : set(['mapping']) }}
         AnalysisEngine.__init__(self, layer, param=None, acl=acl)
@@ -793,6 +808,9 @@ class QuantumEngine(AnalysisEngine):
         for obj in iterable:
             self._check(obj)
 
+        return self._update_state()
+
+    def _update_state(self):
         for (pfc, remaining) in self.state.items():
             if remaining < 0:
                 logging.error("Subsystem %s exceeds its %s (%d)." % (pfc, self.name,
@@ -803,6 +821,13 @@ class QuantumEngine(AnalysisEngine):
 
         return True
 
+    def memo_state(self):
+        return self.state
+
+    def restore_memo_state(self, state):
+        self.state = state
+        self._update_state()
+
     def _check(self, obj):
         pfc = self.layer.get_param_value(self, 'mapping', obj)
         if pfc not in self.state:
@@ -859,11 +884,11 @@ class CoprocEngine(AnalysisEngine):
         return {cur_pfc}
 
     def assign(self, obj, candidates):
-        return random.choice(list(candidates))
+        return self.random_choice(candidates)
 
 
 class FunctionEngine(AnalysisEngine):
-    class Dependency:
+    class Dependency(DeterministicHash):
         def __init__(self, function, provider):
             self.function = function
             self.provider = provider
@@ -969,7 +994,7 @@ class FunctionEngine(AnalysisEngine):
                 best.append(cand)
 
         assert best is not None
-        return random.choice(best)
+        return self.random_choice(best)
 
     def transform(self, obj, target_layer):
         assert not isinstance(obj, Edge)
@@ -990,6 +1015,216 @@ class FunctionEngine(AnalysisEngine):
 
 
 class MappingEngine(AnalysisEngine):
+    class CostModel:
+        """ Vectorised evaluation of the mapping costs (see :func:`MappingEngine._calculate_costs`).
+
+        Nodes and platform components are encoded as indices. The costs are the
+        sum of edge terms (connected nodes on different platform components) and
+        dependency terms (non-native dependencies of the best resolution of a node).
+        Every term is attributed to the last variable (in order of the combinations)
+        it depends on. The leading variables (prefix) are enumerated depth-first and
+        a prefix is pruned once the costs of its terms exceed the best costs found
+        so far (branch and bound). For every remaining prefix, all combinations of
+        the trailing variables (suffix) are evaluated at once.
+        """
+
+        # maximum number of combinations evaluated at once
+        BLOCK_SIZE = 1 << 14
+
+        class Terms:
+            def __init__(self, edges, factors):
+                import numpy as np
+
+                self.sources = np.array([u for u, v in edges], dtype=np.intp)
+                self.targets = np.array([v for u, v in edges], dtype=np.intp)
+
+                # flatten dependency terms into (owner, provider, resolution) triples
+                owners      = list()
+                providers   = list()
+                resolutions = list()
+                starts      = list()
+                count       = 0
+                for owner, candidates in factors:
+                    starts.append(count)
+                    for resolution in candidates:
+                        for provider in resolution:
+                            owners.append(owner)
+                            providers.append(provider)
+                            resolutions.append(count)
+                        count += 1
+
+                self.owners    = np.array(owners,    dtype=np.intp)
+                self.providers = np.array(providers, dtype=np.intp)
+                self.starts    = np.array(starts,    dtype=np.intp)
+
+                # sums up the triples per resolution
+                self.incidence = np.zeros((len(owners), count), dtype=np.int64)
+                self.incidence[np.arange(len(owners)), resolutions] = 1
+
+            def costs(self, mapping, nonnative):
+                """
+                Args:
+                    :param mapping: platform component of every node (columns) for every combination (rows)
+                    :type  mapping: numpy array
+                    :param nonnative: 1 if platform components are not in the same native domain
+                    :type  nonnative: numpy array
+
+                Returns:
+                    numpy array with the costs of every combination
+                """
+                import numpy as np
+
+                costs = (mapping[:, self.sources] != mapping[:, self.targets]).sum(axis=1)
+                if len(self.starts):
+                    local = nonnative[mapping[:, self.owners], mapping[:, self.providers]] @ self.incidence
+                    costs += np.minimum.reduceat(local, self.starts, axis=1).sum(axis=1)
+
+                return costs
+
+        def __init__(self, engine, objects, sets):
+            import numpy as np
+
+            layer = engine.layer
+            nodes = list(layer.nodes())
+            column = { n : i for i, n in enumerate(nodes) }
+
+            self.sets      = [list(s) for s in sets]
+            self.variables = [column[obj] for obj in objects]
+            position = { c : i for i, c in enumerate(self.variables) }
+
+            pfcs  = list()
+            index = dict()
+            def pfc_index(pfc):
+                if pfc not in index:
+                    index[pfc] = len(pfcs)
+                    pfcs.append(pfc)
+                return index[pfc]
+
+            self.candidates = [np.array([pfc_index(pfc) for pfc in s], dtype=np.intp) for s in self.sets]
+
+            # current mapping of the remaining nodes
+            self.fixed = np.zeros((1, len(nodes)), dtype=np.intp)
+            for n in nodes:
+                if column[n] not in position:
+                    self.fixed[0, column[n]] = pfc_index(layer.get_param_value(engine, 'mapping', n))
+
+            self.nonnative = np.ones((len(pfcs), len(pfcs)), dtype=np.int64)
+            for i, lhs in enumerate(pfcs):
+                for j, rhs in enumerate(pfcs):
+                    if lhs is not None and rhs is not None and lhs.in_native_domain(rhs):
+                        self.nonnative[i, j] = 0
+
+            # split variables into prefix and suffix
+            self.split = len(self.sets)
+            block = 1
+            while self.split > 0:
+                size = len(self.sets[self.split-1])
+                if self.split < len(self.sets) and block * size > self.BLOCK_SIZE:
+                    break
+                block *= size
+                self.split -= 1
+
+            # candidate indices and platform components of all suffix combinations (in product order)
+            self.shape = tuple(len(s) for s in self.sets[self.split:])
+            self.suffix_indices = np.zeros((block, len(self.shape)), dtype=np.intp)
+            self.suffix_mapping = np.zeros((block, len(self.shape)), dtype=np.intp)
+            for j, g in enumerate(np.indices(self.shape)):
+                self.suffix_indices[:, j] = g.ravel()
+                self.suffix_mapping[:, j] = self.candidates[self.split+j][g.ravel()]
+            self.suffix_columns = np.array(self.variables[self.split:], dtype=np.intp)
+
+            # attribute terms to the last variable they depend on (-1: constant)
+            def depth(columns):
+                return max([position.get(c, -1) for c in columns], default=-1)
+
+            edges   = dict()
+            factors = dict()
+            for obj in nodes:
+                for e in layer.out_edges(obj):
+                    u, v = column[obj], column[e.target]
+                    edges.setdefault(min(depth([u, v]), self.split), list()).append((u, v))
+
+                resolutions = [[column[dep.provider] for dep in resolution]
+                               for resolution in layer.get_param_candidates(engine, 'dependencies', obj)]
+                if resolutions:
+                    d = depth([column[obj]] + [p for r in resolutions for p in r])
+                    factors.setdefault(min(d, self.split), list()).append((column[obj], resolutions))
+
+            self.terms = { d : self.Terms(edges.get(d, []), factors.get(d, []))
+                           for d in range(-1, self.split+1) }
+
+        def _bad_indices(self, bad_combinations):
+            """ Returns the flat suffix indices of the bad combinations per prefix.
+            """
+            lookup = [{ pfc : i for i, pfc in enumerate(s) } for s in self.sets]
+
+            result = dict()
+            for combination in bad_combinations:
+                if len(combination) != len(self.sets):
+                    continue
+                if not all(pfc in l for pfc, l in zip(combination, lookup)):
+                    continue
+
+                indices = [l[pfc] for pfc, l in zip(combination, lookup)]
+                flat = 0
+                for i, size in zip(indices[self.split:], self.shape):
+                    flat = flat * size + i
+                result.setdefault(tuple(indices[:self.split]), list()).append(flat)
+
+            return result
+
+        def optimal_combinations(self, bad_combinations):
+            """ Finds the combinations with minimum costs that are not in bad_combinations.
+
+            Returns:
+                list of combinations in the order of :func:`itertools.product`
+            """
+            import numpy as np
+
+            bad = self._bad_indices(bad_combinations)
+            best = { 'costs' : None, 'found' : list() }
+            row = self.fixed.copy()
+
+            def evaluate(prefix, partial):
+                block = np.repeat(row, len(self.suffix_mapping), axis=0)
+                block[:, self.suffix_columns] = self.suffix_mapping
+                costs = partial + self.terms[self.split].costs(block, self.nonnative)
+
+                valid = np.ones(len(costs), dtype=bool)
+                valid[bad.get(prefix, [])] = False
+                if not valid.any():
+                    return
+
+                minimum = costs[valid].min()
+                if best['costs'] is None or minimum < best['costs']:
+                    best['costs'] = minimum
+                    best['found'] = list()
+                if minimum == best['costs']:
+                    best['found'].append((prefix, np.flatnonzero(valid & (costs == minimum))))
+
+            def branch(depth, prefix, partial):
+                if depth == self.split:
+                    evaluate(prefix, partial)
+                    return
+
+                for i, pfc in enumerate(self.candidates[depth]):
+                    row[0, self.variables[depth]] = pfc
+                    costs = partial + int(self.terms[depth].costs(row, self.nonnative)[0])
+                    if best['costs'] is not None and costs > best['costs']:
+                        continue
+                    branch(depth+1, prefix + (i,), costs)
+
+            branch(0, tuple(), int(self.terms[-1].costs(self.fixed, self.nonnative)[0]))
+
+            result = list()
+            for prefix, flats in best['found']:
+                head = tuple(self.sets[d][i] for d, i in enumerate(prefix))
+                for flat in flats:
+                    result.append(head + tuple(self.sets[self.split+j][i]
+                                               for j, i in enumerate(self.suffix_indices[flat])))
+
+            return result
+
     def __init__(self, layer, repo, pf_model, cost_sensitive=True):
         acl = { layer : { 'reads' : set(['dependencies']) } }
         AnalysisEngine.__init__(self, layer, param='mapping', acl=acl)
@@ -1056,7 +1291,20 @@ class MappingEngine(AnalysisEngine):
         return candidates
 
     def assign(self, obj, candidates):
-        return random.choice(list(candidates))
+        return self.random_choice(candidates)
+
+    @staticmethod
+    def _count_combinations(sets, combinations=None):
+        """ Returns the size of the product of the given sets or the number of the given
+            combinations contained in it.
+        """
+        if combinations is None:
+            count = 1
+            for s in sets:
+                count *= len(s)
+            return count
+
+        return len([c for c in combinations if len(c) == len(sets) and all(x in s for x, s in zip(c, sets))])
 
     def batch_assign(self, data, objects, bad_combinations):
         sets   = list()
@@ -1067,27 +1315,15 @@ class MappingEngine(AnalysisEngine):
         for obj in objects:
             sets.append(data[obj])
 
-        best_costs        = 0
-        best_combinations = None
-        for combination in itertools.product(*sets):
-            if combination not in bad_combinations:
-                result = dict(zip(objects, combination))
-                if not self.cost_sensitive:
-                    return result
-
-                if best_combinations is None:
-                    best_combinations = [result]
-                    best_costs = self._calculate_costs(result)
-                else:
-                    costs = self._calculate_costs(result)
-                    if costs < best_costs:
-                        best_costs = costs
-                        best_combinations = [result]
-                    elif costs == best_costs:
-                        best_combinations.append(result)
+        if not self.cost_sensitive:
+            for combination in itertools.product(*sets):
+                if combination not in bad_combinations:
+                    return dict(zip(objects, combination))
 
-        if best_combinations is not None:
-            return random.choice(best_combinations)
+        # only evaluate costs (and read dependencies) if there are any valid combinations left
+        elif self._count_combinations(sets) > self._count_combinations(sets, bad_combinations):
+            best_combinations = self.CostModel(self, objects, sets).optimal_combinations(bad_combinations)
+            return dict(zip(objects, self.random_choice(best_combinations)))
 
         logging.error("Mapping candidates exhausted: %s\n%s" % (objects, bad_combinations))
         return False
@@ -1187,7 +1423,7 @@ class ComponentDependencyEngine(AnalysisEngine):
             return True
 
 class ServiceEngine(AnalysisEngine):
-    class Connection:
+    class Connection(DeterministicHash):
         def __init__(self, source_service, target_service):
             self.source_service = source_service
             self.target_service = target_service
@@ -1388,13 +1624,13 @@ class ProtocolStackEngine(AnalysisEngine):
     def assign(self, obj, candidates):
         """ Assigns the first candidate.
         """
-        return random.choice(list(candidates))
+        return self.random_choice(candidates)
 
 class MuxerEngine(AnalysisEngine):
     """ Selects 'muxer' parameter for nodes who have to many clients to a service.
     """
 
-    class Muxer:
+    class Muxer(DeterministicHash):
         def __init__(self, service, component, replicate=False):
             self.service   = service
             self.replicate = replicate
@@ -1500,7 +1736,7 @@ class MuxerEngine(AnalysisEngine):
             return {None}
 
     def assign(self, obj, candidates):
-        return random.choice(list(candidates))
+        return self.random_choice(candidates)
 
     def transform(self, obj, target_layer):
 
@@ -1545,7 +1781,7 @@ class QueryEngine(AnalysisEngine):
         if len(candidates) > 1:
             logging.info("Multiple mapping candidates for '%s'." % (obj))
 
-        return random.choice(list(candidates))
+        return self.random_choice(candidates)
 
     def source_types(self):
         return self.layer.node_types()
@@ -1582,7 +1818,7 @@ class ComponentEngine(AnalysisEngine):
         """
         assert(not isinstance(obj, Edge))
 
-        return random.choice(list(candidates))
+        return self.random_choice(candidates)
 
     def check(self, obj):
         """ Sanity check.
@@ -1629,7 +1865,7 @@ class PatternEngine(AnalysisEngine):
 
         first = sorted(candidates, reverse=True, key=lambda c: c.prio())[0]
         if first.prio() == 0:
-            return random.choice(list(candidates))
+            return self.random_choice(candidates)
 
 
     def check(self, obj):
@@ -1824,7 +2060,7 @@ class ReachabilityEngine(AnalysisEngine):
         """
         assert(isinstance(obj, Edge))
 
-        return random.choice(list(candidates))
+        return self.random_choice(candidates)
 
     def transform(self, obj, target_layer):
         """ Transforms obj (Edge) based on the selected carrier.
@@ -1956,7 +2192,7 @@ class InstantiationEngine(AnalysisEngine):
                 if c.shared():
                     return c
 
-        return random.choice(list(candidates))
+        return self.random_choice(candidates)
 
     def transform(self, obj, target_layer):
 
@@ -1995,6 +2231,8 @@ class InstantiationEngine(AnalysisEngine):
         return self.factory.types()
 
 class SingletonEngine(AnalysisEngine):
+    memoisable = True
+
     def __init__(self, layer, platform_model):
         acl = { layer : { 'reads' : set(['mapping', 'target-service']) }}
         AnalysisEngine.__init__(self, layer, param=None, acl=acl)
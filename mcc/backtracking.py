@@ -16,6 +16,8 @@ from mcc.graph import *
 from mcc.importexport import *
 from mcc.tracking import TopologicalGraph as NonchronologicalTracker
 from mcc.tracking import LinearGraph as ChronologicalTracker
+from mcc.tracking import IndexedTopologicalGraph, IndexedLinearGraph
+from mcc.checkpoint import Journal
 
 
 class BacktrackRegistry(Registry):
@@ -25,8 +27,8 @@ class BacktrackRegistry(Registry):
     Uses Backtracking to find a valid config instead of failing
     """
 
-    def __init__(self):
-        super().__init__()
+    def __init__(self, compact_params=False, seed=None):
+        super().__init__(compact_params=compact_params, seed=seed)
         self.backtracking_try = 0
 
         # stores state (completed) of operations
@@ -35,6 +37,19 @@ class BacktrackRegistry(Registry):
         self.variables = list()
         self.failed    = list()
 
+        # undo journal (only used in snapshot mode)
+        self.journal   = None
+
+        # subspace to explore (only used by parallel exploration)
+        self.partition = None
+
+        # instrumentation (see :mod:`mcc.profiling`)
+        self.profiler  = None
+        self.tracer    = None
+
+        # stats of analysis engines, kept by clear() (see :func:`register_stats`)
+        self.engine_stats = dict()
+
         self.stats = { 'iterations'             : 0,
                        'rolled-back operations' : 0,
                        'cut-off combinations'   : 0,
@@ -42,6 +57,21 @@ class BacktrackRegistry(Registry):
                        'combinations'           : 0,
                        'failed_ops'             : dict()}
 
+    def register_stats(self, name, stats):
+        """ Adds the stats of an analysis engine to the registry's stats.
+
+        As the registered steps, these stats are kept by :func:`clear` and thus
+        accumulate over multiple executions.
+
+        Args:
+            :param name: key in :attr:`stats`
+            :type  name: str
+            :param stats: counters maintained by the analysis engine
+            :type  stats: dict
+        """
+        self.engine_stats[name] = stats
+        self.stats[name]        = stats
+
     def clear(self):
         self.reset()
         self.backtracking_try = 0
@@ -52,6 +82,16 @@ class BacktrackRegistry(Registry):
         self.variables = list()
         self.failed    = list()
 
+        # undo journal (only used in snapshot mode)
+        self.journal   = None
+
+        # subspace to explore (only used by parallel exploration)
+        self.partition = None
+
+        # instrumentation (see :mod:`mcc.profiling`)
+        self.profiler  = None
+        self.tracer    = None
+
         self.stats = { 'iterations'             : 0,
                        'rolled-back operations' : 0,
                        'cut-off combinations'   : 0,
@@ -114,19 +154,80 @@ class BacktrackRegistry(Registry):
         # skip operation if marked True
         return self.operations[operation]
 
-    def execute(self, outpath=None, nonchronological=True):
+    def execute(self, outpath=None, nonchronological=True, indexed_tracking=False, snapshots=False,
+                partition=None, profiler=None, tracer=None, memo_size=0, nogoods=0):
         """ Executes the registered steps sequentially.
+
+        Args:
+            :param nonchronological: use non-chronological backtracking
+            :type  nonchronological: bool
+            :param indexed_tracking: use the decision graph with numbered params (see :class:`mcc.tracking.IndexedTracking`)
+            :type  indexed_tracking: bool
+            :param snapshots: restore checkpoints instead of rolling back every operation (see :mod:`mcc.checkpoint`),
+                              requires chronological backtracking
+            :type  snapshots: bool
+            :param partition: only explore the given subspace of the first revisable decision
+            :type  partition: :class:`mcc.simulation.Partition`
+            :param profiler: records call counts and times of operations and analysis engines
+            :type  profiler: :class:`mcc.profiling.Profiler`
+            :param tracer: records a timeline of iterations, steps, operations and rollbacks
+            :type  tracer: :class:`mcc.profiling.Tracer`
+            :param memo_size: maximum number of memoised results per memoisable analysis engine of a check
+                              operation (see :func:`mcc.framework.AnalysisEngine.memoise`), 0 disables memoisation
+            :type  memo_size: int
+            :param nogoods: maximum number of learned nogoods (see :class:`mcc.framework.DecisionGraph.Nogoods`),
+                            0 disables learning, requires non-chronological backtracking
+            :type  nogoods: int
         """
+        assert not snapshots or not nonchronological, "snapshots require chronological backtracking"
+        assert not nogoods or nonchronological, "nogoods require non-chronological backtracking"
 
-        self.decision_graph = NonchronologicalTracker() \
-                if nonchronological else ChronologicalTracker()
+        if indexed_tracking:
+            self.decision_graph = IndexedTopologicalGraph() \
+                    if nonchronological else IndexedLinearGraph()
+        else:
+            self.decision_graph = NonchronologicalTracker() \
+                    if nonchronological else ChronologicalTracker()
         self.decision_graph.initialize_tracking(self.by_order)
+        if nogoods:
+            self.decision_graph.nogoods = DecisionGraph.Nogoods(nogoods)
+            self.stats['nogoods'] = self.decision_graph.nogoods.stats
+        self.partition = partition
+        self.share_rng()
+
+        if snapshots:
+            self.journal = Journal()
+            self.journal.attach(self.by_order)
+            self.stats['snapshots'] = self.journal.stats
+
+        if memo_size:
+            self.stats['memoised checks'] = self.memoise_checks(memo_size)
+
+        self.stats.update(self.engine_stats)
+
+        self.profiler = profiler
+        if self.profiler is not None:
+            self.profiler.attach(self)
+
+        self.tracer = tracer
+        if self.tracer is not None:
+            self.tracer.attach(self)
 
         import time
         start = time.process_time()
 
-        while not self._backtrack_execute(outpath):
-            pass
+        try:
+            while not self._backtrack_execute(outpath):
+                pass
+        finally:
+            if self.journal is not None:
+                self.journal.detach(self.by_order)
+                self.journal = None
+            if self.tracer is not None:
+                self.tracer.detach()
+                self.tracer.write()
+            if self.profiler is not None:
+                self.profiler.detach()
 
         end = time.process_time()
 
@@ -135,6 +236,24 @@ class BacktrackRegistry(Registry):
 
         self._output_layer(self.steps[-1].target_layer)
 
+    def memoise_checks(self, size):
+        """ Memoises the results of all memoisable analysis engines of check operations.
+
+        Returns:
+            dict with the hit, miss and eviction counts of all these engines
+        """
+        stats = { 'hits' : 0, 'misses' : 0, 'evictions' : 0 }
+        for step in self.steps:
+            for op in step.operations:
+                if not isinstance(op, Check):
+                    continue
+
+                for ae in op.analysis_engines:
+                    if ae.memoisable:
+                        ae.memoise(size, stats)
+
+        return stats
+
     def _backtrack_execute(self, outpath):
         print()
 
@@ -158,9 +277,16 @@ class BacktrackRegistry(Registry):
             try:
                 step.execute(self)
 
+                if self.partition is not None and \
+                   self._restrict_partition(final=step is self.steps[-1]):
+                    return False
+
             except ConstraintNotSatisfied as cns:
                 logging.info('%s failed' % cns)
 
+                if self.partition is not None and self._restrict_partition(final=True):
+                    return False
+
                 # find branch point
                 culprit = self.find_culprit(cns)
                 if culprit is None:
@@ -172,8 +298,11 @@ class BacktrackRegistry(Registry):
 
                 logging.info("\nRolling back to: %s" % (culprit))
 
+                if self.decision_graph.nogoods is not None:
+                    self._learn_nogood(cns)
+
                 # mark current value(s) as bad
-                if not cns.updated:
+                if not cns.updated or isinstance(cns.updated, DecisionGraph.Culprits):
                     self.decision_graph.mark_bad(culprit)
 
                 leaves = self.decision_graph.successors(culprit, recursive=True)
@@ -249,24 +378,134 @@ class BacktrackRegistry(Registry):
         if time:
             print('time: %f' % time)
 
+        if self.profiler is not None:
+            self.profiler.print_stats()
+            self.profiler.write()
+
+    def _find_partitionable(self):
+        """ Finds the first revisable decision that writes a param with multiple candidates.
+
+        Returns:
+            tuple of :class:`DecisionGraph.Node` and :class:`DecisionGraph.Param`, (None, None) if there is none
+        """
+        for n in self.decision_graph.nodes():
+            if not self.decision_graph.revisable(n):
+                continue
+
+            # split the candidates of a single param (for batch decisions, the
+            # first param with multiple candidates)
+            params = deterministic_order(self.decision_graph.written_params(n))
+            for p in params:
+                if len(p.layer.untracked_get_param_candidates(p.param, p.obj)) > 1:
+                    return n, p
+
+        return None, None
+
+    def _restrict_partition(self, final=False):
+        """ Restricts the candidates of the first revisable decision to the share
+            selected by self.partition once this decision has been made.
+
+        If there is nothing to split yet, the partition is kept for the next call.
+        If there is nothing to split at all (final), only the first subspace
+        continues the search.
+
+        Args:
+            :param final: no further decisions will be made before the search continues or ends
+            :type  final: bool
+
+        Returns:
+            True if the decision was rolled back (i.e. a new iteration is required)
+        """
+        root, p = self._find_partitionable()
+        if root is None:
+            if final:
+                partition, self.partition = self.partition, None
+                if partition.index > 0:
+                    logging.info("%s: nothing to split, leaving the search to the first subspace" % partition)
+                    self.print_stats()
+                    raise Exception('No config could be found')
+            return False
+
+        candidates = p.layer.untracked_get_param_candidates(p.param, p.obj)
+        partition, self.partition = self.partition, None
+        share = partition.select(candidates)
+        logging.info("%s: restricting %s to %s" % (partition, p, share))
+
+        if not share:
+            self.print_stats()
+            raise Exception('No config could be found')
+
+        # the decision is revised with the restricted candidates
+        self.invalidate_subtree(root)
+        p.layer.untracked_set_param_candidates(p.param, p.obj, share)
+        self.decision_graph.next_iteration(root)
+
+        # the map operation may be repeated (non-chronological backtracking),
+        # hence we also restrict its candidates
+        writer = self.decision_graph.find_writers(p.layer, p.obj, p.param).map
+        if writer is not None and not isinstance(writer.operation, BatchMap):
+            writer.operation.register_ae(partition.engine(p, share))
+
+        return True
+
     def find_culprit(self, cns):
         if not cns.updated:
             return self._find_brancheable(cns.node)
+        elif isinstance(cns.updated, DecisionGraph.Culprits):
+            # revise the latest decision on which the culprits depend,
+            # fall back to the latest decision if there is none
+            relevant = self.decision_graph.dependencies(cns.updated)
+            culprit = self._find_brancheable(cns.node, relevant)
+            if culprit is None:
+                culprit = self._find_brancheable(cns.node)
+            return culprit
         else:
             return self._find_highest(cns.node, cns.updated)
 
-    def _find_brancheable(self, node):
+    def _learn_nogood(self, cns):
+        """ Records the values of the decisions on which a failed check depends as a nogood.
+        """
+        # remark: a plain set of updated nodes indicates changed candidates
+        if not isinstance(cns.node.operation, Check) or \
+           (cns.updated and not isinstance(cns.updated, DecisionGraph.Culprits)):
+            return
+
+        params = set()
+        for n in self.decision_graph.dependencies(cns.updated or {cns.node}):
+            if isinstance(n.operation, Assign):
+                params.update(self.decision_graph.written_params(n))
+
+        if self.decision_graph.nogoods.learn(params):
+            logging.info("Learned nogood on %d params" % len(params))
+
+    def _find_brancheable(self, node, relevant=None):
         path = self.decision_graph.root_path(node)
         path.pop() # pop 'node' from path
 
         # go backwards until we have found a changeable operation
         while path:
             n = path.pop()
+            if relevant is not None and n not in relevant:
+                continue
             if self.decision_graph.revisable(n):
                 return n
+            if relevant is not None and self._has_failed(n):
+                # the other candidates of n may have failed for other reasons,
+                # hence we must not skip any operation from here on
+                relevant = None
 
         return None
 
+    def _has_failed(self, node):
+        if not isinstance(node.operation, Assign):
+            return False
+
+        for p in self.decision_graph.written_params(node):
+            if p.layer.get_param_failed(p.param, p.obj) is not None:
+                return True
+
+        return False
+
     def _find_highest(self, node, updated):
         path = self.decision_graph.root_path(node)
         path.pop() # pop 'node' from path
@@ -341,6 +580,9 @@ class BacktrackRegistry(Registry):
     def invalidate_subtree(self, start):
         assert isinstance(start.operation, Assign)
 
+        if self.journal is not None:
+            return self._restore_checkpoint(start)
+
         for n in self.decision_graph.reversed_subtree(start):
             assert n.obj is None or isinstance(n.obj, frozenset) or n.obj in n.layer.graph.nodes() or n.obj in n.layer.graph.edges(), "CANNOT REVERSE %s: already deleted" % n
 
@@ -374,6 +616,36 @@ class BacktrackRegistry(Registry):
                 # remove node from decision graph
                 self.decision_graph.remove(n)
 
+    def _restore_checkpoint(self, start):
+        """ Snapshot-mode alternative to the rollback in :func:`invalidate_subtree`.
+        """
+        # the current failed state of start must survive the restore
+        failed = dict()
+        for p in self.decision_graph.written_params(start):
+            failed[p] = p.layer.get_param_failed(p.param, p.obj)
+
+        for n in self.decision_graph.reversed_subtree(start):
+            op = n.operation
+            if isinstance(op, Map):
+                # analysis engines are not covered by the journal
+                for ae in op.analysis_engines:
+                    if hasattr(ae, 'reset'):
+                        ae.reset(n.obj)
+
+            if op in self.operations and self.operations[op]:
+                logging.debug("Marking %s as to-be-repeated" % op)
+                self.operations[op] = False
+
+            if n is not start:
+                self.decision_graph.remove(n)
+                self.journal.discard(n)
+
+        self.journal.restore(start)
+
+        for p, f in failed.items():
+            if f is not None:
+                p.layer.set_param_failed(p.param, p.obj, f)
+
     def delete_recursive(self, obj, layer):
         if obj not in layer.graph.nodes() and obj not in layer.graph.edges():
             return
@@ -0,0 +1,139 @@
+"""
+Description
+-----------
+
+Implements checkpoint/restore for :class:`mcc.backtracking.BacktrackRegistry`
+as an alternative to the fine-grained rollback of individual operations.
+
+While a :class:`Journal` is attached to the layers, every modification of a
+layer (nodes, edges, params and inter-layer associations) records the
+information required to undo it. A checkpoint is merely a position in this
+journal, which is taken before every Assign operation. Restoring a checkpoint
+undoes all later modifications in reverse order, hence its cost is proportional
+to the number of changes since the checkpoint rather than to the size of the model.
+
+Restoring a checkpoint reverts everything that happened after the checkpointed
+operation. This matches chronological backtracking only, because non-chronological
+backtracking retains the operations that do not depend on the culprit.
+
+:Authors:
+    - Johannes Schlatow
+
+"""
+
+import itertools
+
+
+class Journal:
+    """ Undo log of layer modifications.
+    """
+
+    def __init__(self):
+        self.entries     = list()
+        self.checkpoints = dict()
+        self.pending     = 0
+        self.stats       = { 'checkpoints' : 0,
+                             'restores'    : 0,
+                             'undone'      : 0 }
+
+    def attach(self, layers):
+        for layer in layers:
+            layer.journal = self
+
+    def detach(self, layers):
+        for layer in layers:
+            if layer.journal is self:
+                layer.journal = None
+
+    def start_operation(self):
+        """ Remembers the journal position before an operation is executed.
+        """
+        self.pending = len(self.entries)
+
+    def checkpoint(self, node):
+        """ Stores the position remembered by :func:`start_operation` as checkpoint
+            of the given decision graph node.
+        """
+        self.checkpoints[node] = self.pending
+        self.stats['checkpoints'] += 1
+
+    def discard(self, node):
+        self.checkpoints.pop(node, None)
+
+    def restore(self, node):
+        """ Reverts all modifications since the checkpoint of the given node.
+        """
+        pos = self.checkpoints[node]
+        assert pos <= len(self.entries)
+
+        self.stats['restores'] += 1
+        self.stats['undone']   += len(self.entries) - pos
+
+        while len(self.entries) > pos:
+            undo, args = self.entries.pop()
+            undo(*args)
+
+    # recording (called by :class:`mcc.framework.Layer` before/after modifications)
+
+    def record_param(self, layer, param, obj):
+        self.entries.append((self._undo_param,
+                             (layer, param, obj, layer._params.save(param, obj))))
+
+    def record_add_node(self, layer, obj):
+        self.entries.append((self._undo_add_node, (layer, obj)))
+
+    def record_add_edge(self, layer, edge):
+        self.entries.append((self._undo_add_edge, (layer, edge)))
+
+    def record_remove_node(self, layer, obj):
+        # incident edges are removed along with the node
+        graph = layer.graph
+        edges = [(e, dict(graph.edge_attributes(e)))
+                    for e in itertools.chain(graph.in_edges(obj), graph.out_edges(obj))]
+        self.entries.append((self._undo_remove_node,
+                             (layer, obj, dict(graph.node_attributes(obj)), edges)))
+
+    def record_remove_edge(self, layer, edge):
+        self.entries.append((self._undo_remove_edge,
+                             (layer, edge, dict(layer.graph.edge_attributes(edge)))))
+
+    def record_interlayer(self, layer, target_layer, obj):
+        interlayer = layer._interlayer(obj)
+        self.entries.append((self._undo_interlayer,
+                             (layer, target_layer, obj, interlayer.get(target_layer))))
+
+    # undo actions (operate on the graph and param store directly to bypass recording)
+
+    @staticmethod
+    def _undo_param(layer, param, obj, state):
+        layer._params.restore(param, obj, state)
+
+    @staticmethod
+    def _undo_add_node(layer, obj):
+        layer._params.forget(obj)
+        layer.graph.remove_node(obj)
+
+    @staticmethod
+    def _undo_add_edge(layer, edge):
+        layer._params.forget(edge)
+        layer.graph.remove_edge(edge)
+
+    @staticmethod
+    def _undo_remove_node(layer, obj, attributes, edges):
+        layer.graph.add_node(obj)
+        layer.graph.node_attributes(obj).update(attributes)
+        for e, attrs in edges:
+            Journal._undo_remove_edge(layer, e, attrs)
+
+    @staticmethod
+    def _undo_remove_edge(layer, edge, attributes):
+        layer.graph.add_edge(edge)
+        layer.graph.edge_attributes(edge).update(attributes)
+
+    @staticmethod
+    def _undo_interlayer(layer, target_layer, obj, objects):
+        interlayer = layer._interlayer(obj)
+        if objects is None:
+            interlayer.pop(target_layer, None)
+        else:
+            interlayer[target_layer] = objects
@@ -4,6 +4,10 @@ Description
 
 Implements more sophisticated analysis engines that require external tools.
 
+The external tools (ortools, pyCPA and taskchain) are only imported when the
+engines are used so that importing this module (or :mod:`mcc.lib`) does not
+pay their import cost.
+
 :Authors:
     - Johannes Schlatow
     - Edgard Schmidt
@@ -13,23 +17,194 @@ import logging
 from mcc.framework import *
 from mcc.taskmodel import *
 
-from collections import OrderedDict
+from collections import OrderedDict, Counter
 import itertools
-
-from ortools.sat.python import cp_model
-
-from pycpa import model as pycpa_model
-from pycpa import options as pycpa_options
-from pycpa import analysis as pycpa_analysis
-from pycpa import junctions as pycpa_junctions
-from taskchain import model as tc_model
-from taskchain import schedulers as tc_schedulers
+import copy
+import atexit
+import concurrent.futures
 
 class CPAEngine(AnalysisEngine):
     """ Executes Compositional Performance Analysis. Requires pyCPA.
+
+    By default, the taskchain resources are built directly from the task graph.
+    In incremental mode or with multiple workers, the resource models are
+    first recorded as :class:`ResourceDescription` and then built into taskchain
+    resources (see :func:`_check_descriptions`). In incremental mode, the built
+    resources (and their pyCPA tasks) are cached by their description, i.e.
+    only resources whose tasks changed in mapping, affinity, priority, wcet,
+    activation or links are rebuilt. If the system only differs from the
+    previously analysed system by increased WCETs, the previous results are a
+    lower bound of the new results and thus used as the starting point of the
+    analysis.
+
+    If the system is not schedulable, the decisions that determined the
+    unschedulable resources are reported as culprits (see :func:`_culprits`) so
+    that backtracking only revises relevant decisions.
+
+    With multiple workers, the resources are partitioned into groups that are
+    neither linked nor share contexts. If there are several groups, every
+    group is built and analysed in a separate process (see
+    :func:`_analyze_resources`) and the results are merged. Built resources
+    are not cached in this case.
     """
 
-    def __init__(self, layer, complayer, layers, constrmodel):
+    # pyCPA options (also set in the worker processes)
+    OPTIONS = { 'max_iterations' : 1000 }
+
+    memoisable = True
+
+    class ResourceDescription:
+        """ Records the construction of a :class:`taskchain.model.ResourceModel`.
+
+        Tasks, junctions and contexts are referenced by (kind, key) tuples, e.g.
+        ('task', node) or ('ectx', component). The recorded definitions and
+        operations identify the resource in the cache.
+        """
+        def __init__(self, name):
+            self.name        = name
+            self.definitions = OrderedDict() # reference -> (name, args)
+            self.operations  = list()
+            self.links       = set()         # links to/from tasks of other resources
+            self.tasks       = list()
+
+        def define(self, ref, name, *args):
+            self.definitions[ref] = (name, args)
+
+        def add_task(self, ref):
+            self.tasks.append(ref[1])
+            self.operations.append(('add_task', ref))
+
+        def add_junction(self, ref):
+            self.operations.append(('add_junction', ref))
+
+        def add_execution_context(self, ref):
+            self.operations.append(('add_execution_context', ref))
+
+        def add_scheduling_context(self, ref):
+            self.operations.append(('add_scheduling_context', ref))
+
+        def link_tasks(self, src, dst):
+            self.operations.append(('link_tasks', src, dst))
+
+        def link_junction(self, junction, task):
+            self.operations.append(('link_junction', junction, task))
+
+        def connect_junction(self, task, junction):
+            self.operations.append(('connect_junction', task, junction))
+
+        def assign_scheduling_context(self, task, sctx):
+            self.operations.append(('assign_scheduling_context', task, sctx))
+
+        def assign_execution_context(self, task, ectx, blocking):
+            self.operations.append(('assign_execution_context', task, ectx, blocking))
+
+        def foreign(self):
+            """ Returns the references to objects defined by other resources.
+            """
+            result = set()
+            for op in self.operations:
+                result.update(ref for ref in op[1:] if isinstance(ref, tuple) and ref not in self.definitions)
+            return result
+
+        def relabel(self, keys):
+            """ Returns a copy in which the references are replaced by the given keys.
+
+            The keys must be tuples as well. Used for passing the description to
+            another process, hence the tasks are omitted.
+            """
+            def key(arg):
+                return keys[arg] if isinstance(arg, tuple) else arg
+
+            result = copy.copy(self)
+            result.definitions = OrderedDict((keys[ref], d) for ref, d in self.definitions.items())
+            result.operations  = [(op[0],) + tuple(key(a) for a in op[1:]) for op in self.operations]
+            result.links       = set((keys[src], keys[dst]) for src, dst in self.links)
+            result.tasks       = list()
+            return result
+
+        def signature(self, wcets=True):
+            definitions = tuple((ref, args if wcets or ref[0] != 'task' else args[1:])
+                                for ref, (name, args) in self.definitions.items())
+            return (self.name, definitions, tuple(self.operations), frozenset(self.links))
+
+        def instantiate(self):
+            """ Creates the pyCPA tasks, junctions and taskchain contexts.
+
+            Returns:
+                dict mapping references to created objects
+            """
+            from pycpa import model as pycpa_model
+            from pycpa import junctions as pycpa_junctions
+            from taskchain import model as tc_model
+
+            objects = dict()
+            for ref, (name, args) in self.definitions.items():
+                if ref[0] == 'task':
+                    wcet, bcet = args
+                    objects[ref] = pycpa_model.Task(name, wcet=wcet, bcet=bcet)
+                elif ref[0] == 'junction':
+                    strategy = pycpa_junctions.ANDJoin() if args[0] == 'AND' else pycpa_junctions.ORJoin()
+                    objects[ref] = pycpa_model.Junction(name, strategy=strategy)
+                elif ref[0] == 'ectx':
+                    objects[ref] = tc_model.ExecutionContext(name)
+                elif ref[0] == 'sctx':
+                    objects[ref] = tc_model.SchedulingContext(name)
+                    if args[0]:
+                        objects[ref].priority = args[0]
+
+            return objects
+
+        def build(self, objects):
+            """ Replays the operations on a new resource model and builds the taskchain resource.
+
+            Returns:
+                (:class:`taskchain.model.ResourceModel`, :class:`taskchain.model.TaskchainResource`)
+            """
+            from taskchain import model as tc_model
+            from taskchain import schedulers as tc_schedulers
+
+            model = tc_model.ResourceModel(self.name)
+            for op in self.operations:
+                args = [objects[a] if isinstance(a, tuple) else a for a in op[1:]]
+                if op[0] == 'assign_execution_context':
+                    model.assign_execution_context(args[0], args[1], blocking=args[2])
+                else:
+                    getattr(model, op[0])(*args)
+
+            model.check()
+
+            # create TaskchainResources and create taskchains
+            resource = tc_model.TaskchainResource(model.name, scheduler=tc_schedulers.SPPSchedulerSegmentsInheritance())
+            resource.build_from_model(model)
+            resource.create_taskchains()
+
+            return model, resource
+
+    class CachedResource:
+        def __init__(self, model, resource, objects, foreign):
+            self.model    = model
+            self.resource = resource
+            self.objects  = objects  # own objects
+            self.foreign  = foreign  # referenced objects of other resources
+
+    class NotSchedulable(Exception):
+        """ Raised if the given resources (or a group of them) are not schedulable.
+        """
+        def __init__(self, descriptions, error):
+            super().__init__(str(error))
+            self.descriptions = descriptions
+
+    def __init__(self, layer, complayer, layers, constrmodel, incremental=False, cache_size=64, workers=None):
+        """
+        Args:
+            :param incremental: cache built resources and reuse previous results (see :class:`CPAEngine`)
+            :type  incremental: bool
+            :param cache_size: maximum number of cached resources
+            :type  cache_size: int
+            :param workers: number of worker processes for analysing independent groups of resources
+                            (None: analyse all resources in this process)
+            :type  workers: int
+        """
         acl = { layer        : {'reads' : {'mapping', 'wcet', 'activation'}},
                 complayer    : {'reads' : {'priority', 'affinity'}}}
         AnalysisEngine.__init__(self, layer, param=None, acl=acl)
@@ -37,7 +212,25 @@ class CPAEngine(AnalysisEngine):
         self.complayer = complayer
         self.layers      = layers
         self.constrmodel = constrmodel
-        pycpa_options.set_opt("max_iterations", 1000)
+
+        self.incremental = incremental
+        self.cache_size  = cache_size
+        self._cache      = OrderedDict() # signature -> CachedResource
+        self._previous   = None          # (structure, wcets, results) of the last schedulable system
+        self.workers     = workers
+
+        self.stats = { 'analyses'           : 0,
+                       'seeded analyses'    : 0,
+                       'resources built'    : 0,
+                       'resources reused'   : 0,
+                       'not schedulable'    : 0,
+                       'culprits'           : 0,
+                       'parallel analyses'  : 0,
+                       'resource groups'    : 0 }
+
+        from pycpa import options as pycpa_options
+        for name, value in self.OPTIONS.items():
+            pycpa_options.set_opt(name, value)
 
     def _get_resource(self, obj):
         pfc = self.layer.get_param_value(self, 'mapping', obj)
@@ -47,7 +240,456 @@ class CPAEngine(AnalysisEngine):
 
         return pfc, aff
 
+    def _describe(self, iterable):
+        """ Records the resource models, activations and links of the task graph.
+
+        Returns:
+            (list of :class:`ResourceDescription`, dict of PJ activations (task ref -> [P, J]),
+             set of external links (src ref, dst ref), dict of wcets (node -> wcet))
+        """
+        models = dict()  # PfComponent -> ResourceDescription
+        tasks     = dict()  # Node -> task reference
+        threads   = dict()  # Component -> (execution context ref, scheduling context ref)
+        threadmap = dict()  # Node -> Thread
+        junctions = dict()
+        wcets     = dict()
+
+        taskid = 1
+        for obj in iterable:
+            task = obj.obj(self.layer)
+            pfc, aff = self._get_resource(obj)
+
+            # create new resource model if needed
+            if pfc not in models:
+                create = True
+                for tmp in models.keys():
+                    if tmp.in_native_domain(pfc):
+                        models[pfc] = models[tmp]
+                        create = False
+                        break
+
+                if create:
+                    models[pfc] = dict()
+
+            if aff not in models[pfc]:
+                models[pfc][aff] = self.ResourceDescription(pfc.domain_name()+'-%s' % aff)
+
+            # define pycpa_model.Task
+            tasks[obj] = ('task', obj)
+            wcets[obj] = self.layer.get_param_value(self, 'wcet', obj).copy()
+            models[pfc][aff].define(tasks[obj], 't%d-%s' % (taskid, task.name), wcets[obj], task.bcet)
+            if task.expect_in == 'junction':
+                jt = task.expect_in_args['junction_type']
+                if jt == 'AND' or jt == 'OR':
+                    junctions[obj] = ('junction', obj)
+                    models[pfc][aff].define(junctions[obj], 'j%d'%taskid, jt)
+                    models[pfc][aff].add_junction(junctions[obj])
+                elif jt == 'MUX':
+                    raise NotImplementedError
+
+            taskid += 1
+            models[pfc][aff].add_task(tasks[obj])
+
+            comp = task.thread
+            # create new execution and scheduling context if needed
+            if comp not in threads:
+                # create execution context
+                ectx = ('ectx', comp)
+                models[pfc][aff].define(ectx, 'e-'+task.thread.obj(self.complayer).label())
+                models[pfc][aff].add_execution_context(ectx)
+
+                # get scheduling priority
+                prio = self.complayer.get_param_value(self, 'priority', comp)
+
+                # create scheduling context
+                sctx = ('sctx', comp)
+                models[pfc][aff].define(sctx, 's-'+task.thread.obj(self.complayer).label(),
+                                        prio.copy() if prio else None)
+                models[pfc][aff].add_scheduling_context(sctx)
+
+                threads[comp] = (ectx, sctx)
+
+            threadmap[obj] = comp
+
+        allmodels = list()
+        for m in models.values():
+            for model in m.values():
+                if model not in allmodels:
+                    allmodels.append(model)
+
+        # create tasklinks
+        roots  = set()
+        leaves = set()
+        external_links = set()
+        for model in allmodels:
+            for node in model.tasks:
+                # remember root tasks
+                if not set(self.layer.in_edges(node)):
+                    roots.add(node)
+
+                if node in junctions:
+                    model.link_junction(junctions[node], tasks[node])
+
+                pfc, aff = self._get_resource(node)
+
+                has_out = False
+                for e in self.layer.out_edges(node):
+                    has_out = True
+
+                    trg_pfc, trg_aff = self._get_resource(e.target)
+                    if trg_aff != aff:
+                        assert e.target not in junctions, 'cross core junction not supported'
+                        external_links.add((tasks[e.source], tasks[e.target]))
+                        continue
+
+                    if e.target not in junctions:
+                        model.link_tasks(tasks[node], tasks[e.target])
+                    else:
+                        model.connect_junction(tasks[node], junctions[e.target])
+
+                if not has_out:
+                    leaves.add(node)
+
+
+        # assign execution and scheduling contexts by tracing task graph
+        visited = set()
+        activations = dict()
+        interrupt_tasks_in = dict((k, dict()) for k in models.keys())
+        for root in roots:
+            pfc, aff = self._get_resource(root)
+
+            # store event model
+            act = self.layer.get_param_value(self, 'activation', root)
+            if act.wrapsinstance(PJEventModel):
+                activations[tasks[root]] = [act.P, act.J]
+            elif act.wrapsinstance(InEventModel):
+                interrupt_tasks_in[pfc][act.name] = tasks[root]
+
+            ectx, sctx = threads[threadmap[root]]
+
+            # assign own scheduling context to root tasks
+            models[pfc][aff].assign_scheduling_context(tasks[root],
+                                                       sctx)
+
+            # assign own execution context to root tasks
+            models[pfc][aff].assign_execution_context(tasks[root],
+                                                      ectx,
+                                                      blocking=False)
+
+            threadstack = []
+            node = root
+            next_nodes = deque()
+
+            while node:
+                pfc, aff = self._get_resource(node)
+
+                # first follow rpc edges
+                has_rpc = False
+                for e in (e for e in self.layer.out_edges(node) if e.edgetype() == 'call'):
+                    assert e.target not in visited
+                    next_nodes.append(e.target)
+                    visited.add(e.target)
+                    has_rpc = True
+
+                    trg_pfc, trg_aff = self._get_resource(e.target)
+                    if trg_pfc != pfc:
+                        logging.error("Not analysable: RPC across resources.")
+                        raise NotImplementedError
+                    elif trg_aff != aff:
+                        logging.error("Not analysable: RPC across cores.")
+                        raise NotImplementedError
+
+                    # called task gets its scheduling context from top of stack
+                    if threadstack:
+                        sctx = threads[threadstack[0]][1]
+                    else:
+                        sctx = threads[threadmap[e.source]][1]
+                    models[pfc][aff].assign_scheduling_context(tasks[e.target], sctx)
+
+                    thread_target = threadmap[e.target]
+                    thread_source = threadmap[e.source]
+
+                    # if called task is already on the stack
+                    if thread_target in threadstack:
+                        # this is a return call -> release ectx from current task
+                        models[pfc][aff].assign_execution_context(tasks[e.source],
+                                                                  threads[thread_source][0],
+                                                                  blocking = False)
+
+                        assert threadstack[-1] == thread_source, '%s != %s, for edge %s -> %s\n%s'  \
+                             % (threadstack[-1], thread_source, e.source, e.target, threadstack)
+                        threadstack.pop()
+                    elif not threadstack:
+                        models[pfc][aff].assign_execution_context(tasks[e.source],
+                                                                  threads[thread_source][0],
+                                                                  blocking = True)
+                        if thread_source != thread_target:
+                            threadstack.append(thread_source)
+                        threadstack.append(thread_target)
+                    else:
+                        # this is a real call -> push ectx to stack
+                        threadstack.append(thread_target)
+
+                    # called task blocks all execution contexts on the stack
+                    for th in threadstack:
+                        models[pfc][aff].assign_execution_context(tasks[e.target],
+                                                                 threads[th][0],
+                                                                 blocking = True)
+
+                if not has_rpc:
+                    # release our execution context
+                    models[pfc][aff].assign_execution_context(tasks[node],
+                                                         threads[threadmap[node]][0],
+                                                         blocking = False)
+
+                for e in (e for e in self.layer.out_edges(node) if e.edgetype() == 'signal'):
+                    if e.target in visited:
+                        continue
+
+                    next_nodes.appendleft(e.target)
+                    visited.add(e.target)
+
+                    trg_pfc, trg_aff = self._get_resource(e.target)
+                    # signalled tasks get their own scheduling context
+                    models[trg_pfc][trg_aff].assign_scheduling_context(tasks[e.target],
+                                                               threads[threadmap[e.target]][1])
+                    # next task releases its execution context
+                    models[trg_pfc][trg_aff].assign_execution_context(tasks[e.target],
+                                                              threads[threadmap[e.target]][0],
+                                                              blocking = False)
+
+                try:
+                    node = next_nodes.pop()
+                except:
+                    node = None
+
+        interrupt_tasks_out = dict((k, dict()) for k in models.keys())
+        for leaf in leaves:
+            pfc = self.layer.get_param_value(self, 'mapping', leaf)
+            act = self.layer.get_param_value(self, 'activation', leaf)
+            if act and act.wrapsinstance(OutEventModel):
+                interrupt_tasks_out[pfc][act.name] = tasks[leaf]
+
+        # FIXME (future work) deal with mux and demux junctions
+
+        # find and connect interrupt tasks
+        for pfco, odata in interrupt_tasks_out.items():
+            for name, to in odata.items():
+                found = False
+                for pfci, idata in interrupt_tasks_in.items():
+                    if not pfco.in_native_domain(pfci):
+                        if name in idata:
+                            external_links.add((to, idata[name]))
+                            found = True
+                assert found, 'Cannot link interrupt task %s with irq=%s' % (to, name)
+
+        # links to other resources are part of the resource description
+        for model in allmodels:
+            for src, dst in external_links:
+                if src in model.definitions or dst in model.definitions:
+                    model.links.add((src, dst))
+
+        # workaround: the latency requirement is actually a fps requirement, i.e. 
+        #             we must adapt the input event model to the latency requirement
+        for lat in self.constrmodel.latency_constraints():
+            # only for minimum rate requirements
+            if 'min_rate' in lat:
+                # find time trigger
+                for t in self._get_objects_on_layer(lat['source'], self.layer):
+                    if not isinstance(t, Edge) and ('task', t) in activations:
+                        # assign period from min_rate_us attribute
+                        activations[('task', t)][0] = lat['min_rate']
+
+        return allmodels, activations, external_links, wcets
+
+    def _build(self, descriptions):
+        """ Builds the taskchain resources (or takes them from the cache).
+
+        Returns:
+            (dict mapping references to objects, list of taskchain resources,
+             list of junctions, set of reused objects)
+        """
+        signatures = [d.signature() for d in descriptions]
+
+        # reuse cached resources if their references to other resources are still valid
+        reused = dict()
+        if self.incremental:
+            reused = { i : self._cache[s] for i, s in enumerate(signatures) if s in self._cache }
+            changed = True
+            while changed:
+                changed = False
+                objects = dict()
+                for cached in reused.values():
+                    objects.update(cached.objects)
+
+                for i, cached in list(reused.items()):
+                    if any(objects.get(ref) is not obj for ref, obj in cached.foreign.items()):
+                        del reused[i]
+                        changed = True
+
+        objects = dict()
+        for i, d in enumerate(descriptions):
+            if i in reused:
+                objects.update(reused[i].objects)
+            else:
+                objects.update(d.instantiate())
+
+        resources = list()
+        junctions = list()
+        for i, d in enumerate(descriptions):
+            if i in reused:
+                cached = reused[i]
+                self._cache.move_to_end(signatures[i])
+                self.stats['resources reused'] += 1
+            else:
+                model, resource = d.build(objects)
+                cached = self.CachedResource(model, resource,
+                                             objects    = { ref : objects[ref] for ref in d.definitions },
+                                             foreign    = { ref : objects[ref] for ref in d.foreign() })
+                self.stats['resources built'] += 1
+
+                if self.incremental:
+                    self._cache[signatures[i]] = cached
+                    if len(self._cache) > self.cache_size:
+                        self._cache.popitem(last=False)
+
+            resources.append(cached.resource)
+            junctions.extend(cached.model.junctions)
+
+        logging.info("Reusing %d of %d resources" % (len(reused), len(descriptions)))
+
+        reused_objects = set()
+        for cached in reused.values():
+            reused_objects.update(cached.objects.values())
+
+        return objects, resources, junctions, reused_objects
+
+    def _independent_groups(self, descriptions, external_links):
+        """ Partitions the resources into groups that are neither linked nor share contexts.
+
+        Returns:
+            list of lists of :class:`ResourceDescription`
+        """
+        owner = dict() # reference -> index of ResourceDescription
+        for i, d in enumerate(descriptions):
+            for ref in d.definitions:
+                owner[ref] = i
+
+        parent = list(range(len(descriptions)))
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for src, dst in external_links:
+            parent[find(owner[src])] = find(owner[dst])
+        for i, d in enumerate(descriptions):
+            for ref in d.foreign():
+                parent[find(i)] = find(owner[ref])
+
+        groups = OrderedDict()
+        for i, d in enumerate(descriptions):
+            groups.setdefault(find(i), list()).append(d)
+
+        return list(groups.values())
+
+    def _analyze(self, descriptions, activations, external_links, previous):
+        """ Builds the system (using the cached resources) and analyses it in this process.
+
+        Returns:
+            dict mapping references to task results
+        """
+        from pycpa import model as pycpa_model
+        from pycpa import analysis as pycpa_analysis
+
+        objects, resources, junctions, reused = self._build(descriptions)
+
+        # (re-)assign input event models of root tasks
+        for ref, (P, J) in activations.items():
+            objects[ref].in_event_model = pycpa_model.PJdEventModel(P=P, J=J)
+
+        # bind everything to a system
+        system = pycpa_model.System('S')
+        for resource in resources:
+            system.bind_resource(resource)
+        for j in junctions:
+            system.bind_junction(j)
+
+        # remove links of reused objects to objects of previous systems
+        current = set(objects.values())
+        for obj in reused:
+            if hasattr(obj, 'next_tasks'):
+                obj.next_tasks = type(obj.next_tasks)(t for t in obj.next_tasks if t in current)
+
+        # add external links
+        for s, t in external_links:
+            objects[s].link_dependent_task(objects[t])
+
+        refs = { obj : ref for ref, obj in objects.items() }
+        try:
+            task_results = _run_analysis(system, refs, previous)
+        except pycpa_analysis.NotSchedulableException as e:
+            raise self.NotSchedulable(descriptions, e)
+
+        return { refs[obj] : result for obj, result in task_results.items() if obj in refs }
+
+    def _analyze_parallel(self, groups, activations, external_links, previous):
+        """ Analyses every group of resources in a worker process.
+
+        Returns:
+            dict mapping references to task results
+        """
+        # references contain model objects, hence we pass numbered keys to the workers
+        keys = dict()
+        for group in groups:
+            for d in group:
+                for ref in d.definitions:
+                    keys[ref] = (ref[0], len(keys))
+        refs = { key : ref for ref, key in keys.items() }
+
+        futures = list()
+        for group in groups:
+            owned = set(ref for d in group for ref in d.definitions)
+            seed  = None
+            if previous is not None:
+                seed = { keys[ref] : result for ref, result in previous.items() if ref in owned }
+
+            futures.append(_worker_pool(self.workers).submit(_analyze_resources,
+                [d.relabel(keys) for d in group],
+                { keys[ref] : a for ref, a in activations.items() if ref in owned },
+                [ (keys[src], keys[dst]) for src, dst in external_links if src in owned ],
+                seed))
+
+        self.stats['parallel analyses'] += 1
+        self.stats['resource groups']   += len(groups)
+
+        results = dict()
+        for group, future in zip(groups, futures):
+            result = future.result()
+            if not isinstance(result, dict):
+                # remark: running analyses cannot be cancelled, hence we wait for them
+                #         so that they do not delay the next batch_check
+                for f in futures:
+                    f.cancel()
+                concurrent.futures.wait(futures)
+                raise self.NotSchedulable(group, result)
+
+            results.update({ refs[key] : r for key, r in result.items() })
+
+        return results
+
     def batch_check(self, iterable):
+        if self.incremental or self.workers:
+            # resources are recorded as descriptions so that they can be cached
+            # or built in worker processes
+            return self._check_descriptions(iterable)
+
+        from pycpa import model as pycpa_model
+        from pycpa import analysis as pycpa_analysis
+        from pycpa import junctions as pycpa_junctions
+        from taskchain import model as tc_model
+        from taskchain import schedulers as tc_schedulers
 
         models = dict()  # PfComponent -> tc_model.ResourceModel
         tasks     = dict()  # Node -> pycpa_model.Task
@@ -320,14 +962,66 @@ class CPAEngine(AnalysisEngine):
 
         # perform analysis
         logging.info("Performing CPA")
+        self.stats['analyses'] += 1
         try:
             task_results = pycpa_analysis.analyze_system(system)
         except pycpa_analysis.NotSchedulableException as e:
             logging.error("System is NOT SCHEDULABLE")
-            return False
+            self.stats['not schedulable'] += 1
+            # remark: the exception does not tell which resources are not schedulable
+            return self._culprits(tasks.keys(), external_links)
+
+        logging.info("System is SCHEDULABLE")
+
+        # TODO define path for latency requirement (split at junctions)
+        # TODO perform path analysis based on 'max_rt_us' attribute from latency requirement
+
+#        from pycpa import graph
+#        graph.graph_system(system, '/tmp/system.pdf', dotout='/tmp/system.dot')
+
+        return True
+
+    def _check_descriptions(self, iterable):
+        """ Checks the task graph via resource descriptions (see :class:`CPAEngine`).
+        """
+        descriptions, activations, external_links, wcets = self._describe(iterable)
+
+        # seed analysis with previous results if the system only differs by increased WCETs
+        structure = (frozenset(d.signature(wcets=False) for d in descriptions),
+                     frozenset((ref, tuple(a)) for ref, a in activations.items()))
+        previous = None
+        if self.incremental and self._previous is not None:
+            prev_structure, prev_wcets, prev_results = self._previous
+            if prev_structure == structure and all(wcets[n] >= prev_wcets[n] for n in wcets):
+                previous = prev_results
+                self.stats['seeded analyses'] += 1
+
+        groups = [descriptions]
+        if self.workers:
+            groups = self._independent_groups(descriptions, external_links)
+            logging.info("Found %d independent groups of %d resources" % (len(groups), len(descriptions)))
+
+        # perform analysis
+        logging.info("Performing CPA")
+        self.stats['analyses'] += 1
+        self._previous = None
+        try:
+            if len(groups) > 1:
+                results = self._analyze_parallel(groups, activations, external_links, previous)
+            else:
+                results = self._analyze(descriptions, activations, external_links, previous)
+        except self.NotSchedulable as e:
+            logging.error("System is NOT SCHEDULABLE")
+            self.stats['not schedulable'] += 1
+            logging.info("Unschedulable resources: %s" % ', '.join(d.name for d in e.descriptions))
+            return self._culprits([node for d in e.descriptions for node in d.tasks],
+                                  [(src[1], dst[1]) for src, dst in external_links])
 
         logging.info("System is SCHEDULABLE")
 
+        if self.incremental:
+            self._previous = (structure, wcets, results)
+
         # TODO define path for latency requirement (split at junctions)
         # TODO perform path analysis based on 'max_rt_us' attribute from latency requirement
 
@@ -336,6 +1030,69 @@ class CPAEngine(AnalysisEngine):
 
         return True
 
+    def memo_state(self):
+        return self._previous
+
+    def restore_memo_state(self, state):
+        self._previous = state
+
+    def _culprits(self, nodes, links):
+        """ Returns the decisions that caused the system to be not schedulable.
+
+        The given tasks and the preceding tasks of their task chains (which
+        determine their activation) are involved. Preceding tasks are found
+        along the edges of the task graph and along the given links between
+        resources (i.e. cross-core edges and interrupt couplings). The culprits
+        are the writers of the mapping, wcet and activation params of the
+        involved tasks and of the priority and affinity params of their threads.
+
+        Args:
+            :param nodes: tasks of the unschedulable resources
+            :type  nodes: iterable of task graph nodes
+            :param links: (source, target) pairs of linked tasks on different resources
+            :type  links: iterable
+
+        Returns:
+            :class:`DecisionGraph.Culprits` or False if there is no decision graph
+        """
+        graph = self.layer.dependency_tracker
+        if graph is None:
+            return False
+
+        linked = dict()
+        for src, dst in links:
+            linked.setdefault(dst, set()).add(src)
+
+        # add preceding tasks along the task chains
+        tasks   = set()
+        pending = list(nodes)
+        while pending:
+            node = pending.pop()
+            if node not in tasks:
+                tasks.add(node)
+                pending.extend(e.source for e in self.layer.in_edges(node))
+                pending.extend(linked.get(node, set()))
+
+        params = set()
+        for node in tasks:
+            for param in ['mapping', 'wcet', 'activation']:
+                params.add(DecisionGraph.Param(self.layer, node, param))
+
+            comp = node.obj(self.layer).thread
+            for param in ['priority', 'affinity']:
+                params.add(DecisionGraph.Param(self.complayer, comp, param))
+
+        culprits = DecisionGraph.Culprits()
+        for p in params:
+            culprits.update(graph.find_writers(p.layer, p.obj, p.param).all())
+
+        if not culprits:
+            return False
+
+        self.stats['culprits'] += len(culprits)
+
+        return culprits
+
     def _get_objects_on_layer(self, obj, target_layer):
         objects = {obj}
         for l1,l2 in zip(self.layers, self.layers[1:]):
@@ -349,18 +1106,110 @@ class CPAEngine(AnalysisEngine):
         return objects
 
 
+def _run_analysis(system, refs, previous=None):
+    """ Analyses the given pyCPA system.
+
+    Args:
+        :param refs: references of the pyCPA objects
+        :type  refs: dict
+        :param previous: task results (by reference) used as the starting point of the analysis
+        :type  previous: dict or None
+
+    Returns:
+        dict mapping pyCPA objects to task results
+    """
+    from pycpa import analysis as pycpa_analysis
+
+    if previous is None:
+        return pycpa_analysis.analyze_system(system)
+
+    task_results = dict()
+    for obj in [t for r in system.resources for t in r.tasks] + list(system.junctions):
+        if refs.get(obj) in previous:
+            task_results[obj] = copy.deepcopy(previous[refs[obj]])
+        else:
+            task_results[obj] = pycpa_analysis.TaskResult()
+
+    return pycpa_analysis.analyze_system(system, task_results=task_results)
+
+
+def _analyze_resources(descriptions, activations, external_links, previous=None):
+    """ Builds and analyses a group of resources in a worker process (see :class:`CPAEngine`).
+
+    Returns:
+        dict mapping references to task results or the error message if not schedulable
+    """
+    from pycpa import model as pycpa_model
+    from pycpa import analysis as pycpa_analysis
+    from pycpa import options as pycpa_options
+
+    for name, value in CPAEngine.OPTIONS.items():
+        pycpa_options.set_opt(name, value)
+
+    objects = dict()
+    for d in descriptions:
+        objects.update(d.instantiate())
+
+    system = pycpa_model.System('S')
+    for d in descriptions:
+        model, resource = d.build(objects)
+        system.bind_resource(resource)
+        for j in model.junctions:
+            system.bind_junction(j)
+
+    for ref, (P, J) in activations.items():
+        objects[ref].in_event_model = pycpa_model.PJdEventModel(P=P, J=J)
+
+    for s, t in external_links:
+        objects[s].link_dependent_task(objects[t])
+
+    refs = { obj : ref for ref, obj in objects.items() }
+    try:
+        task_results = _run_analysis(system, refs, previous)
+    except pycpa_analysis.NotSchedulableException as e:
+        return str(e)
+
+    return { refs[obj] : result for obj, result in task_results.items() if obj in refs }
+
+
+_pools = dict() # number of workers -> ProcessPoolExecutor
+
+def _worker_pool(workers):
+    """ Returns the process pool with the given number of workers (shared by all CPAEngines).
+    """
+    if workers not in _pools:
+        _pools[workers] = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+
+    return _pools[workers]
+
+
+@atexit.register
+def _shutdown_pools():
+    """ Shuts down the process pools and waits for their workers to exit.
+    """
+    while _pools:
+        workers, pool = _pools.popitem()
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
 class CPMappingEngine(AnalysisEngine):
-    """ Assigns platform mappings using ortools' CP-sat solver """
+    """ Assigns platform mappings using ortools' CP-sat solver
+
+    The CP model (variables, cost expressions) is kept across backtracking
+    tries as long as the nodes, edges, platform candidates and dependency
+    candidates of the layer do not change. The constraints that change between
+    tries, i.e. predefined mappings, candidates and bad combinations, are passed
+    to the solver as assumptions. The previous solution is used as a hint.
+    """
 
     class ModelData():
         """ helper class for easier access to all the CP model data """
-        def __init__(self, ae, layer, unmapped_objects):
+        def __init__(self, ae, layer, objects, platforms):
+            from ortools.sat.python import cp_model
             self.model = cp_model.CpModel()
-            self.o = set(layer.nodes())
+            self.o = set(objects)
             #set of all platforms
-            self.p = set()
-            for o in self.o:
-                self.p.update(layer.get_param_candidates(ae, 'mapping', o))
+            self.p = set(platforms)
 
             #generate the variables which will contain the final solution
             self.m = dict()
@@ -372,9 +1221,11 @@ class CPMappingEngine(AnalysisEngine):
                 #each object should only be mapped once
                 self.model.Add(1 == sum(o_vars))
 
-            for predefined in self.o - set(unmapped_objects):
-                platform = layer.get_param_value(ae, 'mapping', predefined)
-                self.model.Add(1 == self.m[predefined, platform])
+            # bad combination -> literal that enforces the corresponding constraint
+            self.forbidden = dict()
+
+            self.cost_expr     = None
+            self.cost_var_data = None
 
         def AND(self, *literals):
             """ return a BoolVar which is true iff all literals are true """
@@ -384,7 +1235,22 @@ class CPMappingEngine(AnalysisEngine):
             self.model.AddBoolAnd(lliterals).OnlyEnforceIf(anded)
             return anded
 
-    def __init__(self, layer, repo, pf_model, cost_priorities=None):
+        def forbid(self, combination):
+            """ return a literal which forbids the given combination if true
+
+            Args:
+                :param combination: (object, platform) pairs
+                :type  combination: frozenset
+            """
+            if combination not in self.forbidden:
+                literal = self.model.NewBoolVar('forbid %s' % ', '.join('%s on %s' % k for k in combination))
+                self.model.AddBoolOr([self.m[k].Not() for k in combination]).OnlyEnforceIf(literal)
+                self.forbidden[combination] = literal
+
+            return self.forbidden[combination]
+
+    def __init__(self, layer, repo, pf_model, cost_priorities=None, workers=None, time_limit=None,
+                 persistent=True):
         """
         Args:
             :param cost_priorities: Each list entry is higher prioritized than
@@ -392,11 +1258,27 @@ class CPMappingEngine(AnalysisEngine):
                                     is a tuple, its elements are prioritized
                                     equally.
             :type cost_priorities: list of strings and tuples of strings
+            :param workers: number of search workers of the solver (default: ortools' default)
+            :type  workers: int
+            :param time_limit: maximum solving time in seconds per try (best found solution is used)
+            :type  time_limit: float
+            :param persistent: keep the CP model across backtracking tries
+            :type  persistent: bool
         """
         acl = { layer : { 'reads' : set(['dependencies']) } }
         AnalysisEngine.__init__(self, layer, param='mapping', acl=acl)
         self.pf_model = pf_model
         self.repo = repo
+        self.workers    = workers
+        self.time_limit = time_limit
+        self.persistent = persistent
+
+        self._data      = None
+        self._signature = None
+        self._solution  = dict()
+
+        # status, wall time and objective value of every solver call
+        self.solver_stats = list()
 
         # Each function must return a tuple with two elements:
         #   expr: The linear expression for the objective
@@ -416,6 +1298,42 @@ class CPMappingEngine(AnalysisEngine):
             normalized = cats if isinstance(cats, tuple) else (cats,)
             self.cost_priorities.append(normalized)
 
+    def _model_signature(self, objects, platforms):
+        """ return everything the CP model (except the assumptions) depends on """
+        edges = Counter()
+        deps  = set()
+        for o in objects:
+            for dep in self.layer.out_edges(o):
+                if dep.target in objects:
+                    edges[o, dep.target] += 1
+
+            for c in self.layer.get_param_candidates(self, 'dependencies', o):
+                providers = Counter(d.provider for d in c if d.provider in objects)
+                deps.add((o, frozenset(providers.items())))
+
+        return (frozenset(objects), frozenset(platforms), frozenset(edges.items()), frozenset(deps))
+
+    def _model_data(self):
+        """ return the CP model for the current layer, reuses the previous model if possible """
+        objects   = set(self.layer.nodes())
+        platforms = set()
+        for o in objects:
+            platforms.update(self.layer.get_param_candidates(self, 'mapping', o))
+
+        signature = self._model_signature(objects, platforms)
+        if self.persistent and self._data is not None and signature == self._signature:
+            return self._data
+
+        data = self.ModelData(self, self.layer, objects, platforms)
+        data.cost_expr, data.cost_var_data = self._gen_cost_data(data)
+        data.model.Maximize(data.cost_expr)
+
+        self._data      = data
+        self._signature = signature
+        self._solution  = dict()
+
+        return data
+
     def _gen_cost_data(self, data):
         """ return the data required for setting and evaluating an objective
 
@@ -502,31 +1420,52 @@ class CPMappingEngine(AnalysisEngine):
         return expr, bound
 
     def batch_assign(self, candidates, objects, bad_combinations):
+        from ortools.sat.python import cp_model
+
         if objects is None:
             assert len(bad_combinations) == 0
             objects = list(candidates.keys())
-        data = self.ModelData(self, self.layer, objects)
+        data = self._model_data()
 
+        assumptions = list()
+        for predefined in data.o - set(objects):
+            platform = self.layer.get_param_value(self, 'mapping', predefined)
+            assumptions.append(data.m[predefined, platform])
         for o in objects:
             for p in candidates[o].symmetric_difference(data.p):
-                data.model.Add(0 == data.m[o, p])
+                assumptions.append(data.m[o, p].Not())
         for bad_combination in bad_combinations:
-            bad_vars = [data.m[k] for k in zip(objects, bad_combination)]
-            bad_values = len(bad_vars) * (1,)
-            data.model.AddForbiddenAssignments(bad_vars, [bad_values])
+            assumptions.append(data.forbid(frozenset(zip(objects, bad_combination))))
+
+        data.model.ClearAssumptions()
+        data.model.AddAssumptions(assumptions)
 
-        cost_expr, cost_var_data = self._gen_cost_data(data)
-        data.model.Maximize(cost_expr)
+        # start from the previous solution
+        data.model.ClearHints()
+        for o, platform in self._solution.items():
+            for p in data.p:
+                data.model.AddHint(data.m[o, p], p == platform)
 
         solver = cp_model.CpSolver()
+        if self.workers is not None:
+            solver.parameters.num_search_workers = self.workers
+        if self.time_limit is not None:
+            solver.parameters.max_time_in_seconds = self.time_limit
+
         status = solver.Solve(data.model)
-        logging.info('Solution status: ' + solver.StatusName(status))
-        if status not in {cp_model.FEASIBLE, cp_model.OPTIMAL}:
+        logging.info('Solution status: %s (%.3fs)' % (solver.StatusName(status), solver.WallTime()))
+        feasible = status in {cp_model.FEASIBLE, cp_model.OPTIMAL}
+        self.solver_stats.append({ 'status'    : solver.StatusName(status),
+                                   'wall'      : solver.WallTime(),
+                                   'objective' : solver.ObjectiveValue() if feasible else None })
+        if not feasible:
             return False
-        self._log_costs(cost_var_data, solver)
+        self._log_costs(data.cost_var_data, solver)
 
         result = dict()
-        for o in objects:
+        for o in data.o:
             o_solution = {p: solver.BooleanValue(data.m[o, p]) for p in data.p}
-            result[o] = next(p for p,mapped in o_solution.items() if mapped)
+            self._solution[o] = next(p for p,mapped in o_solution.items() if mapped)
+            if o in objects:
+                result[o] = self._solution[o]
         return result
@@ -11,8 +11,25 @@ Implements generic MCC framework, i.e. cross-layer model, model operations, and
 """
 
 import copy
+import random
 import logging
+import weakref
+from collections import OrderedDict, Counter
 from mcc.graph import *
+from mcc.paramstore import DictParamStore, CompactParamStore
+
+def deterministic_order(objects):
+    """ Sorts the given objects by their string representation and breaks ties by their hash.
+
+    The order thereby does not depend on the iteration order of sets. Ties are broken
+    reproducibly for objects hashed by :class:`mcc.graph.DeterministicHash` and for
+    built-in values (if PYTHONHASHSEED is fixed).
+
+    Returns:
+        list
+    """
+    return sorted(objects, key=lambda o: (repr(o), hash(o)))
+
 
 class DecisionGraph(Graph):
     """ Stores dependencies between decisions to enable backtracking.
@@ -111,7 +128,20 @@ class DecisionGraph(Graph):
             return self.__str__()
 
         def __hash__(self):
-            return hash((self.layer, self.obj, self.operation))
+            # remark: the hash is cached as nodes are looked up frequently (e.g. by the
+            #         reachability index) and hashing layer, obj and operation is not free
+            try:
+                return self._hash
+            except AttributeError:
+                self._hash = hash((self.layer, self.obj, self.operation))
+                return self._hash
+
+        def __getstate__(self):
+            # hash depends on the hashes of layer, obj and operation, which may
+            # change by unpickling, hence it must be recomputed
+            state = self.__dict__.copy()
+            state.pop('_hash', None)
+            return state
 
         def __str__(self):
             if self.operation is None:
@@ -197,6 +227,120 @@ class DecisionGraph(Graph):
             for p in self.params:
                 p.layer.set_param_failed(p.param, p.obj, None)
 
+    class Culprits(set):
+        """ Set of :class:`DecisionGraph.Node` that caused a failed check.
+
+            Can be returned by an analysis engine's batch_check if it is able to
+            pinpoint the decisions responsible for the failure. In contrast to a
+            plain set of nodes (whose candidates have been updated by the analysis
+            engine, see :class:`mcc.simulation.AdaptationSimulation`), one of these
+            decisions (or the decisions they depend on) must be revised.
+        """
+        pass
+
+    class Nogoods:
+        """ Helper for storing learned nogoods, i.e. combinations of parameter values
+            that are known to fail a check.
+
+            A nogood is a set of (:class:`DecisionGraph.Param`, value) pairs. If all but
+            one of its params currently have the recorded values, the recorded value of
+            the remaining param is excluded from its candidates (see :func:`bad_values`).
+            Nogoods that are supersets of other nogoods are not stored. The least
+            recently used nogoods are evicted once there are more than `size` nogoods.
+        """
+        def __init__(self, size):
+            self.size     = size
+            self.nogoods  = OrderedDict() # nogood -> None (in LRU order)
+            self.by_param = dict()        # param -> set of nogoods
+            self.related  = dict()        # param -> Counter of the params in its nogoods
+            self.stats    = { 'learned'   : 0,
+                              'subsumed'  : 0,
+                              'evictions' : 0,
+                              'pruned'    : 0 }
+
+        @staticmethod
+        def _isset(p):
+            return p.layer.graph.contains(p.obj) and p.layer.untracked_isset_param_value(p.param, p.obj)
+
+        def learn(self, params):
+            """ Records the current values of the given params as a nogood.
+
+            Returns:
+                False if the nogood is empty, a param has no value or a known nogood is a subset of it.
+            """
+            # remark: dropping a param without value would result in a more general nogood
+            #         that is not known to fail
+            if not all(self._isset(p) for p in params):
+                return False
+
+            nogood = frozenset((p, p.layer.untracked_get_param_value(p.param, p.obj)) for p in params)
+            if not nogood:
+                return False
+
+            related = set().union(*(self.by_param.get(p, ()) for p in params))
+
+            for other in related:
+                if other <= nogood:
+                    self.stats['subsumed'] += 1
+                    return False
+
+            for other in related:
+                if nogood < other:
+                    self._remove(other)
+                    self.stats['subsumed'] += 1
+
+            self.nogoods[nogood] = None
+            for p, value in nogood:
+                self.by_param.setdefault(p, set()).add(nogood)
+                self.related.setdefault(p, Counter()).update(q for q, v in nogood)
+            self.stats['learned'] += 1
+
+            while len(self.nogoods) > self.size:
+                self._remove(next(iter(self.nogoods)))
+                self.stats['evictions'] += 1
+
+            return True
+
+        def _remove(self, nogood):
+            del self.nogoods[nogood]
+            for p, value in nogood:
+                self.by_param[p].discard(nogood)
+                if not self.by_param[p]:
+                    del self.by_param[p]
+                    del self.related[p]
+                else:
+                    self.related[p] -= Counter(q for q, v in nogood)
+
+        def bad_values(self, param):
+            """ Returns the values of the given param that complete a nogood with the
+                current values of the other params.
+
+            Returns:
+                dict mapping every bad value to the other params of the completed nogoods
+            """
+            nogoods = self.by_param.get(param)
+            if not nogoods:
+                return dict()
+
+            # current values of the params of these nogoods
+            current = set()
+            for p in self.related[param]:
+                if self._isset(p):
+                    current.add((p, p.layer.untracked_get_param_value(p.param, p.obj)))
+
+            result = dict()
+            for nogood in nogoods:
+                missing = nogood - current
+                if len(missing) != 1:
+                    continue
+
+                p, bad = next(iter(missing))
+                if p == param:
+                    result.setdefault(bad, set()).update(q for q, value in nogood if q != param)
+                    self.nogoods.move_to_end(nogood)
+
+            return result
+
 
     def __init__(self):
         super().__init__(graphtype=DiGraph)
@@ -206,6 +350,9 @@ class DecisionGraph(Graph):
 
         self.param_store = dict()
 
+        # learned nogoods (see :class:`DecisionGraph.Nogoods`), None if disabled
+        self.nogoods = None
+
         self.iterations    = 0
         self.revise_assign = None
 
@@ -302,6 +449,27 @@ class DecisionGraph(Graph):
 
         return decisions
 
+    def dependencies(self, nodes):
+        """ Returns the given nodes and the nodes they transitively depend on.
+
+            In contrast to the predecessors in the graph, the dependencies are
+            determined from the read and written params of the nodes, hence they
+            are not affected by a sequentialisation of the graph.
+        """
+        result  = set()
+        pending = list(nodes)
+        while pending:
+            n = pending.pop()
+            if n in result:
+                continue
+
+            result.add(n)
+            # remark: the writers of the written params include the map operation of an assign
+            for p in self.read_params(n) | self.written_params(n):
+                pending.extend(self.find_writers(p.layer, p.obj, p.param).all())
+
+        return result
+
     def initialize_tracking(self, layers):
         for layer in layers:
             layer.dependency_tracker = self
@@ -312,6 +480,32 @@ class DecisionGraph(Graph):
         self.read    = set()
         self.written = set()
 
+    def start_recording(self):
+        """ Records the params read from now on separately (see :func:`stop_recording`).
+
+        Returns:
+            the params read so far, which must be passed to :func:`stop_recording`
+        """
+        read = self.read
+        self.read = set()
+        return read
+
+    def stop_recording(self, read):
+        """ Stops recording and continues tracking with the given params read before.
+
+        Returns:
+            set of :class:`DecisionGraph.Param` read since :func:`start_recording`
+        """
+        recorded = self.read
+        read.update(recorded)
+        self.read = read
+        return self.decode_params(recorded)
+
+    def decode_params(self, params):
+        """ Returns the set of :class:`DecisionGraph.Param` for the tracked params.
+        """
+        return params
+
     def stop_tracking(self, layer, obj, operation, error=False, error_nodes=None):
         """ Stop tracking of read/written parameters.
             Inserts a node into the dependency graph for the given layer, object and operation.
@@ -517,10 +711,19 @@ class Registry:
     Layers and transformation steps are stored, managed, and executed by this class.
     """
 
-    def __init__(self):
+    def __init__(self, compact_params=False, seed=None):
+        """
+        Args:
+            :param compact_params: use :class:`mcc.paramstore.CompactParamStore` for all layers
+            :type  compact_params: bool
+            :param seed: seed of the random number generator shared by all analysis engines
+            :type  seed: int
+        """
         self.by_order  = list()
         self.by_name   = dict()
         self.steps     = list()
+        self.compact_params = compact_params
+        self.rng       = random.Random(seed)
 
     @staticmethod
     def _same_layers(step1, step2):
@@ -565,6 +768,9 @@ class Registry:
         Args:
             :type layer: :class:`Layer`
         """
+        if self.compact_params:
+            layer.set_param_store(CompactParamStore)
+
         self.by_order.append(layer)
         self.by_name[layer.name] = layer
 
@@ -601,6 +807,18 @@ class Registry:
 
         self.steps.append(step)
 
+    def share_rng(self):
+        """ Injects the registry's random number generator into the analysis engines of all steps.
+
+        Called before executing the steps so that the random decisions (e.g. in
+        :func:`AnalysisEngine.assign`) only depend on the seed and the candidates
+        (see :func:`AnalysisEngine.random_choice`).
+        """
+        for step in self.steps:
+            for op in step.operations:
+                for ae in op.analysis_engines:
+                    ae.rng = self.rng
+
     def add_step_unsafe(self, step):
         # FIXME how do we deal with branches, i.e. going back in the layer hierarchy to decide on params in upper layers?
         self.steps.append(step)
@@ -738,6 +956,8 @@ class Registry:
         if decision_graph is not None:
             decision_graph.initialize_tracking(self.by_order)
 
+        self.share_rng()
+
         print()
         created_layer = set()
         for step in self.steps:
@@ -774,9 +994,9 @@ class Registry:
         return
 
 
-class Layer:
+class Layer(DeterministicHash):
 
-    class Node:
+    class Node(DeterministicHash):
         """ Wrapper of node objects. The indirect access to the stored objects allows tracking accesses.
         """
         def __init__(self, obj):
@@ -806,16 +1026,30 @@ class Layer:
         self.graph       = Graph()
         self.name        = name
         self._nodetypes  = nodetypes
+        self._params     = DictParamStore(self)
         self.dependency_tracker = None
         self.tracked_operation  = None
+        self.journal            = None
 
     def __getstate__(self):
         return (self.graph, self.name, self._nodetypes)
 
     def __setstate__(self, state):
         self.graph, self.name, self._nodetypes = state
+        self._params = DictParamStore(self)
         self.dependency_tracker = None
         self.tracked_operation  = None
+        self.journal            = None
+
+    def set_param_store(self, store):
+        """ Selects the param store implementation.
+
+        Args:
+            :param store: param store class, e.g. :class:`mcc.paramstore.CompactParamStore`
+            :type  store: class
+        """
+        assert not self.graph.nodes(), "param store must be selected before inserting nodes"
+        self._params = store(self)
 
     def _add_node(self, node):
         assert isinstance(node, self.Node)
@@ -829,7 +1063,10 @@ class Layer:
         self.track_written('outedges', node)
         self.track_written('inedges',  node)
         self.track_written('nodes',  None)
-        return self.graph.add_node(node)
+        self.graph.add_node(node)
+        if self.journal is not None:
+            self.journal.record_add_node(self, node)
+        return node
 
     def _add_edge(self, obj):
         assert isinstance(obj, Edge)
@@ -841,7 +1078,10 @@ class Layer:
         self.track_written('outedges', obj.source)
         self.track_written('inedges',  obj.target)
         self.track_written('edges',  None)
-        return self.graph.add_edge(obj)
+        self.graph.add_edge(obj)
+        if self.journal is not None:
+            self.journal.record_add_edge(self, obj)
+        return obj
 
     def out_edges(self, node):
         """ Returns outgoing edges of the given node and tracks access to the virtual
@@ -875,13 +1115,22 @@ class Layer:
         return self.graph.edges()
 
     def remove_node(self, obj):
+        if self.journal is not None:
+            self.journal.record_remove_node(self, obj)
+        self._params.forget(obj)
         return self.graph.remove_node(obj)
 
     def remove_edge(self, obj):
+        if self.journal is not None:
+            self.journal.record_remove_edge(self, obj)
+        self._params.forget(obj)
         return self.graph.remove_edge(obj)
 
     def create_edge(self, s, t):
-        return self.graph.create_edge(s, t)
+        edge = self.graph.create_edge(s, t)
+        if self.journal is not None:
+            self.journal.record_add_edge(self, edge)
+        return edge
 
     def node_types(self):
         """
@@ -897,11 +1146,14 @@ class Layer:
         """ Clears the layer.
         """
         self.graph = Graph()
+        self._params = type(self._params)(self)
 
     def start_tracking(self, op):
         if self.dependency_tracker is not None:
             self.tracked_operation = op
             self.dependency_tracker.start_tracking()
+            if self.journal is not None:
+                self.journal.start_operation()
 
     def stop_tracking(self, obj, error=False, error_nodes=None):
         node = None
@@ -910,6 +1162,10 @@ class Layer:
             node = self.dependency_tracker.stop_tracking(self, obj, self.tracked_operation,
                                                          error=error,
                                                          error_nodes=error_nodes)
+            # Assign operations are the only revisable operations, hence
+            # we only need checkpoints for these
+            if self.journal is not None and isinstance(self.tracked_operation, Assign):
+                self.journal.checkpoint(node)
             self.tracked_operation = None
 
         self.canary = False
@@ -1025,16 +1281,7 @@ class Layer:
         return inserted
 
     def untracked_get_params(self, obj):
-        if isinstance(obj, Edge): # obj is an edge
-            attributes = self.graph.edge_attributes(obj)
-        else:
-            # obj is a node
-            attributes = self.graph.node_attributes(obj)
-
-        if 'params' not in attributes:
-            attributes['params'] = dict()
-
-        return attributes['params']
+        return self._params.params(obj)
 
     def _interlayer(self, obj):
         if isinstance(obj, Edge):
@@ -1062,6 +1309,9 @@ class Layer:
         assert isinstance(objects, set) or isinstance(objects, frozenset), "objects %s are of type %s"  %(objects, type(objects))
         assert target_layer != self.name
 
+        if self.journal is not None:
+            self.journal.record_interlayer(self, target_layer, obj)
+
         interlayer = self._interlayer(obj)
         interlayer[target_layer] = objects
 
@@ -1071,11 +1321,11 @@ class Layer:
 
         if nodes:
             for n in self.graph.nodes():
-                if param in self.untracked_get_params(n):
+                if self._params.has_param(param, n):
                     self.dependency_tracker.track_read(self, n, param)
         if edges:
             for e in self.graph.edges():
-                if param in self.untracked_get_params(e):
+                if self._params.has_param(param, e):
                     self.dependency_tracker.track_read(self, e, param)
 
     def get_param_candidates(self, ae, param, obj):
@@ -1100,64 +1350,38 @@ class Layer:
         return self.untracked_get_param_candidates(param, obj)
 
     def untracked_get_param_candidates(self, param, obj):
-        params = self.untracked_get_params(obj)
-
-        if param in params and 'candidates' in params[param]:
-            return params[param]['candidates']
-        else:
-            return set()
+        return self._params.get_candidates(param, obj)
 
     def get_param_failed(self, param, obj):
-        params = self.untracked_get_params(obj)
-
-        if param in params:
-            if 'failed' in params[param]:
-                return params[param]['failed']
-
-        return None
+        return self._params.get_failed(param, obj)
 
     def set_param_failed(self, param, obj, failed):
         assert failed is None or isinstance(failed, DecisionGraph.Failed)
-        params = self.untracked_get_params(obj)
-
-        assert param in params, "param %s not available on %s for %s" % (param,self,obj)
-
-        if failed is None:
-            del params[param]['failed']
-        else:
-            params[param]['failed'] = failed
+        if self.journal is not None:
+            self.journal.record_param(self, param, obj)
+        self._params.set_failed(param, obj, failed)
 
     def untracked_clear_param_value(self, param, obj):
-        params = self.untracked_get_params(obj)
-
-        if param in params:
-            if 'value' in params[param]:
-                del params[param]['value']
+        if self.journal is not None:
+            self.journal.record_param(self, param, obj)
+        self._params.clear_value(param, obj)
 
     def untracked_clear_param_candidates(self, param, obj):
-        params = self.untracked_get_params(obj)
-
-        del params[param]
+        if self.journal is not None:
+            self.journal.record_param(self, param, obj)
+        self._params.clear_param(param, obj)
 
     def isset_param_value(self, ae, param, obj):
         return self.untracked_isset_param_value(param, obj)
 
     def untracked_isset_param_value(self, param, obj):
-        params = self.untracked_get_params(obj)
-        if param in params and 'value' in params[param]:
-            return True
-
-        return False
+        return self._params.isset_value(param, obj)
 
     def isset_param_candidates(self, ae, param, obj):
         return self.untracked_isset_param_candidates(param, obj)
 
     def untracked_isset_param_candidates(self, param, obj):
-        params = self.untracked_get_params(obj)
-        if param in params and 'candidates' in params[param]:
-            return True
-
-        return False
+        return self._params.isset_candidates(param, obj)
 
     def set_param_candidates(self, ae, param, obj, candidates):
         """ Set candidate values for the given parameter and object.
@@ -1180,11 +1404,6 @@ class Layer:
         self.untracked_set_param_candidates(param, obj, candidates)
 
     def untracked_set_param_candidates(self, param, obj, candidates):
-        params = self.untracked_get_params(obj)
-
-        if param not in params:
-            params[param] = dict()
-
         immutablecandidates = set()
         for cand in candidates:
             if cand is None or isinstance(cand, ImmutableParam):
@@ -1192,7 +1411,9 @@ class Layer:
             else:
                 immutablecandidates.add(ImmutableParam(cand))
 
-        params[param]['candidates'] = immutablecandidates
+        if self.journal is not None:
+            self.journal.record_param(self, param, obj)
+        self._params.set_candidates(param, obj, immutablecandidates)
 
     def get_param_value(self, ae, param, obj):
         """ Get value for the given parameter and object.
@@ -1225,13 +1446,33 @@ class Layer:
             self.dependency_tracker.track_written(self, obj, param)
 
     def untracked_get_param_value(self, param, obj):
-        params = self.untracked_get_params(obj)
+        value = self._params.get_value(param, obj)
 
-        assert param in params, "%s not present for %s" % (param, obj)
+        assert value is None or isinstance(value, ImmutableParam)
+        return value
 
-        assert 'value' in params[param], "value not assigned for %s on %s" % (param, obj)
-        assert params[param]['value'] is None or isinstance(params[param]['value'], ImmutableParam)
-        return params[param]['value']
+    def untracked_fingerprint(self, param, obj):
+        """ Returns a comparable snapshot of the given (virtual) parameter, i.e. the
+            values that an analysis engine may have obtained by reading it.
+
+        Returns:
+            None if obj is not present, otherwise presence ('obj'), node/edge set ('nodes',
+            'edges', 'inedges', 'outedges') or (value, candidates) of the parameter.
+        """
+        if param == 'nodes':
+            return frozenset(self.graph.nodes())
+        elif param == 'edges':
+            return frozenset(self.graph.edges())
+        elif not self.graph.contains(obj):
+            return None
+        elif param == 'obj':
+            return True
+        elif param == 'outedges':
+            return frozenset(self.graph.out_edges(obj))
+        elif param == 'inedges':
+            return frozenset(self.graph.in_edges(obj))
+
+        return self._params.fingerprint(param, obj)
 
     def set_param_value(self, ae, param, obj, value):
         """ Set value for the given parameter and object.
@@ -1252,20 +1493,28 @@ class Layer:
         self.untracked_set_param_value(param, obj, value)
 
     def untracked_set_param_value(self, param, obj, value):
-        params = self.untracked_get_params(obj)
-
         if value is not None and not isinstance(value, ImmutableParam):
             value = ImmutableParam(value)
 
-        if param not in params:
-            params[param] = { 'value' : value, 'candidates' : set() }
-        else:
-            params[param]['value'] = value
+        if self.journal is not None:
+            self.journal.record_param(self, param, obj)
+        self._params.set_value(param, obj, value)
 
-class AnalysisEngine:
+class AnalysisEngine(DeterministicHash):
     """ Base class for analysis engines implemented in :module:`mcc.analyses`.
     """
 
+    # random number generator used for random decisions, replaced by the registry's
+    # generator (see :func:`Registry.share_rng`)
+    rng = random
+
+    # whether check() and batch_check() only depend on tracked params and thus
+    # their results may be memoised (see :func:`memoise`)
+    memoisable = False
+
+    # maximum number of memoised check results, 0 disables memoisation
+    memo_size  = 0
+
     def __init__(self, layer, param, name=None, acl=None):
         """
         Args:
@@ -1308,6 +1557,14 @@ class AnalysisEngine:
     def __str__(self):
         return '%s(%s.%s)' % (self.name, self.layer, self.param)
 
+    def random_choice(self, candidates):
+        """ Randomly chooses one of the candidates using :attr:`rng`.
+
+        The candidates are brought into a deterministic order beforehand (see
+        :func:`deterministic_order`), so that the choice only depends on the seed.
+        """
+        return self.rng.choice(deterministic_order(candidates))
+
     def acl_string(self, newline='\n'):
         result = ''
         for layer in self.acl:
@@ -1448,6 +1705,110 @@ class AnalysisEngine:
         """
         raise NotImplementedError()
 
+    def memoise(self, size, stats=None):
+        """ Memoises the results of :func:`check` and :func:`batch_check`.
+
+        A memoised result is reused if the engine is called for the same object(s) and
+        every param that was read by the memoised call (as tracked by the dependency
+        tracker) still has the same value (see :func:`Layer.untracked_fingerprint`).
+        The reads are tracked again when reusing a result so that the decision graph
+        does not change. Only boolean results are memoised, the least recently used
+        results are evicted once there are more than `size` results.
+
+        Args:
+            :param size: maximum number of memoised results, 0 disables memoisation
+            :type  size: int
+            :param stats: (optional) counters for hits, misses and evictions, may be shared by multiple engines
+            :type  stats: dict
+        """
+        assert self.memoisable or not size, "%s cannot be memoised" % self
+
+        if stats is None:
+            stats = { 'hits' : 0, 'misses' : 0, 'evictions' : 0 }
+
+        self.memo_size  = size
+        self.memo_stats = stats
+        self._memo      = OrderedDict() # obj(s) -> list of (params tuple, fingerprints, result, state)
+        self._memoised  = 0
+
+    def memo_state(self):
+        """ Returns the state of the engine that is restored when reusing the result of the
+            last check (see :func:`restore_memo_state`).
+        """
+        return None
+
+    def restore_memo_state(self, state):
+        """ Restores the state of the engine (see :func:`memo_state`), e.g. to repeat side effects
+            of a check whose result is reused.
+        """
+        pass
+
+    def memoised_check(self, obj):
+        """ Returns the memoised result of :func:`check` or calls it (see :func:`memoise`).
+        """
+        if not self.memo_size or self.layer.dependency_tracker is None:
+            return self.check(obj)
+
+        return self._memoised_call(obj, self.check, obj)
+
+    def memoised_batch_check(self, iterable):
+        """ Returns the memoised result of :func:`batch_check` or calls it (see :func:`memoise`).
+        """
+        if not self.memo_size or self.layer.dependency_tracker is None:
+            return self.batch_check(iterable)
+
+        return self._memoised_call(frozenset(iterable), self.batch_check, iterable)
+
+    def _memoised_call(self, key, method, arg):
+        tracker = self.layer.dependency_tracker
+        entries = self._memo.get(key)
+        if entries is not None:
+            # remark: the entries of the same object(s) mostly read the same params, hence
+            #         they share the params tuple and the current fingerprints are only
+            #         taken once per tuple
+            current = dict() # id of params -> fingerprints
+            for i in reversed(range(len(entries))):
+                params, fingerprints, result, state = entries[i]
+                if id(params) not in current:
+                    current[id(params)] = [p.layer.untracked_fingerprint(p.param, p.obj) for p in params]
+                if current[id(params)] == fingerprints:
+                    self.memo_stats['hits'] += 1
+                    entries.append(entries.pop(i))
+                    self._memo.move_to_end(key)
+
+                    for p in params:
+                        tracker.track_read(p.layer, p.obj, p.param)
+                    self.restore_memo_state(state)
+                    return result
+
+        self.memo_stats['misses'] += 1
+
+        read = tracker.start_recording()
+        try:
+            result = method(arg)
+        finally:
+            recorded = tracker.stop_recording(read)
+
+        if isinstance(result, bool):
+            entries = self._memo.setdefault(key, list())
+            params = next((e[0] for e in entries if len(e[0]) == len(recorded) and recorded.issuperset(e[0])),
+                          tuple(recorded))
+            fingerprints = [p.layer.untracked_fingerprint(p.param, p.obj) for p in params]
+            entries.append((params, fingerprints, result, self.memo_state()))
+            self._memo.move_to_end(key)
+            self._memoised += 1
+
+            # evict least recently used results
+            while self._memoised > self.memo_size:
+                oldest, entries = next(iter(self._memo.items()))
+                entries.pop(0)
+                if not entries:
+                    del self._memo[oldest]
+                self._memoised -= 1
+                self.memo_stats['evictions'] += 1
+
+        return result
+
     def source_types(self):
         """ Returns compatible source types, i.e. nodes of layer must be an instance of this type.
         """
@@ -1732,9 +2093,49 @@ class InheritEngine(AnalysisEngine):
 
 
 class ImmutableParam():
+    """ Read-only wrapper for param values.
+
+    Wrappers are interned, i.e. wrapping an equal value of a built-in value type or the
+    same object (for types that compare by identity) returns the existing wrapper.
+    The hash of the wrapped data is computed only once (on first use).
+    """
+
+    # interning pool: (type, data) -> wrapper
+    _pool = weakref.WeakValueDictionary()
+
+    # built-in types whose equal values are interchangeable
+    _value_types = frozenset({str, int, float, bool, bytes})
+
+    # marks a wrapper created without data (e.g. by unpickling an old pickle)
+    _nodata = object()
+
+    def __new__(cls, data=_nodata):
+        if data is ImmutableParam._nodata:
+            # remark: never intern these as __setstate__ will set the data
+            return super().__new__(cls)
 
-    def __init__(self, data):
+        t = type(data)
+        internable = t in ImmutableParam._value_types or \
+                     (t.__eq__ is object.__eq__ and
+                      t.__hash__ in (object.__hash__, DeterministicHash.__hash__))
+
+        if internable:
+            param = ImmutableParam._pool.get((t, data))
+            if param is not None:
+                return param
+
+        param = super().__new__(cls)
+        param._set_data(data)
+
+        if internable:
+            ImmutableParam._pool[(t, data)] = param
+
+        return param
+
+    def _set_data(self, data):
         super().__setattr__('data', data)
+        # hash is computed on first use
+        super().__setattr__('_hash', None)
 
     def __setattr__(self, name, value):
         raise Exception("Setting param attributes is not allowed.")
@@ -1747,13 +2148,18 @@ class ImmutableParam():
         return copy.copy(self._wrapped_data())
 
     def __eq__(self, rhs):
-        if isinstance(rhs, ImmutableParam):
+        if self is rhs:
+            return True
+        elif isinstance(rhs, ImmutableParam):
             return self.data == rhs.data
         else:
             return self.data == rhs
 
     def __hash__(self):
-        return hash(self.data)
+        if self._hash is None:
+            super().__setattr__('_hash', hash(self.data))
+
+        return self._hash
 
     def _wrapped_data(self):
         return super().__getattribute__('data')
@@ -1767,17 +2173,24 @@ class ImmutableParam():
     def __repr__(self):
         return self._wrapped_data().__repr__()
 
+    def __reduce__(self):
+        # re-wrap the data on unpickling/copying so that wrappers are interned
+        return (type(self), (self._wrapped_data(),))
+
     def __getstate__(self):
         return self._wrapped_data()
 
     def __setstate__(self, state):
+        # only used for pickles without __reduce__, i.e. for wrappers created without data
+        assert 'data' not in object.__getattribute__(self, '__dict__'), "cannot modify %r" % self
+
         if isinstance(state, dict) and 'data' in state:
-            super().__setattr__('data', state['data'])
+            self._set_data(state['data'])
         else:
-            super().__setattr__('data', state)
+            self._set_data(state)
 
 
-class Operation:
+class Operation(DeterministicHash):
     """ Base class for operations on a model.
     """
 
@@ -1975,7 +2388,8 @@ class BatchMap(Map):
                 candidates = new_candidates
             else:
                 if new_candidates is not None:
-                    candidates &= new_candidates
+                    # remark: do not modify the stored candidates in place
+                    candidates = candidates & new_candidates
 
             # update candidates for this parameter in layer object
             assert(candidates is not None)
@@ -2010,6 +2424,35 @@ class Assign(Operation):
         # only one analysis engine can be registered
         assert(False)
 
+    def _prune_nogoods(self, obj, candidates):
+        """ Removes the candidates that complete a learned nogood (see :class:`DecisionGraph.Nogoods`).
+        """
+        tracker = self.source_layer.dependency_tracker
+        if tracker is None or tracker.nogoods is None:
+            return candidates
+
+        # remark: As long as the revised assign has not been re-executed, the decision graph
+        #         contains its node without a value. Moreover, the node of the revised
+        #         assign keeps its dependencies, i.e. the reads tracked here would be lost.
+        if tracker.revise_assign is not None:
+            return candidates
+
+        pruned = set()
+        for value, others in tracker.nogoods.bad_values(tracker.Param(self.source_layer, obj, self.param)).items():
+            if value not in candidates:
+                continue
+
+            pruned.add(value)
+            # the candidate is only excluded as long as the other params keep their values
+            for p in others:
+                p.layer.track_read(p.param, p.obj)
+
+        if pruned:
+            logging.debug("Nogoods exclude %s for param '%s' of object %s." % (pruned, self.param, obj))
+            tracker.nogoods.stats['pruned'] += len(pruned)
+
+        return candidates - pruned
+
     def execute(self, iterable):
         logging.info("Executing %s" % self)
 
@@ -2029,7 +2472,7 @@ class Assign(Operation):
             if failed is not None:
                 bad_values = failed.bad_values()
 
-            candidates = raw_cand - bad_values
+            candidates = self._prune_nogoods(obj, raw_cand - bad_values)
 
             if len(candidates) == 0:
                 logging.error("No candidates left for param '%s' of object %s." % (self.param, obj))
@@ -2077,7 +2520,7 @@ class BatchAssign(Assign):
             if failed is not None:
                 bad_values = failed.bad_values()
 
-            candidates = raw_cand - bad_values
+            candidates = self._prune_nogoods(obj, raw_cand - bad_values)
 
             if not candidates:
                 logging.error("No candidates left for param '%s' of object %s." % (self.param, obj))
@@ -2218,7 +2661,8 @@ class Transform(Operation):
                     if src is None:
                         src = { obj }
                     elif isinstance(src, set) or isinstance(src, frozenset):
-                        src.add(obj)
+                        # remark: do not modify the stored set in place
+                        src = src | { obj }
                     else:
                         # should never happen, because src must be a set
                         src = { src, obj }
@@ -2288,7 +2732,8 @@ class BatchTransform(Transform):
                 if src is None:
                     src = { obj }
                 elif isinstance(src, set) or isinstance(src, frozenset):
-                    src.add(obj)
+                    # remark: do not modify the stored set in place
+                    src = src | { obj }
                 else:
                     # should never happen, because src must be a set
                     src = { src, obj }
@@ -2324,7 +2769,7 @@ class Check(Operation):
             #       see whether its dependencies changed.
 
             for ae in self.analysis_engines:
-                result = ae.check(obj)
+                result = ae.memoised_check(obj)
                 if isinstance(result, DecisionGraph.Node):
                     # FIXME we must stop tracking and ensure that the
                     #       decision graph is sorted
@@ -2357,7 +2802,7 @@ class BatchCheck(Check):
             assert(self.check_source_type(obj))
 
         for ae in self.analysis_engines:
-            result = ae.batch_check(iterable)
+            result = ae.memoised_batch_check(iterable)
 
             if isinstance(result, set) and isinstance(list(result)[0], DecisionGraph.Node):
                 # if the ae can pinpoint the culprits in the
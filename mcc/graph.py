@@ -18,7 +18,25 @@ from collections import deque
 import logging
 import itertools
 
-class GraphObj:
+class DeterministicHash:
+    """ Hashes objects by their creation order instead of by their id.
+
+    Objects still compare by identity. However, sets and dicts of these objects
+    are iterated in the same order in every run as long as the objects are
+    created in the same order (and PYTHONHASHSEED is fixed), which makes the
+    search reproducible for a given seed.
+    """
+    _created = itertools.count()
+
+    def __new__(cls, *args, **kwargs):
+        obj = super().__new__(cls)
+        obj._order = next(DeterministicHash._created)
+        return obj
+
+    def __hash__(self):
+        return self._order
+
+class GraphObj(DeterministicHash):
     """ Captures dangling graph objects, i.e. Edge or Node, and its parameters.
 
     Used by :func:`mcc.framework.AnalysisEngine.transform()`.
@@ -56,7 +74,7 @@ class GraphObj:
         else:
             return "Node(%s, params=%s)" % (self.obj, self.params())
 
-class Edge:
+class Edge(DeterministicHash):
     """ Edge object used by :class:`Graph`.
     """
     def __init__(self, source, target):
@@ -87,6 +105,15 @@ class Graph:
         else:
             return self.graph.remove_edge(obj.source, obj.target)
 
+    def contains(self, obj):
+        if isinstance(obj, Edge):
+            if isinstance(self.graph, MultiDiGraph):
+                return self.graph.has_edge(obj.source, obj.target, obj)
+            else:
+                return self.graph.has_edge(obj.source, obj.target)
+
+        return obj in self.graph
+
     def create_edge(self, source, target):
         e = Edge(source, target)
         return self.add_edge(e)
@@ -121,12 +148,13 @@ class Graph:
         return dag.topological_sort(self.graph)
 
     def reversed_subtree(self, node):
-        # return reverse topological sort but stop at start node and
-        #  also return it as the last element
+        # return reverse topological sort of the descendants of node and
+        #  also return node as the last element
+        # remark: only sorting the descendants keeps the cost proportional
+        #         to the subtree rather than to the entire graph
+        subgraph = self.graph.subgraph(self.successors(node, recursive=True))
         return itertools.chain(
-                itertools.takewhile(
-                    lambda x: x != node,
-                    reversed(list(dag.topological_sort(self.graph)))),
+                reversed(list(dag.topological_sort(subgraph))),
                 {node})
 
     def paths(self, source, target, undirected=False):
@@ -245,10 +273,20 @@ class GraphExporter(Graph):
         self.graph.add_edges_from(graph.graph.edges(keys=True))
 
         for node in self.graph.nodes():
-            self.node_attributes(node).update(graph.node_attributes(node, node_params))
+            self.node_attributes(node).update(self._plain_params(graph.node_attributes(node, node_params)))
 
         for edge in self.edges():
-            self.edge_attributes(edge).update(graph.edge_attributes(edge, edge_params))
+            self.edge_attributes(edge).update(self._plain_params(graph.edge_attributes(edge, edge_params)))
 
         return
 
+    @staticmethod
+    def _plain_params(attrs):
+        """ Converts compact param rows (see :mod:`mcc.paramstore`) into plain dicts.
+        """
+        if 'params' in attrs and not isinstance(attrs['params'], dict):
+            attrs = dict(attrs)
+            attrs['params'] = { p : dict(rec.items()) for p, rec in attrs['params'].items() }
+
+        return attrs
+
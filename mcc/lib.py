@@ -14,6 +14,7 @@ from mcc.analyses import *
 from mcc.simulation import *
 from mcc.complex_analyses import *
 from mcc.importexport import *
+from mcc.profiling import Profiler, Tracer
 
 class BaseModelQuery:
     """ Stores existing component architecture and corresponding inputs.
@@ -421,18 +422,21 @@ class MccBase:
 
         self.wcet_engine = we
 
-    def _timing_check(self, model, slayer, dlayer, constrmodel, ae):
+    def _timing_check(self, model, slayer, dlayer, constrmodel, ae, incremental=False, workers=None):
 
         slayer = model.by_name[slayer]
         tg     = model.by_name[dlayer]
 
         # perform CPA
-        pycpa = CPAEngine(tg, slayer, model.by_order[1:], constrmodel)
+        pycpa = CPAEngine(tg, slayer, model.by_order[1:], constrmodel, incremental=incremental,
+                          workers=workers)
         check = BatchCheck(pycpa, 'CPA')
         if ae:
             check.register_ae(ae)
         model.add_step(NodeStep(check))
 
+        model.register_stats('cpa', pycpa.stats)
+
 class SimpleMcc(MccBase):
     """ Composes MCC for Genode systems. Only considers functional requirements.
     """
@@ -440,9 +444,23 @@ class SimpleMcc(MccBase):
     def __init__(self, repo, test_backtracking=False,
                              chronologicaltracking=False,
                              test_adaptation=False,
-                             from_scratch=False):
+                             from_scratch=False,
+                             compact_params=False,
+                             snapshots=False,
+                             partition=None,
+                             seed=None,
+                             profile=False,
+                             trace=False,
+                             incremental_cpa=False,
+                             cpa_workers=None,
+                             memo_size=0,
+                             nogoods=0,
+                             indexed_tracking=False):
         assert test_backtracking == False or test_adaptation == False
         assert chronologicaltracking == False or test_adaptation == False
+        assert snapshots == False or chronologicaltracking
+        assert nogoods == 0 or not chronologicaltracking
+        assert partition is None or test_backtracking
 
         MccBase.__init__(self, repo)
         self._test_backtracking  = test_backtracking
@@ -450,6 +468,17 @@ class SimpleMcc(MccBase):
         self._replay_adaptations = test_adaptation if isinstance(test_adaptation, str) else False
         self._from_scratch       = from_scratch if test_adaptation else False
         self._nonchronological   = not chronologicaltracking
+        self._compact_params     = compact_params
+        self._snapshots          = snapshots
+        self._partition          = partition
+        self._seed               = seed
+        self._profile            = profile
+        self._trace              = trace
+        self._incremental_cpa    = incremental_cpa
+        self._cpa_workers        = cpa_workers
+        self._memo_size          = memo_size
+        self._nogoods            = nogoods
+        self._indexed_tracking   = indexed_tracking
 
         assert self._replay_adaptations or not self._from_scratch
 
@@ -471,7 +500,9 @@ class SimpleMcc(MccBase):
         # check function/composite/component references, compatibility and routes in system and subsystems
 
         # 2) we create a new system model
-        model = SystemModel(self.repo, pf_model, dotpath=outpath if dot_layer else None)
+        model = SystemModel(self.repo, pf_model, dotpath=outpath if dot_layer else None,
+                            compact_params=self._compact_params,
+                            seed=self._seed)
 
         # 3) create query model
         query_model = FuncArchQuery(system)
@@ -533,7 +564,8 @@ class SimpleMcc(MccBase):
             if constrmodel is not None:
                 self._reliability_check(model, layer='comp_inst', constrmodel=constrmodel)
                 self._timing_check(model, slayer='comp_inst', dlayer='task_graph',
-                                   constrmodel=constrmodel, ae=sim)
+                                   constrmodel=constrmodel, ae=sim, incremental=self._incremental_cpa,
+                                   workers=self._cpa_workers)
 
             if self._test_adaptation and not self._from_scratch:
                 sim = AdaptationSimulation(model.by_name['task_graph'], model, wcet_engine=self.wcet_engine,
@@ -560,6 +592,9 @@ class SimpleMcc(MccBase):
         try:
             if base and self._from_scratch:
                 se = SimulationEngine(None, model)
+                # remark: all replays are recorded by the same profiler/tracer
+                profiler = Profiler(outpath) if self._profile else None
+                tracer   = Tracer(outpath) if self._trace else None
                 with open(self._replay_adaptations, 'r') as csvfile:
                     reader = csv.DictReader(csvfile, delimiter='\t')
 
@@ -572,7 +607,13 @@ class SimpleMcc(MccBase):
                             constrmodel.reset()
                             constrmodel.parse(model)
 
-                        model.execute(outpath, nonchronological=self._nonchronological)
+                        model.execute(outpath, nonchronological=self._nonchronological,
+                                               indexed_tracking=self._indexed_tracking,
+                                               snapshots=self._snapshots,
+                                               profiler=profiler,
+                                               tracer=tracer,
+                                               memo_size=self._memo_size,
+                                               nogoods=self._nogoods)
                         se.record_solution()
 
                         se._last_iteration  = 0
@@ -585,7 +626,15 @@ class SimpleMcc(MccBase):
                 se.write_stats(outpath[:outpath.rfind('/')] + '/solutions.csv')
 
             else:
-                model.execute(outpath, nonchronological=self._nonchronological)
+                # remark: only the exploration (i.e. not the base model) is partitioned
+                model.execute(outpath, nonchronological=self._nonchronological,
+                                       indexed_tracking=self._indexed_tracking,
+                                       snapshots=self._snapshots,
+                                       partition=self._partition if base is not None else None,
+                                       profiler=Profiler(outpath) if self._profile else None,
+                                       tracer=Tracer(outpath) if self._trace else None,
+                                       memo_size=self._memo_size,
+                                       nogoods=self._nogoods)
 
         except Exception as e:
             if sim:
@@ -16,7 +16,7 @@ from mcc.backtracking import *
 from mcc.taskmodel import Task
 from mcc.dot import DotFactory
 
-class ServiceConstraints:
+class ServiceConstraints(DeterministicHash):
     def __init__(self, name=None, function=None, to_ref=None, from_ref=None):
         self.name     = name
         self.function = function
@@ -72,7 +72,7 @@ class NetworkManager:
         return self._integer_to_ip(self.current_ip)
 
 
-class Instance:
+class Instance(DeterministicHash):
     """ Wrapper for components for managing instantiations
     """
     def __init__(self, identifier, component, config=None):
@@ -211,7 +211,7 @@ class InstanceFactory:
         return {Instance}
 
 
-class BaseChild:
+class BaseChild(DeterministicHash):
     def __init__(self, name, subsystem, instances, subgraph):
         self._name       = name
         self._subsystem  = subsystem
@@ -309,7 +309,7 @@ class BaseChild:
         return self._subgraph
 
 
-class Proxy:
+class Proxy(DeterministicHash):
     """ Node type representing to-be-inserted proxies; used in comm_arch layer.
     """
     def __init__(self, carrier, service):
@@ -552,8 +552,8 @@ class FuncArchQuery(QueryModel):
 class SystemModel(BacktrackRegistry):
     """ Our cross-layer model.
     """
-    def __init__(self, repo, platform, dotpath=None):
-        super().__init__()
+    def __init__(self, repo, platform, dotpath=None, compact_params=False, seed=None):
+        super().__init__(compact_params=compact_params, seed=seed)
         self.add_layer(Layer('func_query', nodetypes={ChildQuery,BaseChild}))
         self.add_layer(Layer('func_arch', nodetypes={ChildQuery,BaseChild}))
         self.add_layer(Layer('comm_arch', nodetypes={ChildQuery,Proxy,BaseChild}))
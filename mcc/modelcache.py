@@ -0,0 +1,101 @@
+"""
+Description
+-----------
+
+Implements an on-disk cache for the parsed XML models (see :mod:`mcc.parser`).
+
+Every entry is keyed by the type of the parser, the SHA-256 hash of the XML
+file, the hash of the XML schema (if any) and the cache version. An entry is
+only written after the file was successfully parsed and validated, hence a
+cache hit skips the XML schema validation. :class:`mcc.parser.Repository`
+additionally stores its lookup tables, which are restored from the cache
+instead of being rebuilt from the XML tree.
+
+A modified XML or schema file results in a different key, i.e. stale entries
+are never used. They can be removed with :func:`ModelCache.clear`.
+
+:Authors:
+    - Johannes Schlatow
+
+"""
+
+import os
+import pickle
+import hashlib
+import logging
+
+
+class ModelCache:
+    # increment when the format of the cached data changes
+    VERSION = 1
+
+    def __init__(self, path):
+        """
+        Args:
+            :param path: directory in which the cache entries are stored
+            :type  path: str
+        """
+        self.path   = path
+        self.hits   = 0
+        self.misses = 0
+        os.makedirs(self.path, exist_ok=True)
+
+    @staticmethod
+    def _hash_file(filename, digest):
+        with open(filename, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+
+    def key(self, kind, xml_file, xsd_file=None):
+        """ Computes the cache key of the given file.
+
+        Args:
+            :param kind: type of the parser
+            :type  kind: str
+            :param xml_file: parsed XML file
+            :type  xml_file: str
+            :param xsd_file: XML schema used for validation
+            :type  xsd_file: str or None
+
+        Returns:
+            str
+        """
+        digest = hashlib.sha256(('%s:%d:' % (kind, self.VERSION)).encode())
+        self._hash_file(xml_file, digest)
+        if xsd_file is not None:
+            digest.update(b':xsd:')
+            self._hash_file(xsd_file, digest)
+
+        return '%s-%s' % (kind, digest.hexdigest())
+
+    def _filename(self, key):
+        return os.path.join(self.path, key + '.pickle')
+
+    def load(self, key):
+        """ Returns the cached data or None if not present.
+        """
+        try:
+            with open(self._filename(key), 'rb') as f:
+                data = pickle.load(f)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except Exception as e:
+            logging.warning("Ignoring corrupt model cache entry %s (%s)." % (key, e))
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return data
+
+    def store(self, key, data):
+        # write to a temporary file first so that concurrent processes never read partial entries
+        tmpname = '%s.%d.tmp' % (self._filename(key), os.getpid())
+        with open(tmpname, 'wb') as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmpname, self._filename(key))
+
+    def clear(self):
+        for filename in os.listdir(self.path):
+            if filename.endswith('.pickle'):
+                os.remove(os.path.join(self.path, filename))
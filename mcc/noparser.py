@@ -11,8 +11,10 @@ Implements dummy classes from parser with parser functionality stripped off
 
 import logging
 
+from mcc.graph import DeterministicHash
+
 class PlatformParser:
-    class PfComponent:
+    class PfComponent(DeterministicHash):
         def name(self):
             return self._name
 
@@ -23,7 +25,7 @@ class PlatformParser:
             return self._name
 
 class Repository:
-    class ElementWrapper:
+    class ElementWrapper(DeterministicHash):
         def xml(self):
             return self._xml
 
@@ -60,7 +62,7 @@ class Repository:
 
             return '%s%s%s%s' % (f, n, l, r)
 
-    class Component:
+    class Component(DeterministicHash):
         def label(self):
             return self._label
 
@@ -73,7 +75,7 @@ class Repository:
         def __repr__(self):
             return self.label()
 
-    class ComponentPattern:
+    class ComponentPattern(DeterministicHash):
         def label(self):
             return self._label
 
@@ -84,7 +86,7 @@ class Repository:
             return self.label()
 
 
-class ChildQuery:
+class ChildQuery(DeterministicHash):
     def identifier(self):
         return self._identifier
 
@@ -0,0 +1,418 @@
+"""
+Description
+-----------
+
+Implements the parameter stores used by :class:`mcc.framework.Layer`.
+
+A parameter store manages the value, candidates and failed state of every
+parameter of the nodes and edges of a layer. :class:`DictParamStore` keeps
+the original nested-dict representation. :class:`CompactParamStore` is a
+columnar alternative with a per-layer parameter index and per-object slot arrays.
+
+:Authors:
+    - Johannes Schlatow
+
+"""
+
+from mcc.graph import Edge
+
+# marker for unset fields of a ParamRecord (None is a valid param value)
+_UNSET = object()
+
+
+class DictParamStore:
+    """ Stores params in the graph attributes as nested dicts, i.e.
+        `attributes['params'][param] = { 'value' : ..., 'candidates' : ..., 'failed' : ... }`.
+    """
+
+    def __init__(self, layer):
+        """
+        Args:
+            :param layer: Layer whose params are stored.
+            :type  layer: :class:`mcc.framework.Layer`
+        """
+        self.layer = layer
+
+    def _attributes(self, obj):
+        if isinstance(obj, Edge):
+            return self.layer.graph.edge_attributes(obj)
+        else:
+            return self.layer.graph.node_attributes(obj)
+
+    def params(self, obj):
+        attributes = self._attributes(obj)
+
+        if 'params' not in attributes:
+            attributes['params'] = dict()
+
+        return attributes['params']
+
+    def has_param(self, param, obj):
+        return param in self.params(obj)
+
+    def forget(self, obj):
+        """ Must be called before obj is removed from the layer graph.
+        """
+        return
+
+    def save(self, param, obj):
+        """ Returns a copy of the fields of the given param (None if not present).
+        """
+        rec = self.params(obj).get(param)
+        if rec is None:
+            return None
+
+        return dict(rec.items())
+
+    def restore(self, param, obj, state):
+        """ Reverts the given param to a state returned by :func:`save`.
+        """
+        params = self.params(obj)
+        if param in params:
+            del params[param]
+
+        if state is not None:
+            params[param] = dict(state)
+
+    def fingerprint(self, param, obj):
+        """ Returns the value (_UNSET if not assigned) and the candidates of the given param
+            by a single lookup (see :func:`mcc.framework.Layer.untracked_fingerprint`).
+        """
+        rec = self.params(obj).get(param)
+        if rec is None:
+            return _UNSET, frozenset()
+
+        return rec.get('value', _UNSET), frozenset(rec.get('candidates', ()))
+
+    def get_candidates(self, param, obj):
+        params = self.params(obj)
+
+        if param in params and 'candidates' in params[param]:
+            return params[param]['candidates']
+        else:
+            return set()
+
+    def isset_candidates(self, param, obj):
+        params = self.params(obj)
+        return param in params and 'candidates' in params[param]
+
+    def set_candidates(self, param, obj, candidates):
+        params = self.params(obj)
+
+        if param not in params:
+            params[param] = dict()
+
+        params[param]['candidates'] = candidates
+
+    def clear_param(self, param, obj):
+        params = self.params(obj)
+
+        del params[param]
+
+    def get_value(self, param, obj):
+        params = self.params(obj)
+
+        assert param in params, "%s not present for %s" % (param, obj)
+        assert 'value' in params[param], "value not assigned for %s on %s" % (param, obj)
+
+        return params[param]['value']
+
+    def isset_value(self, param, obj):
+        params = self.params(obj)
+        return param in params and 'value' in params[param]
+
+    def set_value(self, param, obj, value):
+        params = self.params(obj)
+
+        if param not in params:
+            params[param] = { 'value' : value, 'candidates' : set() }
+        else:
+            params[param]['value'] = value
+
+    def clear_value(self, param, obj):
+        params = self.params(obj)
+
+        if param in params:
+            if 'value' in params[param]:
+                del params[param]['value']
+
+    def get_failed(self, param, obj):
+        params = self.params(obj)
+
+        if param in params:
+            if 'failed' in params[param]:
+                return params[param]['failed']
+
+        return None
+
+    def set_failed(self, param, obj, failed):
+        params = self.params(obj)
+
+        assert param in params, "param %s not available on %s for %s" % (param, self.layer, obj)
+
+        if failed is None:
+            del params[param]['failed']
+        else:
+            params[param]['failed'] = failed
+
+
+class ParamRecord:
+    """ Value, candidates and failed state of a single param of a single object.
+
+    Supports dict-style access (e.g. `record['value']`, `'value' in record`) so
+    that code inspecting the graph attributes (viewer, export) works unchanged.
+    """
+    __slots__ = ('value', 'candidates', 'failed')
+
+    def __init__(self):
+        self.value      = _UNSET
+        self.candidates = _UNSET
+        self.failed     = _UNSET
+
+    def __contains__(self, field):
+        return getattr(self, field, _UNSET) is not _UNSET
+
+    def __getitem__(self, field):
+        val = getattr(self, field, _UNSET)
+        if val is _UNSET:
+            raise KeyError(field)
+
+        return val
+
+    def __setitem__(self, field, val):
+        setattr(self, field, val)
+
+    def __delitem__(self, field):
+        if field not in self:
+            raise KeyError(field)
+
+        setattr(self, field, _UNSET)
+
+    def keys(self):
+        return [f for f in self.__slots__ if f in self]
+
+    def items(self):
+        return [(f, getattr(self, f)) for f in self.keys()]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+
+class ParamRow:
+    """ Slot array holding the :class:`ParamRecord` objects of a single node or edge.
+
+    The column of each param is determined by the index shared by all rows of a layer.
+    Supports dict-style access by param name.
+    """
+    __slots__ = ('index', 'records')
+
+    def __init__(self, index):
+        """
+        Args:
+            :param index: param to column mapping (shared by all rows of a layer)
+            :type  index: dict
+        """
+        self.index   = index
+        self.records = [None] * len(index)
+
+    def record(self, param):
+        """
+        Returns:
+            :class:`ParamRecord` of the given param or None if not present.
+        """
+        col = self.index.get(param)
+        if col is None or col >= len(self.records):
+            return None
+
+        return self.records[col]
+
+    def add_record(self, param):
+        """ Returns the record of the given param, creates it if not present.
+        """
+        col = self.index.get(param)
+        if col is None:
+            col = len(self.index)
+            self.index[param] = col
+
+        if col >= len(self.records):
+            self.records.extend([None] * (col + 1 - len(self.records)))
+
+        rec = self.records[col]
+        if rec is None:
+            rec = ParamRecord()
+            self.records[col] = rec
+
+        return rec
+
+    def remove_record(self, param):
+        if self.record(param) is None:
+            raise KeyError(param)
+
+        self.records[self.index[param]] = None
+
+    def get(self, param, default=None):
+        rec = self.record(param)
+        return default if rec is None else rec
+
+    def __contains__(self, param):
+        return self.record(param) is not None
+
+    def __getitem__(self, param):
+        rec = self.record(param)
+        if rec is None:
+            raise KeyError(param)
+
+        return rec
+
+    def __setitem__(self, param, content):
+        rec = self.add_record(param)
+        for field, val in content.items():
+            rec[field] = val
+
+    def __delitem__(self, param):
+        self.remove_record(param)
+
+    def keys(self):
+        return [p for p, col in self.index.items()
+                  if col < len(self.records) and self.records[col] is not None]
+
+    def items(self):
+        return [(p, self.records[self.index[p]]) for p in self.keys()]
+
+    def values(self):
+        return [rec for rec in self.records if rec is not None]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.values())
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+
+class CompactParamStore(DictParamStore):
+    """ Columnar param store.
+
+    Every layer maintains an index that assigns a column to each param name.
+    Every node and edge holds a :class:`ParamRow` (stored in the graph attributes)
+    with one :class:`ParamRecord` per column. This avoids allocating two nested
+    dicts per object and param. The rows are additionally indexed by object so
+    that accesses bypass the graph's attribute lookup.
+    """
+
+    def __init__(self, layer):
+        DictParamStore.__init__(self, layer)
+        self.index = dict()
+        self.rows  = dict()
+
+    def forget(self, obj):
+        self.rows.pop(obj, None)
+
+        if not isinstance(obj, Edge) and obj in self.layer.graph.nodes():
+            # incident edges are removed along with the node
+            for e in self.layer.graph.in_edges(obj):
+                self.rows.pop(e, None)
+            for e in self.layer.graph.out_edges(obj):
+                self.rows.pop(e, None)
+
+    def params(self, obj):
+        row = self.rows.get(obj)
+        if row is not None:
+            return row
+
+        attributes = self._attributes(obj)
+
+        row = attributes.get('params')
+        if row.__class__ is not ParamRow:
+            # create row, or convert plain dicts (e.g. from an imported graph)
+            content = row
+            row = ParamRow(self.index)
+            if content is not None:
+                for param, fields in content.items():
+                    row[param] = fields
+
+            attributes['params'] = row
+
+        self.rows[obj] = row
+        return row
+
+    def has_param(self, param, obj):
+        return self.params(obj).record(param) is not None
+
+    def fingerprint(self, param, obj):
+        rec = self.params(obj).record(param)
+        if rec is None or rec.candidates is _UNSET:
+            return (_UNSET if rec is None else rec.value), frozenset()
+
+        return rec.value, frozenset(rec.candidates)
+
+    def get_candidates(self, param, obj):
+        rec = self.params(obj).record(param)
+
+        if rec is None or rec.candidates is _UNSET:
+            return set()
+
+        return rec.candidates
+
+    def isset_candidates(self, param, obj):
+        rec = self.params(obj).record(param)
+        return rec is not None and rec.candidates is not _UNSET
+
+    def set_candidates(self, param, obj, candidates):
+        self.params(obj).add_record(param).candidates = candidates
+
+    def clear_param(self, param, obj):
+        self.params(obj).remove_record(param)
+
+    def get_value(self, param, obj):
+        rec = self.params(obj).record(param)
+
+        assert rec is not None, "%s not present for %s" % (param, obj)
+        assert rec.value is not _UNSET, "value not assigned for %s on %s" % (param, obj)
+
+        return rec.value
+
+    def isset_value(self, param, obj):
+        rec = self.params(obj).record(param)
+        return rec is not None and rec.value is not _UNSET
+
+    def set_value(self, param, obj, value):
+        row = self.params(obj)
+        rec = row.record(param)
+        if rec is None:
+            rec = row.add_record(param)
+            rec.candidates = set()
+
+        rec.value = value
+
+    def clear_value(self, param, obj):
+        rec = self.params(obj).record(param)
+
+        if rec is not None:
+            rec.value = _UNSET
+
+    def get_failed(self, param, obj):
+        rec = self.params(obj).record(param)
+
+        if rec is None or rec.failed is _UNSET:
+            return None
+
+        return rec.failed
+
+    def set_failed(self, param, obj, failed):
+        rec = self.params(obj).record(param)
+
+        assert rec is not None, "param %s not available on %s for %s" % (param, self.layer, obj)
+
+        if failed is None:
+            del rec['failed']
+        else:
+            rec.failed = failed
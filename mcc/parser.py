@@ -14,26 +14,55 @@ except ImportError:
     from xml.etree import ElementTree as ET
 
 import logging
+from types import MappingProxyType
 
-from mcc.graph import GraphObj, Edge
+from mcc.graph import GraphObj, Edge, DeterministicHash
 from mcc.taskmodel import *
 from mcc.framework import Layer
 
 class XMLParser:
-    def __init__(self, xml_file, xsd_file=None):
-        self._file = xml_file
+    def __init__(self, xml_file, xsd_file=None, cache=None, streaming=False):
+        """
+        Args:
+            :param xml_file: XML file to be parsed
+            :param xsd_file: XML schema for validation (skipped if the file is found in the cache)
+            :param cache: cache of parsed files
+            :type  cache: :class:`mcc.modelcache.ModelCache`
+            :param streaming: parse incrementally with :func:`_iterparse` (must be implemented by the class)
+            :type  streaming: bool
+        """
+        self._file      = xml_file
+        self._cache     = cache
+        self._cache_key = None
+        self._cached    = None
         if self._file is not None:
-            if hasattr(ET, "XMLSchema"):
-                schema = None
-                if xsd_file is not None:
-                    schema = ET.XMLSchema(file=xsd_file)
-                parser = ET.XMLParser(schema=schema)
+            if self._cache is not None:
+                kind = type(self).__name__ + ('-streaming' if streaming else '')
+                self._cache_key = self._cache.key(kind, self._file, xsd_file)
+                self._cached    = self._cache.load(self._cache_key)
+
+            schema = None
+            if hasattr(ET, "XMLSchema") and xsd_file is not None and self._cached is None:
+                schema = ET.XMLSchema(file=xsd_file)
+
+            if streaming:
+                self._tree = self._iterparse(schema)
+            elif hasattr(ET, "XMLSchema"):
+                self._tree = ET.parse(self._file, parser=ET.XMLParser(schema=schema))
             else:
-                parser = ET.XMLParser()
+                self._tree = ET.parse(self._file, parser=ET.XMLParser())
 
-            self._tree = ET.parse(self._file, parser=parser)
             self._root = self._tree.getroot()
 
+    def _store_in_cache(self, data=None):
+        """ Stores the given data in the cache unless the file was loaded from the cache.
+        """
+        if self._cache is None or self._cached is not None:
+            return
+
+        self._cached = data if data is not None else dict()
+        self._cache.store(self._cache_key, self._cached)
+
 class AggregateRepository:
     def __init__(self, *args):
         self.repos = list()
@@ -55,7 +84,7 @@ class AggregateRepository:
 
 class Repository(XMLParser):
 
-    class ElementWrapper:
+    class ElementWrapper(DeterministicHash):
         def __init__(self, xml_node):
             self.xml_node = xml_node
 
@@ -109,8 +138,13 @@ class Repository(XMLParser):
 
 
     class Service:
+        __slots__ = ('xml_node',)
+
         def __init__(self, xml_node):
-            self.xml_node = xml_node
+            super().__setattr__('xml_node', xml_node)
+
+        def __setattr__(self, name, value):
+            raise Exception("Setting service attributes is not allowed.")
 
         def max_clients(self):
             return self.xml_node.get('max_clients')
@@ -177,20 +211,157 @@ class Repository(XMLParser):
                     self.ref(),
                     self.max_clients())
 
-    class Component:
+    class TimingView:
+        """ Parsed contents of a <timing> node.
+
+        Every task sequence is stored as a tuple of entries: ('task', name, wcet, bcet),
+        ('signal', junction, to_ref), ('call', to_ref, method) or ('interrupt', id).
+        """
+        __slots__ = ('rpcs', 'signals', 'junctions', 'periodic', 'interrupts')
+
+        def __init__(self, timing):
+            self.rpcs       = tuple((n.get('from_ref'), n.get('method'), self._sequence(n))
+                                    for n in timing.findall('on-rpc'))
+            self.signals    = tuple((n.get('from_ref'), self._sequence(n))
+                                    for n in timing.findall('on-signal'))
+            self.junctions  = tuple((n.get('name'), n.get('type'), self._sequence(n))
+                                    for n in timing.findall('junction'))
+            self.periodic   = tuple((n.get('period'), self._sequence(n))
+                                    for n in timing.findall('on-time'))
+            self.interrupts = tuple((n.get('id'), self._sequence(n))
+                                    for n in timing.findall('on-interrupt'))
+
+        @staticmethod
+        def _sequence(root):
+            entries = list()
+            for node in root:
+                if node.tag == 'task':
+                    entries.append(('task', node.get('name'), node.get('wcet'), node.get('bcet')))
+                elif node.tag == 'signal':
+                    entries.append(('signal', node.get('junction'), node.get('to_ref')))
+                elif node.tag == 'call':
+                    entries.append(('call', node.get('to_ref'), node.get('method')))
+                elif node.tag == 'interrupt':
+                    entries.append(('interrupt', node.get('id')))
+
+            return tuple(entries)
+
+        def find_rpc(self, from_ref, method=None):
+            for ref, meth, sequence in self.rpcs:
+                if ref == from_ref and (method is None or meth == method):
+                    return sequence
+
+            return None
+
+        def find_signal(self, from_ref):
+            for ref, sequence in self.signals:
+                if ref == from_ref:
+                    return sequence
+
+            return None
+
+    class PatternView:
+        """ Parsed contents of a <pattern> node.
+
+        Children are stored as tuples of (name, config node), routes as tuples of
+        (child name, service name, ref, has <child>, name of <child>).
+        """
+        __slots__ = ('children', 'routes')
+
+        def __init__(self, xml_node):
+            children = list()
+            routes   = list()
+            for c in xml_node.findall('component'):
+                children.append((c.get('name'), c.find('./config')))
+                for s in c.findall('./route/service'):
+                    child = s.find('child')
+                    routes.append((c.get('name'), s.get('name'), s.get('ref'), child is not None,
+                                   child.get('name') if child is not None else None))
+
+            self.children = tuple(children)
+            self.routes   = tuple(routes)
+
+    class ComponentView:
+        """ Parsed contents of a <component> or <composite> node.
+
+        Services are stored as tuples of (name, ref, function, :class:`Repository.Service`).
+        The binary name is only looked up for <component> nodes and None for composites.
+        """
+        __slots__ = ('label', 'binary', 'classes', 'singleton', 'shareable', 'affinities',
+                     'quanta', 'rte', 'specs', 'required', 'provided', 'functions', 'timing',
+                     'patterns')
+
+        def __init__(self, xml_node, repo):
+            name = xml_node.get('name')
+            self.label     = name if name is not None else 'anonymous'
+            self.binary    = repo.get_binary_name(self.label) if xml_node.tag != 'composite' else None
+            self.classes   = frozenset(repo._get_component_classes(xml_node))
+            self.singleton = xml_node.get('singleton')
+            self.shareable = xml_node.get('shareable')
+
+            quanta     = dict()
+            affinities = set()
+            specs      = set()
+            self.rte   = 'native'
+            rte_found  = False
+            for node in xml_node.findall('./requires/*'):
+                if node.tag == 'affinity':
+                    affinities.add(int(node.get('val')))
+                elif node.tag == 'spec':
+                    specs.add(node.get('name'))
+                elif node.tag == 'rte' and not rte_found:
+                    self.rte  = node.get('name')
+                    rte_found = True
+
+                if isinstance(node.tag, str) and node.tag not in quanta:
+                    quanta[node.tag] = node.get('quantum')
+
+            self.quanta     = MappingProxyType(quanta)
+            self.affinities = frozenset(affinities)
+            self.specs      = frozenset(specs)
+
+            self.required  = self._services(xml_node.findall('./requires/service'))
+            self.provided  = self._services(xml_node.findall('./provides/service'))
+            self.functions = tuple(f.get('name') for f in xml_node.findall('function'))
+
+            timing = xml_node.find('./timing')
+            self.timing = Repository.TimingView(timing) if timing is not None else None
+
+            self.patterns = MappingProxyType({ pat : Repository.PatternView(pat)
+                                               for pat in xml_node.findall('./pattern') })
+
+        @staticmethod
+        def _services(nodes):
+            return tuple((s.get('name'), s.get('ref'), s.get('function'), Repository.Service(s))
+                         for s in nodes)
+
+        @staticmethod
+        def filter_services(services, name=None, ref=None):
+            return [s for n, r, f, s in services
+                    if (name is None or n == name) and (ref is None or r == ref)]
+
+    class Component(DeterministicHash):
         def __init__(self, xml_node, repo):
             self.repo = repo
             self.xml_node = xml_node
+            self._view = None
+
+        def view(self):
+            """ Returns the parsed contents of the XML node, which are parsed on first access.
+
+            Returns:
+                :class:`Repository.ComponentView`
+            """
+            if self._view is None:
+                self._view = Repository.ComponentView(self.xml_node, self.repo)
+
+            return self._view
 
         def properties(self):
             return set()
 
         def affinities(self):
-            res = set()
-            for a in self.xml_node.findall('./requires/affinity'):
-                res.add(int(a.get('val')))
-
-            return res
+            return set(self.view().affinities)
 
         def prio(self):
             return 0
@@ -198,85 +369,63 @@ class Repository(XMLParser):
         def uid(self):
             # if singleton, return (binary) name
             if self.singleton():
-                return self.repo.get_binary_name(self.label())
+                if self.xml_node.tag == 'composite':
+                    return self.repo.get_binary_name(self.label())
+
+                return self.view().binary
 
             # else:
             return self.xml_node
 
         def binary_name(self):
-            if self.xml_node.tag == 'composite':
-                return None
-
-            return self.repo.get_binary_name(self.label())
+            return self.view().binary
 
         def singleton(self):
-            return self.xml_node.get('singleton')
+            return self.view().singleton
 
         def dedicated(self):
-            return not self.xml_node.get('shareable')
+            return not self.view().shareable
 
         def requires_quantum(self, name):
-            quantum = self.xml_node.find('./requires/%s' % name)
-            if quantum is not None:
-                return int(quantum.get('quantum'))
+            quanta = self.view().quanta
+            if name in quanta:
+                return int(quanta[name])
             else:
                 return 0
 
         def requires_rte(self):
-            rte = self.xml_node.find('./requires/rte')
-            if rte is not None:
-                return rte.get('name')
-            else:
-                return 'native'
+            return self.view().rte
 
         def requires_specs(self):
-            specs = set()
-            for spec in self.xml_node.findall('./requires/spec'):
-                specs.add(spec.get('name'))
-
-            return specs
+            return set(self.view().specs)
 
         def requires_functions(self):
             functions = set()
             if self.xml_node.tag == "composite":
-                for s in self.xml_node.findall("./requires/service[@function]"):
-                    functions.add(s.get("function"))
+                for n, r, f, s in self.view().required:
+                    if f is not None:
+                        functions.add(f)
 
             return functions
 
         def requires_services(self, name=None, ref=None):
-            services = list()
-            for s in self.xml_node.findall("./requires/service"):
-                if name is None or s.get('name') == name:
-                    if ref is None or s.get('ref') == ref:
-                        services.append(Repository.Service(s))
-
-            return services
+            return Repository.ComponentView.filter_services(self.view().required, name, ref)
 
         def provides_services(self, name=None, ref=None, function=None):
-            services = list()
-            for s in self.xml_node.findall("./provides/service"):
-                if name is None or s.get('name') == name:
-                    if ref is None or s.get('ref') == ref:
-                        services.append(Repository.Service(s))
-
-            return services
+            return Repository.ComponentView.filter_services(self.view().provided, name, ref)
 
         def _function(self):
-            if self.xml_node.find('function') is not None:
-                return self.xml_node.find('function').get('name')
+            functions = self.view().functions
+            if len(functions):
+                return functions[0]
 
             return None
 
         def functions(self):
-            funcs = set()
-            for f in self.xml_node.findall('function'):
-                funcs.add(f.get('name'))
-
-            return funcs
+            return set(self.view().functions)
 
         def type(self):
-            classes = self.repo._get_component_classes(self.xml_node)
+            classes = self.view().classes
             assert(len(classes) <= 1)
             if len(classes) == 1:
                 return list(classes)[0]
@@ -284,16 +433,12 @@ class Repository(XMLParser):
                 return None
 
         def service_for_function(self, function):
-            for s in self.xml_node.findall("./requires/service[@function]"):
-                if s.get('function') == function:
-                    return Repository.Service(s)
+            for n, r, f, s in self.view().required:
+                if f is not None and f == function:
+                    return s
 
         def label(self):
-            name = self.xml_node.get('name')
-            if name is not None:
-                return name
-            else:
-                return 'anonymous'
+            return self.view().label
 
         def defaults(self):
             return self.xml_node.find('./defaults')
@@ -309,7 +454,7 @@ class Repository(XMLParser):
         def patterns(self):
             result = set()
             if self.xml_node.tag == 'composite':
-                for pat in self.xml_node.findall("./pattern"):
+                for pat in self.view().patterns:
                     result.add(Repository.ComponentPattern(self, pat))
             else:
                 result.add(self)
@@ -330,14 +475,14 @@ class Repository(XMLParser):
 
             return {GraphObj(Layer.Node(self), params=params)}
 
-        def _taskgraph_objects(self, root, expect, thread, **kwargs):
-            # return tasks and tasklinks within given node
+        def _taskgraph_objects(self, sequence, expect, thread, **kwargs):
+            # return tasks and tasklinks of given sequence (see TimingView)
             objects = list()
-            for node in root:
-                if node.tag == 'task':
-                    newtask = Task(name=node.get('name'),
-                                   wcet=int(node.get('wcet')),
-                                   bcet=int(node.get('bcet')),
+            for entry in sequence:
+                if entry[0] == 'task':
+                    newtask = Task(name=entry[1],
+                                   wcet=int(entry[2]),
+                                   bcet=int(entry[3]),
                                    thread=thread)
                     if len(objects):
                         if objects[-1].expect_out == 'server':
@@ -350,21 +495,21 @@ class Repository(XMLParser):
 
                     objects.append(newtask)
 
-                elif node.tag == 'signal':
-                    if node.get('junction'):
+                elif entry[0] == 'signal':
+                    if entry[1]:
                         objects[-1].set_placeholder_out('junction',
-                                                        name=node.get('junction'))
+                                                        name=entry[1])
                     else:
                         objects[-1].set_placeholder_out('receiver',
-                                                        to_ref=node.get('to_ref'))
+                                                        to_ref=entry[2])
 
-                elif node.tag == 'call':
+                elif entry[0] == 'call':
                     objects[-1].set_placeholder_out('server',
-                                                    to_ref=node.get('to_ref'),
-                                                    method=node.get('method'))
-                elif node.tag == 'interrupt':
+                                                    to_ref=entry[1],
+                                                    method=entry[2])
+                elif entry[0] == 'interrupt':
                     objects[-1].set_placeholder_out('interrupt',
-                                                    id=node.get('id'))
+                                                    id=entry[1])
 
             if objects[0].expect_in == 'client':
                 objects[-1].set_placeholder_out('client')
@@ -379,30 +524,23 @@ class Repository(XMLParser):
 
         def taskgraph_objects(self, thread, rpc=None, method=None, signal=None):
             # find <timing>
-            timing = self.xml_node.find('./timing')
+            timing = self.view().timing
             if timing is None:
                 return set()
 
             if rpc is not None:
-                if method is None:
-                    node = timing.find('./on-rpc[@from_ref="%s"]' % rpc)
-                else:
-                    node = None
-                    for n in timing.findall('./on-rpc[@from_ref="%s"]' % (rpc)):
-                        if n.get('method') == method:
-                            node = n
-                            break
+                sequence = timing.find_rpc(rpc, method)
 
-                assert node is not None, '<on-rpc from_ref="%s" method="%s"> not present' % (rpc, method)
+                assert sequence is not None, '<on-rpc from_ref="%s" method="%s"> not present' % (rpc, method)
 
                 # TODO remember to connect junction placeholders (caller)
                 # TODO remember to connect server placeholders
-                return self._taskgraph_objects(node, 'client', thread, from_ref=rpc, method=method)
+                return self._taskgraph_objects(sequence, 'client', thread, from_ref=rpc, method=method)
 
             elif signal is not None:
-                node = timing.find('./on-signal[@from_ref="%s"]' % signal)
-                if node is not None:
-                    return self._taskgraph_objects(node, 'sender', thread, from_ref=signal)
+                sequence = timing.find_signal(signal)
+                if sequence is not None:
+                    return self._taskgraph_objects(sequence, 'sender', thread, from_ref=signal)
 
                 return set()
 
@@ -410,22 +548,22 @@ class Repository(XMLParser):
                 # TODO remember to connect server placeholders
             else:
                 junction_objects = set()
-                for junction_node in timing.findall('junction'):
-                    junction_objects.update(self._taskgraph_objects(junction_node,
+                for name, jtype, sequence in timing.junctions:
+                    junction_objects.update(self._taskgraph_objects(sequence,
                                                                     'junction',
                                                                     thread,
-                                                                    junction_name=junction_node.get('name'),
-                                                                    junction_type=junction_node.get('type')))
+                                                                    junction_name=name,
+                                                                    junction_type=jtype))
 
                 objects = set()
-                for time_node in timing.findall('on-time'):
-                    objects.update(self._taskgraph_objects(time_node, None, thread,
-                                                           period=time_node.get('period')))
+                for period, sequence in timing.periodic:
+                    objects.update(self._taskgraph_objects(sequence, None, thread,
+                                                           period=period))
 
                 # on-interrupt
-                for interrupt_node in timing.findall('on-interrupt'):
-                    objects.update(self._taskgraph_objects(interrupt_node, 'interrupt', thread,
-                                                           id=interrupt_node.get('id')))
+                for irq, sequence in timing.interrupts:
+                    objects.update(self._taskgraph_objects(sequence, 'interrupt', thread,
+                                                           id=irq))
 
 #                # link to junctions
 #                for task in objects:
@@ -477,15 +615,23 @@ class Repository(XMLParser):
             return ( self.label(),
                      self.unique_label() )
 
-    class ComponentPattern():
+    class ComponentPattern(DeterministicHash):
         def __init__(self, component, xml_node):
             self.repo = component.repo
             self.component = component
             self.xml_node = xml_node
 
+        def view(self):
+            """ Returns the parsed contents of the XML node (see :class:`Repository.PatternView`).
+            """
+            return self.component.view().patterns[self.xml_node]
+
         def label(self):
             return self.component.label()
 
+        def __repr__(self):
+            return self.label()
+
         def properties(self):
             props = self.xml_node.get('properties')
             if props is not None:
@@ -502,8 +648,8 @@ class Repository(XMLParser):
 
         def requires_specs(self):
             specs = set()
-            for c in self.xml_node.findall("component"):
-                components = self.repo.find_components_by_type(c.get('name'), querytype='component')
+            for name, config in self.view().children:
+                components = self.repo.find_components_by_type(name, querytype='component')
                 assert(len(components) == 1)
                 specs.update(components[0].requires_specs())
 
@@ -571,46 +717,42 @@ class Repository(XMLParser):
             flattened = set()
 
             node_lookup  = dict()
-            child_lookup = dict()
             name_lookup = dict()
             # first, add all components and create lookup table by child name
-            for c in self.xml_node.findall("component"):
-                components = self.repo.find_components_by_type(c.get('name'), querytype='component')
-                name_lookup[c.get('name')] = components[0]
+            view = self.view()
+            for cname, config in view.children:
+                components = self.repo.find_components_by_type(cname, querytype='component')
+                name_lookup[cname] = components[0]
                 # FIXME, we might have multiple options here
                 assert len(components) == 1, 'Cannot resolve component in pattern unambiguously'
 
-                child_lookup[c] = components[0]
                 node_lookup[components[0]]  = Layer.Node(components[0])
                 params = dict()
                 if default_params is not None:
                     for (p,v) in default_params.items():
                         params[p] = v
 
-                config = c.find('./config')
                 if config is not None:
                     params['pattern-config'] = Repository.ElementWrapper(config)
                 flattened.add(GraphObj(node_lookup[components[0]], params))
 
             # second, add connections
-            for c in self.xml_node.findall("component"):
-                for s in c.findall('./route/service'):
-                    services = child_lookup[c].requires_services(s.get('name'), ref=s.get('ref'))
-                    assert len(services) == 1, \
-                        "Cannot unambiguously determine composite-internal connection of service name %s, ref %s from component %s in composite %s, services found: %s" % (s.get('name'), s.get('ref'), c.get('name'), self.label(), services)
-                    source_service = services[0]
-
-                    if s.find('child') is not None:
-                        name = s.find('child').get('name')
-                        if name not in name_lookup:
-                            logging.critical("Cannot satisfy internal route to child '%s' of pattern." % name)
-                        else:
-                            provided = name_lookup[name].provides_services(name=s.get('name'))
-                            assert(len(provided) == 1)
-                            params = { 'source-service' : source_service, 'target-service' : provided[0]}
-                            flattened.add(GraphObj(
-                                Edge(node_lookup[child_lookup[c]],
-                                     node_lookup[name_lookup[name]]), params))
+            for cname, sname, ref, has_child, name in view.routes:
+                services = name_lookup[cname].requires_services(sname, ref=ref)
+                assert len(services) == 1, \
+                    "Cannot unambiguously determine composite-internal connection of service name %s, ref %s from component %s in composite %s, services found: %s" % (sname, ref, cname, self.label(), services)
+                source_service = services[0]
+
+                if has_child:
+                    if name not in name_lookup:
+                        logging.critical("Cannot satisfy internal route to child '%s' of pattern." % name)
+                    else:
+                        provided = name_lookup[name].provides_services(name=sname)
+                        assert(len(provided) == 1)
+                        params = { 'source-service' : source_service, 'target-service' : provided[0]}
+                        flattened.add(GraphObj(
+                            Edge(node_lookup[name_lookup[cname]],
+                                 node_lookup[name_lookup[name]]), params))
 
             return flattened
 
@@ -620,8 +762,29 @@ class Repository(XMLParser):
     class NodeNotFoundError(Exception):
         pass
 
-    def __init__(self, config_model_file, xsd_file=None):
-        XMLParser.__init__(self, config_model_file, xsd_file)
+    # top-level elements kept by the streaming loader
+    STREAMED_TAGS = ('component', 'composite', 'binary')
+
+    def __init__(self, config_model_file, xsd_file=None, cache=None, streaming=False):
+        """
+        Args:
+            :param config_model_file: XML file containing a <repository>
+            :param xsd_file: XML schema for validation
+            :param cache: cache of parsed files
+            :type  cache: :class:`mcc.modelcache.ModelCache`
+            :param streaming: use the incremental loader (see :func:`_iterparse`)
+            :type  streaming: bool
+        """
+        XMLParser.__init__(self, config_model_file, xsd_file, cache, streaming=streaming)
+
+        # lookup tables (filled by _build_indexes())
+        self._function_providers = dict()
+        self._class_members      = dict()
+        self._node_classes       = dict()
+        self._components_by_name = dict()
+        self._provisions         = dict()
+        self._binary_names       = dict()
+        self._component_cache    = dict()
 
         if self._file is not None:
             # find <repository>
@@ -630,19 +793,124 @@ class Repository(XMLParser):
                 if self._root == None:
                     raise self.NodeNotFoundError("Cannot find <repository> node.")
 
-    def _find_function_by_name(self, name):
-        function_providers = list()
-        # iterate components
-        for c in self._root.findall("component"):
-            for f in self._find_element_by_attribute("function", { "name" : name }, root=c):
-                function_providers.append(c)
-
-        # iterate composites
-        for c in self._root.findall("composite"):
-            for f in self._find_element_by_attribute("function", { "name" : name }, root=c):
-                function_providers.append(c)
+            if self._cached is not None and 'indexes' in self._cached:
+                self._restore_indexes(self._cached['indexes'])
+            else:
+                self._build_indexes()
+                self._store_in_cache({ 'indexes' : self._export_indexes() })
+
+    def _iterparse(self, schema=None):
+        """ Parses the file incrementally and only keeps the elements needed by the repository.
+
+        Every <component>, <composite> and <binary> within <repository> is moved
+        into a new tree as soon as it has been parsed. Any other content (e.g.
+        <platform> or <system> in the same file, comments and whitespace) is
+        released immediately, hence the entire document is never held in memory.
+
+        Returns:
+            element tree with <repository> as root
+        """
+        assert hasattr(ET, 'iterparse') and hasattr(ET, 'XMLSchema'), "streaming requires lxml"
+
+        root       = ET.Element('repository')
+        repository = None
+        for event, elem in ET.iterparse(self._file, events=('start', 'end'), schema=schema,
+                                        remove_blank_text=True, remove_comments=True):
+            if event == 'start':
+                if repository is None and elem.tag == 'repository':
+                    repository = elem
+                    root.attrib.update(elem.attrib)
+                continue
+
+            parent = elem.getparent()
+            if parent is None:
+                continue
+
+            if parent is repository:
+                if elem.tag in self.STREAMED_TAGS:
+                    # moves the element into the new tree
+                    root.append(elem)
+                    continue
+            elif parent.getparent() is not None:
+                # not a top-level element, released with its top-level ancestor
+                continue
+
+            elem.clear()
+            parent.remove(elem)
+
+        if repository is None:
+            raise self.NodeNotFoundError("Cannot find <repository> node.")
+
+        return ET.ElementTree(root)
+
+    def _build_indexes(self):
+        """ Fills the lookup tables for the queries on the repository.
+
+        The repository is not modified after parsing, hence the lookup tables are
+        only built once instead of scanning the XML tree on every query.
+        """
+        for tag in ['component', 'composite']:
+            for c in self._root.findall(tag):
+                self._components_by_name.setdefault((tag, c.get('name')), list()).append(c)
+
+                # a node is listed once per <function> (as done by the previous XPath lookup)
+                for f in c.findall('function'):
+                    self._function_providers.setdefault(f.get('name'), list()).append(c)
+
+                classes = self._get_component_classes(c)
+                if not classes:
+                    self._class_members.setdefault(None, list()).append(c)
+                for cls in classes:
+                    self._class_members.setdefault(cls, list()).append(c)
+
+        for tag in ['provides', 'parent-provides']:
+            for p in self._root.iter(tag):
+                for s in p:
+                    self._provisions.setdefault((s.tag, None), list()).append(s)
+                    self._provisions.setdefault((s.tag, s.get('name')), list()).append(s)
+
+        # remark: <binary name="x"> takes precedence over a binary containing <component name="x">
+        contained = dict()
+        for b in self._root.findall('binary'):
+            self._binary_names.setdefault(b.get('name'), b.get('name'))
+            for c in b.findall('component'):
+                contained.setdefault(c.get('name'), b.get('name'))
+
+        for name, binary in contained.items():
+            self._binary_names.setdefault(name, binary)
+
+    def _export_indexes(self):
+        """ Returns the lookup tables with XML nodes replaced by their position in the document.
+        """
+        positions = { e : i for i, e in enumerate(self._root.iter()) }
+
+        def export(table):
+            return { key : [positions[e] for e in nodes] for key, nodes in table.items() }
+
+        return { 'function_providers' : export(self._function_providers),
+                 'class_members'      : export(self._class_members),
+                 'components_by_name' : export(self._components_by_name),
+                 'provisions'         : export(self._provisions),
+                 'node_classes'       : { positions[e] : cls for e, cls in self._node_classes.items() },
+                 'binary_names'       : self._binary_names }
+
+    def _restore_indexes(self, indexes):
+        """ Restores the lookup tables from :func:`_export_indexes`.
+        """
+        elements = list(self._root.iter())
+
+        def restore(table):
+            return { key : [elements[i] for i in positions] for key, positions in table.items() }
+
+        self._function_providers = restore(indexes['function_providers'])
+        self._class_members      = restore(indexes['class_members'])
+        self._components_by_name = restore(indexes['components_by_name'])
+        self._provisions         = restore(indexes['provisions'])
+        self._node_classes       = { elements[i] : cls for i, cls in indexes['node_classes'].items() }
+        self._binary_names       = indexes['binary_names']
 
-        return function_providers
+    def _find_function_by_name(self, name):
+        return list(self._function_providers.get(name, []))
 
     def _find_element_by_attribute(self, elementname, attrs=dict(), root=None):
         if root is None:
@@ -663,6 +931,9 @@ class Repository(XMLParser):
         return elements
 
     def _get_component_classes(self, component_node):
+        if component_node in self._node_classes:
+            return set(self._node_classes[component_node])
+
         classes = set()
         if component_node.find("protocol") is not None:
             classes.add("protocol")
@@ -679,41 +950,16 @@ class Repository(XMLParser):
         if component_node.find("function") is not None:
             classes.add("function")
 
+        self._node_classes[component_node] = frozenset(classes)
+
         return classes
 
     def _find_component_by_class(self, classification=None):
-        components = list()
-
-        for c in self._root.findall("component"):
-            classes = self._get_component_classes(c)
-            if classification is None and len(classes) == 0:
-                components.append(c)
-            elif classification is not None and classification in classes:
-                components.append(c)
-
-        for c in self._root.findall("composite"):
-            classes = self._get_component_classes(c)
-            if classification is None and len(classes) == 0:
-                components.append(c)
-            elif classification is not None and classification in classes:
-                components.append(c)
-
-        return components
+        return list(self._class_members.get(classification, []))
 
     def _find_provisions(self, node="service", name=None):
-        provisions = list()
-        for p in self._root.iter("provides"):
-            for s in p.findall(node):
-                if name is None or s.get("name") == name:
-                    provisions.append(s)
-
-        # also get provisions from <parent-provides> in <system>
-        for p in self._root.iter("parent-provides"):
-            for s in p.findall(node):
-                if name is None or s.get("name") == name:
-                    provisions.append(s)
-
-        return provisions
+        # remark: also contains provisions from <parent-provides> in <system>
+        return list(self._provisions.get((node, name), []))
 
     def find_proxies(self, service=None, carrier=None, query=None):
         carrier = None
@@ -754,6 +1000,15 @@ class Repository(XMLParser):
         return result
 
     def find_components_by_type(self, query, querytype):
+        """ Returns the components matching the query (memoised).
+        """
+        key = (querytype, tuple(sorted(query.items())) if isinstance(query, dict) else query)
+        if key not in self._component_cache:
+            self._component_cache[key] = self._find_components_by_type(query, querytype)
+
+        return list(self._component_cache[key])
+
+    def _find_components_by_type(self, query, querytype):
         if querytype == 'function':
             components = self._find_function_by_name(query)
         elif querytype == 'proxy':
@@ -763,19 +1018,14 @@ class Repository(XMLParser):
         elif querytype == 'proto':
             components = self.find_protocolstacks(query=query)
         else: # 'component' or 'composite'
-            components = self._find_element_by_attribute('component', { "name" : query }) + \
-                         self._find_element_by_attribute('composite', { "name" : query })
+            components = self._components_by_name.get(('component', query), []) + \
+                         self._components_by_name.get(('composite', query), [])
 
         return [Repository.Component(c, self) for c in components]
 
     def get_binary_name(self, component_name):
-        cand = self._root.find("binary[@name='%s']" % component_name)
-        if cand is not None:
-            return cand.get('name')
-
-        cand = self._root.find("binary/component[@name='%s']/.." % component_name)
-        if cand is not None:
-            return cand.get('name')
+        if component_name in self._binary_names:
+            return self._binary_names[component_name]
 
         logging.error("No binary found for component '%s'" % component_name)
         return None
@@ -1084,7 +1334,7 @@ class Repository(XMLParser):
                 if len(self._find_element_by_attribute("component", { "name" : b.get("name") })) == 0:
                     logging.error("Binary '%s' refers to non-existent component '%s'." %(b.get("name"), b.get("name")))
 
-class ChildQuery:
+class ChildQuery(DeterministicHash):
     def __init__(self, xml_node):
         self._root      = xml_node
 
@@ -1166,8 +1416,8 @@ class SystemParser:
     class NodeNotFoundError(Exception):
         pass
 
-    def __init__(self, xml_file, xsd_file=None):
-        XMLParser.__init__(self, xml_file, xsd_file)
+    def __init__(self, xml_file, xsd_file=None, cache=None):
+        XMLParser.__init__(self, xml_file, xsd_file, cache)
 
         if self._file is not None:
             # find <system>
@@ -1176,6 +1426,8 @@ class SystemParser:
                 if self._root == None:
                     raise self.NodeNotFoundError("Cannot find <system> node.")
 
+            XMLParser._store_in_cache(self)
+
     def name(self):
         res = self._root.get('name')
         if res is None:
@@ -1213,7 +1465,7 @@ class AggregateSystemParser:
         return result
 
 class PlatformParser:
-    class PfComponent:
+    class PfComponent(DeterministicHash):
         def __init__(self, xml_node, parent=None):
             self._root = xml_node
             self._parent = parent
@@ -1331,8 +1583,8 @@ class PlatformParser:
     class NodeNotFoundError(Exception):
         pass
 
-    def __init__(self, xml_file, xsd_file=None):
-        XMLParser.__init__(self, xml_file, xsd_file)
+    def __init__(self, xml_file, xsd_file=None, cache=None):
+        XMLParser.__init__(self, xml_file, xsd_file, cache)
 
         if self._file is not None:
             # find <platform>
@@ -1341,6 +1593,8 @@ class PlatformParser:
                 if self._root == None:
                     raise self.NodeNotFoundError("Cannot find <platform> node.")
 
+            XMLParser._store_in_cache(self)
+
         self._check()
 
     def _check(self):
@@ -0,0 +1,327 @@
+"""
+Description
+-----------
+
+Implements profiling and tracing of :class:`mcc.backtracking.BacktrackRegistry`.
+
+While a :class:`Profiler` is attached to a registry, the execution of every
+operation, the calls of the analysis engines (map, assign, check, transform and
+their batch variants) as well as the dependency tracking of the decision graph
+are timed. For every call stack (i.e. operation, engine method, tracking), the
+number of calls, the number of processed objects, the cumulative time and the
+self time (excluding nested calls) is recorded.
+
+The results can be written as JSON (aggregated per operation/engine pair) and
+in the folded stack format, which is understood by flame graph tools (e.g.
+flamegraph.pl or speedscope).
+
+A :class:`Tracer` records a timeline of backtracking iterations, steps,
+operations, processed objects, failed constraints, culprit selections and
+rollbacks in the trace event format, which can be viewed with chrome://tracing
+or Perfetto (https://ui.perfetto.dev).
+
+Note that instrumenting the dependency tracking adds considerable overhead, hence
+absolute times are only comparable between instrumented runs.
+
+:Authors:
+    - Johannes Schlatow
+
+"""
+
+import os
+import json
+import time
+
+from mcc.framework import ConstraintNotSatisfied
+
+
+class Instrumentation:
+    """ Base class for instrumenting methods of registry, steps, operations, etc.
+
+    Instrumented methods are replaced by instance attributes, which are removed
+    by :func:`detach`.
+    """
+
+    def __init__(self):
+        self._wrapped = list()
+        self._ids     = set()
+
+    def attach(self, registry):
+        raise NotImplementedError()
+
+    def detach(self):
+        # restore in reverse order so that instrumentations can be stacked
+        for obj, name, previous in reversed(self._wrapped):
+            if previous is None:
+                del obj.__dict__[name]
+            else:
+                obj.__dict__[name] = previous
+
+        self._wrapped = list()
+        self._ids     = set()
+
+    def _wrap(self, obj, name, enter, leave):
+        """ Calls `enter(*args)` before and `leave(token, result, exception)` after every call
+            of the given method, where token is the return value of enter().
+        """
+        # skip if already instrumented (e.g. engines shared by map and assign operations)
+        if (id(obj), name) in self._ids:
+            return
+
+        method = getattr(obj, name)
+
+        def wrapper(*args, **kwargs):
+            token = enter(*args, **kwargs)
+            try:
+                result = method(*args, **kwargs)
+            except BaseException as ex:
+                leave(token, None, ex)
+                raise
+
+            leave(token, result, None)
+            return result
+
+        self._wrapped.append((obj, name, obj.__dict__.get(name)))
+        self._ids.add((id(obj), name))
+        obj.__dict__[name] = wrapper
+
+    @staticmethod
+    def operation_label(op):
+        return '%s:%s(%s)' % (op.source_layer.name, type(op).__name__, op.name)
+
+    @staticmethod
+    def step_label(step):
+        return '%s(%s -> %s)' % (type(step).__name__, step.source_layer.name, step.target_layer.name)
+
+
+class Profiler(Instrumentation):
+    """ Records call counts and times per operation, analysis engine and dependency tracking.
+    """
+
+    ENGINE_METHODS   = ('map', 'assign', 'check', 'transform', 'batch_map', 'batch_assign', 'batch_check')
+    TRACKING_METHODS = ('start_tracking', 'stop_tracking', 'track_read', 'track_written')
+    TRACKING         = 'dependency tracking'
+
+    class Record:
+        def __init__(self):
+            self.calls      = 0
+            self.objects    = 0
+            self.cumulative = 0.0
+            self.own        = 0.0
+
+    def __init__(self, outpath=None):
+        """
+        Args:
+            :param outpath: output path/prefix for the profile files written by :func:`write`
+            :type  outpath: str
+        """
+        super().__init__()
+        self.outpath = outpath
+        self.records = dict()
+        self._stack  = list()
+
+    def attach(self, registry):
+        """ Instruments the operations, analysis engines and decision graph of the registry.
+        """
+        for step in registry.steps:
+            for op in step.operations:
+                self._instrument(op, 'execute', self.operation_label(op), batch=True)
+                for ae in op.analysis_engines:
+                    for method in self.ENGINE_METHODS:
+                        if hasattr(ae, method):
+                            self._instrument(ae, method, '%s.%s' % (ae, method),
+                                             batch=method.startswith('batch_'))
+
+        for method in self.TRACKING_METHODS:
+            self._instrument(registry.decision_graph, method, self.TRACKING, count=False)
+
+    def detach(self):
+        super().detach()
+        self._stack = list()
+
+    def _instrument(self, obj, name, label, batch=False, count=True):
+        label = label.replace(';', ',')
+
+        def enter(*args, **kwargs):
+            objects = 0
+            if count:
+                objects = Profiler._len(args[0]) if batch else 1
+
+            self._stack.append([label, time.perf_counter(), 0.0])
+            return objects
+
+        self._wrap(obj, name, enter, lambda objects, result, ex: self._leave(objects))
+
+    @staticmethod
+    def _len(iterable):
+        try:
+            return len(iterable)
+        except TypeError:
+            return 0
+
+    def _leave(self, objects):
+        elapsed = time.perf_counter() - self._stack[-1][1]
+        path = tuple(frame[0] for frame in self._stack)
+        label, start, children = self._stack.pop()
+
+        if path not in self.records:
+            self.records[path] = self.Record()
+        record = self.records[path]
+
+        record.calls      += 1
+        record.objects    += objects
+        record.cumulative += elapsed
+        record.own        += elapsed - children
+
+        if self._stack:
+            self._stack[-1][2] += elapsed
+
+    def summary(self):
+        """ Aggregates the records per operation/engine pair.
+
+        Returns:
+            list of dicts sorted by self time
+        """
+        pairs = dict()
+        for path, record in self.records.items():
+            operation = path[0] if len(path) > 1 else None
+            key = (operation, path[-1])
+            if key not in pairs:
+                pairs[key] = { 'operation'  : operation,
+                               'engine'     : path[-1] if operation is not None else None,
+                               'calls'      : 0,
+                               'objects'    : 0,
+                               'cumulative' : 0.0,
+                               'self'       : 0.0 }
+                if operation is None:
+                    pairs[key]['operation'] = path[-1]
+
+            entry = pairs[key]
+            entry['calls']   += record.calls
+            entry['objects'] += record.objects
+            entry['self']    += record.own
+            # do not count recursive calls twice
+            if path[-1] not in path[:-1]:
+                entry['cumulative'] += record.cumulative
+
+        return sorted(pairs.values(), key=lambda e: e['self'], reverse=True)
+
+    def print_stats(self, limit=20):
+        print('Profile (self time):')
+        for entry in self.summary()[:limit]:
+            print('%10.3fs %10.3fs %8d calls %8d objects  %s%s' % (entry['self'], entry['cumulative'],
+                  entry['calls'], entry['objects'], entry['operation'],
+                  ' -> %s' % entry['engine'] if entry['engine'] is not None else ''))
+
+    def write_json(self, filename):
+        with open(filename, 'w') as jsonfile:
+            json.dump(self.summary(), jsonfile, indent=2)
+
+    def write_folded(self, filename):
+        """ Writes the self times (in microseconds) in folded stack format.
+        """
+        with open(filename, 'w') as foldedfile:
+            for path, record in sorted(self.records.items()):
+                foldedfile.write('%s %d\n' % (';'.join(path), round(record.own * 1e6)))
+
+    def write(self):
+        if self.outpath is None:
+            return
+
+        self.write_json(self.outpath + 'profile.json')
+        self.write_folded(self.outpath + 'profile.folded')
+
+
+class Tracer(Instrumentation):
+    """ Records a timeline of a backtracking run as trace events.
+    """
+
+    def __init__(self, outpath=None, objects=True):
+        """
+        Args:
+            :param outpath: output path/prefix for the trace file written by :func:`write`
+            :type  outpath: str
+            :param objects: also record an event for every object processed by an operation
+            :type  objects: bool
+        """
+        super().__init__()
+        self.outpath  = outpath
+        self.objects  = objects
+        self.events   = list()
+        self._start   = time.perf_counter()
+        self._pending = None
+
+    def _now(self):
+        return (time.perf_counter() - self._start) * 1e6
+
+    def complete(self, name, cat, start, args=None):
+        event = { 'name' : name, 'cat' : cat, 'ph' : 'X', 'pid' : os.getpid(), 'tid' : 0,
+                  'ts' : start, 'dur' : self._now() - start }
+        if args:
+            event['args'] = args
+        self.events.append(event)
+
+    def instant(self, name, cat, args=None):
+        event = { 'name' : name, 'cat' : cat, 'ph' : 'i', 's' : 't', 'pid' : os.getpid(), 'tid' : 0,
+                  'ts' : self._now() }
+        if args:
+            event['args'] = args
+        self.events.append(event)
+
+    def attach(self, registry):
+        """ Instruments the iterations, steps, operations, decision graph and rollbacks of the registry.
+        """
+        def iteration(outpath):
+            return self._now(), 'iteration %d' % (registry.backtracking_try + 1)
+        self._wrap(registry, '_backtrack_execute', iteration,
+                   lambda token, result, ex: self.complete(token[1], 'iteration', token[0],
+                                                           { 'completed' : bool(result) }))
+
+        self._wrap(registry, 'find_culprit', lambda cns: self._now(),
+                   lambda start, culprit, ex: self.complete('find culprit', 'backtracking', start,
+                                                            { 'culprit' : str(culprit) }))
+
+        self._wrap(registry, 'invalidate_subtree', lambda node: (self._now(), str(node)),
+                   lambda token, result, ex: self.complete('rollback', 'backtracking', token[0],
+                                                           { 'culprit' : token[1] }))
+
+        for step in registry.steps:
+            label = self.step_label(step)
+            self._wrap(step, 'execute', lambda registry, label=label: (self._now(), label),
+                       lambda token, result, ex: self.complete(token[1], 'step', token[0]))
+
+            for op in step.operations:
+                self._instrument_operation(op)
+
+        if self.objects:
+            self._wrap(registry.decision_graph, 'start_tracking', self._start_object,
+                       lambda token, result, ex: None)
+            self._wrap(registry.decision_graph, 'stop_tracking', self._stop_object,
+                       lambda token, result, ex: None)
+
+    def _instrument_operation(self, op):
+        label = self.operation_label(op)
+
+        def leave(start, result, ex):
+            if isinstance(ex, ConstraintNotSatisfied):
+                self.instant('constraint not satisfied', 'backtracking', { 'node' : str(ex.node) })
+            self.complete(label, 'operation', start)
+
+        self._wrap(op, 'execute', lambda iterable: self._now(), leave)
+
+    def _start_object(self):
+        self._pending = self._now()
+
+    def _stop_object(self, layer, obj, operation, error=False, error_nodes=None):
+        if self._pending is None:
+            return
+
+        self.complete(str(obj), 'object', self._pending, { 'error' : True } if error else None)
+        self._pending = None
+
+    def write(self):
+        if self.outpath is None:
+            return
+
+        with open(self.outpath + 'trace.json', 'w') as jsonfile:
+            json.dump({ 'traceEvents' : self.events, 'displayTimeUnit' : 'ms' }, jsonfile)
@@ -14,20 +14,18 @@ except ImportError:
     from xml.etree import ElementTree as ET
 
 import logging
-import yaml
 
-from mcc.graph import GraphObj, Edge
+from mcc.graph import GraphObj, Edge, DeterministicHash
 from mcc.parser import XMLParser
 from mcc.framework import *
 from mcc.backtracking import BacktrackRegistry
 from mcc.importexport import PickleExporter
-
-from ortools.sat.python import cp_model
+from mcc.profiling import Profiler, Tracer
 
 
 class Repository(XMLParser):
 
-    class Callback:
+    class Callback(DeterministicHash):
         def __init__(self, cbtype, name, trigger, wcet, publishes, prio, wcrt, hid=None):
             self.cbtype    = cbtype
             self.name      = name
@@ -53,7 +51,7 @@ class Repository(XMLParser):
         def __repr__(self):
             return self.label()
 
-    class Handler:
+    class Handler(DeterministicHash):
         def __init__(self, etype, name, wcet, wcrt):
             self.etype = etype
             self.name  = name
@@ -88,7 +86,7 @@ class Repository(XMLParser):
             return hash(self.name)
 
 
-    class RosNode:
+    class RosNode(DeterministicHash):
         def __init__(self, xml_node, repo):
             self.repo = repo
             self.xml_node = xml_node
@@ -182,7 +180,7 @@ class Repository(XMLParser):
         return Repository.RosNode(node, self)
 
 
-class ChildQuery:
+class ChildQuery(DeterministicHash):
     def __init__(self, xml_node):
         self._root      = xml_node
 
@@ -227,7 +225,7 @@ class SystemParser:
     class NodeNotFoundError(Exception):
         pass
 
-    class Requirement:
+    class Requirement(DeterministicHash):
         class Event:
             def __init__(self, etype, topic):
                 self.etype = etype
@@ -384,7 +382,7 @@ class CallbackEngine(AnalysisEngine):
 
 class SegmentEngine(AnalysisEngine):
 
-    class Segment:
+    class Segment(DeterministicHash):
         def __init__(self, requirement=None, network=False):
             self.node = Layer.Node(self)
             self.requirement = requirement
@@ -644,10 +642,29 @@ class WcrtEngine(AnalysisEngine):
 
 
 class BudgetEngine(AnalysisEngine):
-    def __init__(self, layer):
+    def __init__(self, layer, workers=None, time_limit=None):
+        """
+        Args:
+            :param workers: number of parallel CP-SAT search workers (default: solver default)
+            :type  workers: int
+            :param time_limit: maximum solving time in seconds, the best feasible solution found
+                               within this time is accepted
+            :type  time_limit: float
+        """
         acl = { layer        : { 'reads' : {'wcrt', 'handler'}}}
         AnalysisEngine.__init__(self, layer, param='budget', acl=acl)
 
+        self.workers    = workers
+        self.time_limit = time_limit
+
+        # solve statistics (accumulated over all solves, status and slack refer to the last solve)
+        self.stats = { 'solves'    : 0,
+                       'status'    : None,
+                       'slack'     : None,
+                       'wall time' : 0.0,
+                       'branches'  : 0,
+                       'conflicts' : 0 }
+
     def batch_map(self, data):
         # segment wcrt + exception wcrt must be below overall latency requirement
         chains = dict()
@@ -663,6 +680,9 @@ class BudgetEngine(AnalysisEngine):
 
             chains[chain].add(obj)
 
+        # ortools is only imported when needed (slow import)
+        from ortools.sat.python import cp_model
+
         model = cp_model.CpModel()
         MAX_BUDGET = 1000000000
 
@@ -712,9 +732,34 @@ class BudgetEngine(AnalysisEngine):
         model.Maximize(slack)
 
         solver = cp_model.CpSolver()
+        if self.workers is not None:
+            solver.parameters.num_search_workers = self.workers
+        if self.time_limit is not None:
+            solver.parameters.max_time_in_seconds = self.time_limit
+
         status = solver.Solve(model)
 
-        if status == cp_model.OPTIMAL:
+        self.stats['solves']    += 1
+        self.stats['status']     = solver.StatusName(status)
+        self.stats['wall time'] += solver.WallTime()
+        self.stats['branches']  += solver.NumBranches()
+        self.stats['conflicts'] += solver.NumConflicts()
+
+        if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            self.stats['slack'] = None
+            # remark: data is left unchanged (as without a time limit)
+            logging.error("Budget calculation failed with status %s after %.3fs." \
+                          % (solver.StatusName(status), solver.WallTime()))
+
+        else:
+            self.stats['slack'] = solver.Value(slack)
+            if status == cp_model.FEASIBLE:
+                logging.warning("Budget calculation not proven optimal within %.3fs: slack %d (bound %d)." \
+                                % (solver.WallTime(), solver.Value(slack), solver.BestObjectiveBound()))
+            else:
+                logging.info("Budget calculation found optimal slack %d in %.3fs." \
+                             % (solver.Value(slack), solver.WallTime()))
+
             for obj in data.keys():
                 if obj not in budgets:
                     data[obj] = {0}
@@ -944,6 +989,7 @@ class ConfigEngine(AnalysisEngine):
             ecunodes[name]['executor_priority'] = max_prio
 
         # write yaml
+        import yaml
         with open('%sDEFAULT_MONITOR_CONFIG-%s.yaml' % (self.outpath, ecu), 'w') as file:
             yaml.dump(ecunodes, file)
 
@@ -1085,8 +1131,8 @@ class ConfigEngine(AnalysisEngine):
 class CrossLayerModel(BacktrackRegistry):
     """ Our cross-layer model.
     """
-    def __init__(self, repo):
-        super().__init__()
+    def __init__(self, repo, compact_params=False, seed=None):
+        super().__init__(compact_params=compact_params, seed=seed)
         self.add_layer(Layer('nodes',       nodetypes={Repository.RosNode}))
         self.add_layer(Layer('callbacks',   nodetypes={Repository.Callback}))
         self.add_layer(Layer('segments',    nodetypes={SegmentEngine.Segment}))
@@ -1129,10 +1175,21 @@ class CrossLayerModel(BacktrackRegistry):
         return node
 
 class MccBase:
-    def __init__(self, repo, ecus, chronologicaltracking=False):
+    def __init__(self, repo, ecus, chronologicaltracking=False, compact_params=False, snapshots=False,
+                 seed=None, profile=False, trace=False, budget_workers=None, budget_time_limit=None,
+                 indexed_tracking=False):
+        assert snapshots == False or chronologicaltracking
         self._repo = repo
         self._nonchronological = not chronologicaltracking
         self._ecus = ecus
+        self._compact_params = compact_params
+        self._snapshots = snapshots
+        self._seed = seed
+        self._profile = profile
+        self._trace = trace
+        self._budget_workers = budget_workers
+        self._budget_time_limit = budget_time_limit
+        self._indexed_tracking = indexed_tracking
 
     def _to_callbacks(self, model):
         source_layer = model.by_name['nodes']
@@ -1187,11 +1244,13 @@ class MccBase:
         model.add_step(step)
 
         # assign budgets
-        be = BudgetEngine(layer)
+        be = BudgetEngine(layer, workers=self._budget_workers, time_limit=self._budget_time_limit)
         step = NodeStep(BatchMap(be, 'calculate budgets'))
         step.add_operation(Assign(be, 'calculate budgets'))
         model.add_step(step)
 
+        model.register_stats('budget solver', be.stats)
+
     def _export_config(self, model, outpath):
         layer = model.by_name['segments']
         ce = ConfigEngine(model, self._ecus, outpath)
@@ -1205,7 +1264,7 @@ class MccBase:
         # check function/composite/component references, compatibility and routes in system and subsystems
 
         # 1) we create a new system model
-        model = CrossLayerModel(self._repo)
+        model = CrossLayerModel(self._repo, compact_params=self._compact_params, seed=self._seed)
 
         # 2) create system model from query
         model.from_query(query)
@@ -1226,7 +1285,11 @@ class MccBase:
             model.write_dot(outpath+'mcc.dot')
 
         try:
-            model.execute(outpath, nonchronological=self._nonchronological)
+            model.execute(outpath, nonchronological=self._nonchronological,
+                                   indexed_tracking=self._indexed_tracking,
+                                   snapshots=self._snapshots,
+                                   profiler=Profiler(outpath) if self._profile else None,
+                                   tracer=Tracer(outpath) if self._trace else None)
         except Exception as e:
             print(e)
             export = PickleExporter(model)
@@ -13,10 +13,107 @@ from mcc.framework import *
 from mcc.importexport import *
 
 import csv
-import random
 import math
 import time
 
+STATS_FIELDS = ['solution',
+                'time',
+                'iterations',
+                'total_variables',
+                'new_variables',
+                'combinations',
+                'combinations_left',
+                'complexity',
+                'operations',
+                'rolledback']
+
+
+def merge_stats(infiles, outpath):
+    """ Merges the solution statistics written by several explorations
+        (see :func:`SimulationEngine.write_stats`) into a single file.
+
+    Args:
+        :param infiles: input files (solutions are merged in this order)
+        :type  infiles: list of str
+        :param outpath: output file
+        :type  outpath: str
+
+    Returns:
+        number of merged solutions
+    """
+    solutions = list()
+    for infile in infiles:
+        with open(infile, 'r') as csvfile:
+            solutions.extend(csv.DictReader(csvfile, delimiter='\t'))
+
+    with open(outpath, 'w') as csvfile:
+        writer = csv.DictWriter(csvfile,
+                                delimiter='\t',
+                                fieldnames=STATS_FIELDS)
+
+        writer.writeheader()
+        i = 1
+        for s in solutions:
+            s['solution'] = i
+            writer.writerow(s)
+            i += 1
+
+    return len(solutions)
+
+
+class Partition:
+    """ Selects a share of the candidates of the first revisable decision so that
+        multiple processes can explore disjoint subspaces of the design space
+        (see :func:`mcc.backtracking.BacktrackRegistry.execute`).
+    """
+    def __init__(self, index, count):
+        """
+        Args:
+            :param index: index of this subspace
+            :type  index: int
+            :param count: total number of subspaces
+            :type  count: int
+        """
+        assert 0 <= index < count
+        self.index = index
+        self.count = count
+
+    def select(self, candidates):
+        """
+        Returns:
+            the share of the given candidates that belongs to this subspace
+        """
+        # candidates are sorted to get the same order in every process
+        # (set iteration order may differ between processes)
+        ordered = deterministic_order(candidates)
+        return set(ordered[self.index::self.count])
+
+    def engine(self, param, share):
+        """
+        Returns:
+            analysis engine that restricts the candidates of the given param to share
+        """
+        return PartitionEngine(param.layer, param.param, param.obj, share)
+
+    def __repr__(self):
+        return 'Partition %d/%d' % (self.index+1, self.count)
+
+
+class PartitionEngine(AnalysisEngine):
+    """ Restricts the candidates of a single param of a single object to the share selected by a :class:`Partition`.
+    """
+    def __init__(self, layer, param, obj, share):
+        super().__init__(layer, param)
+        self.obj   = obj
+        self.share = share
+
+    def map(self, obj, candidates):
+        if obj is not self.obj:
+            return None
+
+        return set(self.share)
+
+
 class SimulationEngine(AnalysisEngine):
     """ Base class. Implements bookkeeping of found solutions.
     """
@@ -39,19 +136,9 @@ class SimulationEngine(AnalysisEngine):
 
         if outpath:
             with open(outpath, 'w') as csvfile:
-                fieldnames = ['solution',
-                              'time',
-                              'iterations',
-                              'total_variables',
-                              'new_variables',
-                              'combinations',
-                              'combinations_left',
-                              'complexity',
-                              'operations',
-                              'rolledback']
                 writer = csv.DictWriter(csvfile,
                                         delimiter='\t',
-                                        fieldnames=fieldnames)
+                                        fieldnames=STATS_FIELDS)
 
                 writer.writeheader()
                 i = 1
@@ -205,8 +292,7 @@ class AdaptationSimulation(SimulationEngine):
             return False, 0
         else:
             # randomly select a task from taskgraph
-            task_set = list(tg.untracked_nodes())
-            culprit = random.choice(task_set)
+            culprit = self.random_choice(tg.untracked_nodes())
             task = culprit.untracked_obj()
 
             # increase WCET by factor
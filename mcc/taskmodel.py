@@ -9,7 +9,7 @@ Classes required for modelling task graphs.
 
 """
 
-from mcc.graph import Edge
+from mcc.graph import Edge, DeterministicHash
 
 class EventModel:
     pass
@@ -43,7 +43,7 @@ class OutEventModel(EventModel):
         return 'OutEventModel: %s' % self.name
 
 
-class Task:
+class Task(DeterministicHash):
     def __init__(self, name, wcet, bcet, thread=None):
         self.name = name
         self.wcet = wcet
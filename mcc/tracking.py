@@ -16,7 +16,85 @@ from  networkx.algorithms import shortest_paths
 
 from collections import deque
 
-class LinearGraph(DecisionGraph):
+class ParentIndexedGraph(DecisionGraph):
+    """ Base class for decision graphs that form a tree (or a chain).
+
+        Maintains a parent pointer for every node so that :func:`root_path` is
+        obtained in O(depth) by following the parent pointers instead of searching
+        the graph. As long as any node has multiple predecessors, the path is not
+        unique and :func:`root_path` falls back to a shortest path search.
+    """
+
+    def __init__(self):
+        self.parent = dict()   # node -> predecessor (None if no or multiple predecessors)
+        self.merges = 0        # number of nodes with multiple predecessors
+        super().__init__()
+
+    def add_node(self, layer, obj, operation):
+        node = super().add_node(layer, obj, operation)
+        if node not in self.parent:
+            self.parent[node] = None
+
+        return node
+
+    def remove_node(self, node):
+        if self.graph.in_degree(node) > 1:
+            self.merges -= 1
+        for s in self.graph.successors(node):
+            self._remove_predecessor(node, s)
+
+        super().remove_node(node)
+        del self.parent[node]
+
+    def add_edge(self, edge):
+        u, v = edge.source, edge.target
+        if self.graph.has_edge(u, v):
+            return super().add_edge(edge)
+
+        super().add_edge(edge)
+
+        degree = self.graph.in_degree(v)
+        if degree == 1:
+            self.parent[v] = u
+        else:
+            self.parent[v] = None
+            if degree == 2:
+                self.merges += 1
+
+        return edge
+
+    def remove_edge(self, edge):
+        self._remove_predecessor(edge.source, edge.target)
+        super().remove_edge(edge)
+
+    def _remove_predecessor(self, u, v):
+        """ Updates the parent of v before the edge (u,v) is removed.
+        """
+        remaining = [p for p in self.graph.predecessors(v) if p != u]
+        if len(remaining) == 1:
+            self.parent[v] = remaining[0]
+            # v had two predecessors
+            self.merges -= 1
+        else:
+            self.parent[v] = None
+
+    def root_path(self, u):
+        if self.merges:
+            return super().root_path(u)
+
+        path = [u]
+        p = self.parent[u]
+        while p is not None:
+            path.append(p)
+            p = self.parent[p]
+
+        assert path[-1] == self.root, "No path found between %s and %s" % (self.root, u)
+
+        path.reverse()
+        return path
+
+
+class LinearGraph(ParentIndexedGraph):
     """ Discards dependencies and pushes each operation to a stack to implement
         chronological backtracking.
     """
@@ -26,8 +104,8 @@ class LinearGraph(DecisionGraph):
         self.latest = self.root
 
     def add_dependencies(self, node, read, written, force_sequential, extra=None):
-        if extra is not None:
-            raise NotImplementedError
+        # remark: extra dependencies are always predecessors in the chain
+        assert extra is None or all(n in self.nodes() for n in extra)
 
         for p in written:
             if p not in self.param_store:
@@ -50,15 +128,194 @@ class LinearGraph(DecisionGraph):
         return {self.latest}
 
 
+class ReachabilityIndex:
+    """ Incrementally maintained reachability relation of a DAG.
+
+    Every node is assigned a bit position. For every node, the sets of its
+    descendants and ancestors are stored as integer bitsets. Inserting an edge
+    updates the affected rows; removing an edge or node only recomputes the rows
+    of the nodes whose reachability may have changed. Bit positions of removed
+    nodes are reused.
+    """
+
+    def __init__(self):
+        self.ids   = dict()   # node -> bit position
+        self.nodes = list()   # bit position -> node
+        self.free  = list()   # unused bit positions
+        self.desc  = dict()   # node -> bitset of descendants
+        self.anc   = dict()   # node -> bitset of ancestors
+
+    def bit(self, node):
+        return 1 << self.ids[node]
+
+    def decode(self, bits):
+        """ Returns the set of nodes in the given bitset.
+        """
+        result = set()
+        while bits:
+            low = bits & -bits
+            node = self.nodes[low.bit_length()-1]
+            if node is not None:
+                result.add(node)
+            bits ^= low
+
+        return result
+
+    def bits(self, nodes):
+        result = 0
+        for n in nodes:
+            result |= 1 << self.ids[n]
+
+        return result
+
+    def reaches(self, u, v):
+        """ Returns True if there is a (non-empty) path from u to v.
+        """
+        return bool(self.desc[u] & self.bit(v))
+
+    def ancestors(self, node):
+        return self.decode(self.anc[node])
+
+    def descendants(self, node):
+        return self.decode(self.desc[node])
+
+    def add_node(self, node):
+        if node in self.ids:
+            # equal node is already present (see DecisionGraph.Node.__eq__)
+            return
+
+        if self.free:
+            i = self.free.pop()
+            self.nodes[i] = node
+        else:
+            i = len(self.nodes)
+            self.nodes.append(node)
+
+        self.ids[node]  = i
+        self.desc[node] = 0
+        self.anc[node]  = 0
+
+    def add_edge(self, u, v):
+        """ Updates the index after inserting the edge (u,v).
+
+        Returns:
+            bitset of the nodes whose incoming edges may have become redundant.
+        """
+        bv = self.bit(v)
+        if self.desc[u] & bv:
+            # reachability does not change, but edge is redundant
+            return bv
+
+        D = self.desc[v] | bv
+        A = self.anc[u]  | self.bit(u)
+        for a in self.decode(A):
+            self.desc[a] |= D
+        for d in self.decode(D):
+            self.anc[d]  |= A
+
+        return D
+
+    def remove_edge(self, u, v, graph):
+        """ Updates the index after the edge (u,v) has been removed from graph.
+        """
+        bv = self.bit(v)
+
+        # nothing changes if u still reaches v via another path
+        for s in graph.successors(u):
+            if s is v or (self.desc[s] & bv):
+                return
+
+        self._recompute_desc(self.anc[u] | self.bit(u), graph)
+        self._recompute_anc(self.desc[v] | bv, graph)
+
+    def remove_node(self, node, graph):
+        """ Updates the index after node has been removed from graph.
+        """
+        b = self.bit(node)
+        A = self.anc[node]
+        D = self.desc[node]
+
+        del self.desc[node]
+        del self.anc[node]
+        i = self.ids.pop(node)
+        self.nodes[i] = None
+        self.free.append(i)
+
+        if not D:
+            # sink node (e.g. when rolling back): no path passes through node
+            for a in self.decode(A):
+                self.desc[a] &= ~b
+        elif not A:
+            # source node: no path passes through node
+            for d in self.decode(D):
+                self.anc[d] &= ~b
+        else:
+            self._recompute_desc(A, graph)
+            self._recompute_anc(D, graph)
+
+    def _recompute_desc(self, bits, graph):
+        # a node has strictly more descendants than any of its successors, hence
+        # processing in ascending order of descendants visits successors first
+        for n in sorted(self.decode(bits), key=lambda x: bin(self.desc[x]).count('1')):
+            desc = 0
+            for s in graph.successors(n):
+                desc |= self.desc[s] | self.bit(s)
+            self.desc[n] = desc
+
+    def _recompute_anc(self, bits, graph):
+        for n in sorted(self.decode(bits), key=lambda x: bin(self.anc[x]).count('1')):
+            anc = 0
+            for p in graph.predecessors(n):
+                anc |= self.anc[p] | self.bit(p)
+            self.anc[n] = anc
+
+
 class TopologicalGraph(DecisionGraph):
     """ Stores dependencies between decisions as graph which is
         sequentialising on demand by performing topological sort
         on the relevant subgraph.
+
+        Reachability is maintained incrementally by a :class:`ReachabilityIndex`
+        so that the transitive reduction can be restored without rebuilding the graph.
     """
 
     def __init__(self):
+        self.reachability = ReachabilityIndex()
+        # bitset of nodes whose incoming edges must be reduced
+        self.dirty = 0
         super().__init__()
-        self.pm_cached = None
+
+    def add_node(self, layer, obj, operation):
+        node = super().add_node(layer, obj, operation)
+        self.reachability.add_node(node)
+
+        return node
+
+    def remove_node(self, node):
+        super().remove_node(node)
+        self.reachability.remove_node(node, self.graph)
+
+    def add_edge(self, edge):
+        super().add_edge(edge)
+        self.dirty |= self.reachability.add_edge(edge.source, edge.target)
+
+        return edge
+
+    def remove_edge(self, edge):
+        super().remove_edge(edge)
+        self.reachability.remove_edge(edge.source, edge.target, self.graph)
+
+    def predecessors(self, node, recursive=False):
+        if recursive:
+            return self.reachability.ancestors(node)
+
+        return super().predecessors(node)
+
+    def successors(self, node, recursive=False):
+        if recursive:
+            return self.reachability.descendants(node)
+
+        return super().successors(node)
 
     def sort(self, node, calculate_ranks=False):
         """ execute topological sort for ordering
@@ -69,8 +326,6 @@ class TopologicalGraph(DecisionGraph):
             do not need to be rolled back. Actual decisions should come later.
         """
 
-        self.pm_cached = None
-
         nodes = self.predecessors(node, recursive=True) | {node}
         subgraph = self.graph.subgraph(nodes)
 
@@ -120,79 +375,53 @@ class TopologicalGraph(DecisionGraph):
         order = list(dag.lexicographical_topological_sort(subgraph,
                                                           key=None))
         for u,v in zip(order,order[1:]):
-            for e in set(self.in_edges(v)):
-                self.remove_edge(e)
+            # The sequentialised subgraph preserves all existing paths, hence
+            # we can skip the index update when removing edges.
+            self.graph.remove_edges_from(list(self.graph.in_edges(v)))
 
             self.create_edge(u,v)
 
-    def path_matrix(self):
-
-        if self.pm_cached is None:
-            self.pm_cached = dict()
-
-            # initialise with adjacency matrix
-            for u, nbrsdict in self.graph.adjacency():
-                self.pm_cached[u] = dict()
-                for v in self.nodes():
-                    self.pm_cached[u][v] = 0
-                for v in nbrsdict.keys():
-                    self.pm_cached[u][v] = 1
-
-            for u in self.nodes():
-                for v in self.nodes():
-                    if u == v:
-                        continue
-                    if self.pm_cached[v][u]:
-                        for i in self.nodes():
-                            if self.pm_cached[v][i] == 0:
-                                self.pm_cached[v][i] = self.pm_cached[u][i]
-
-        return self.pm_cached
-
-    def update_path_matrix(self, n, adj):
-        pm = self.path_matrix()
-
-        # initialise new row/column with zeros
-        pm[n] = dict()
-        for u in self.nodes():
-            pm[n][u] = 0
-            pm[u][n] = 0
+    def reduce(self, writers):
+        """ Returns the writers that are not predecessors of any other writer.
+        """
+        index = self.reachability
+        wbits = index.bits(writers)
 
-        # add adjacency
-        for v in adj:
-            pm[v][n] = 1
+        return {u for u in writers if not index.desc[u] & wbits}
 
-            # add path information
-            for u in self.nodes():
-                if pm[u][v]:
-                    pm[u][n] = 1
+    def reduceall(self):
+        """ Restores the transitive reduction.
 
+        Only the incoming edges of nodes that may have received a redundant
+        edge since the last call are checked.
+        """
+        index = self.reachability
+        for v in index.decode(self.dirty):
+            preds = list(self.graph.predecessors(v))
+            if len(preds) < 2:
+                continue
 
-    def reduce(self, writers):
-        pm = self.path_matrix()
-        blacklist = set()
-        for u in writers:
-            for v in writers - {u}:
-                if pm[u][v] == 1:
-                    blacklist.add(u)
-                    break
+            # (u,v) is redundant if u is an ancestor of another predecessor of v
+            reachable = 0
+            for u in preds:
+                reachable |= index.anc[u]
 
-        return writers - blacklist
+            for u in preds:
+                if reachable & index.bit(u):
+                    self.graph.remove_edge(u,v)
 
-    def reduceall(self):
-        TR = dag.transitive_reduction(self.graph)
+        self.dirty = 0
 
-        for u, nbrsdict in self.graph.adjacency():
-            # remove all edges
-            for v in set(nbrsdict.keys()):
-                self.graph.remove_edge(u,v)
-            # re-add from TR
-            for v in TR.successors(u):
-                self.graph.add_edge(u,v)
+    def _transform_writers(self, node, written):
+        """ Returns the other Transform operations that wrote any of the written params.
+        """
+        result = set()
+        if isinstance(node.operation, Transform):
+            # if there are already writers (only possible if Transform), remember them for later check
+            for p in written:
+                result.update(self.param_store[p].transform - {node})
 
-    def remove(self, node):
-        super().remove(node)
-        self.pm_cached = None
+        return result
 
     def add_dependencies(self, node, read, written, force_sequential, extra=None):
         writers = self._raw_dependencies(node, read, written)
@@ -200,45 +429,16 @@ class TopologicalGraph(DecisionGraph):
             assert isinstance(extra, set)
             writers.update(extra)
 
-        old_transforms = dict()
-        for p in written:
-            if isinstance(node.operation, Transform):
-                # if there are already writers (only possible if Transform), remember them for later check
-                old_transforms[p] = self.param_store[p].transform - {node}
-
         # add old writers as dependencies
-        for p,trafos in old_transforms.items():
-            writers.update(trafos)
+        writers.update(self._transform_writers(node, written))
 
         # return early if there are no dependencies
         if not writers:
             if written:
                 self.create_edge(self.root, node)
 
-#            self.update_path_matrix(node, set())
             return
 
-#        PATH-MATRIX IMPLEMENTATION
-#        dependencies = self.reduce(writers)
-#        self.update_path_matrix(node, dependencies)
-
-#        if __debug__:
-#            blacklist = set()
-#            for w in writers:
-#                if self.successors(w, recursive=True) & writers:
-#                    blacklist.add(w)
-#
-#            assert len(dependencies) == len(writers-blacklist)
-#            for d in writers-blacklist:
-#                assert d in dependencies
-
-#        TRIVIAL IMPLEMENTATION
-#        blacklist = set()
-#        for w in writers:
-#            if self.successors(w, recursive=True) & writers:
-#                blacklist.add(w)
-#        dependencies = writers - blacklist
-
         dependencies = writers
         assert dependencies
 
@@ -260,7 +460,7 @@ class TopologicalGraph(DecisionGraph):
                 self.write_dot('/tmp/toposort_post.dot', reshape=subgraph, highlight={node})
 
 
-class DecisionTree(DecisionGraph):
+class DecisionTree(ParentIndexedGraph):
     """ Stores dependencies between decisions as a tree.
     """
 
@@ -460,3 +660,161 @@ class DecisionTree(DecisionGraph):
                 for e in self.in_edges(r):
                     self.remove_edge(e)
                     self.create_edge(node, r)
+
+
+class IndexedTracking:
+    """ Mixin for :class:`DecisionGraph` implementations that identifies params by
+        dense numbers instead of :class:`DecisionGraph.Param` objects.
+
+        Every param (layer, object, param name) is assigned a number on first access.
+        Tracking a read or write access thus neither allocates a Param object nor
+        hashes it, and the writers of a param are stored in a list indexed by its number.
+        The read and written params of every node are stored as sets of numbers;
+        :func:`read_params` and :func:`written_params` map them back to Param objects.
+        Moreover, nodes cache their hash as they are looked up in the graph on every access.
+    """
+
+    class Node(DecisionGraph.Node):
+        """ :class:`DecisionGraph.Node` with an identity shortcut for comparisons.
+        """
+        def __eq__(self, rhs):
+            return self is rhs or DecisionGraph.Node.__eq__(self, rhs)
+
+        # remark: defining __eq__ resets the inherited __hash__
+        __hash__ = DecisionGraph.Node.__hash__
+
+    def __init__(self):
+        self.param_ids  = dict()   # (layer, obj, param) -> number
+        self.param_objs = list()   # number -> DecisionGraph.Param
+        self.writers    = list()   # number -> DecisionGraph.Writers or None
+        super().__init__()
+
+    def param_id(self, layer, obj, param):
+        key = (layer, obj, param)
+        i = self.param_ids.get(key)
+        if i is None:
+            i = len(self.param_objs)
+            self.param_ids[key] = i
+            self.param_objs.append(self.Param(layer, obj, param))
+            self.writers.append(None)
+
+        return i
+
+    def decode_params(self, ids):
+        """ Returns the set of :class:`DecisionGraph.Param` for the given param numbers.
+        """
+        objs = self.param_objs
+        return {objs[i] for i in ids}
+
+    def read_params(self, node):
+        return self.decode_params(self.node_attributes(node)['read'])
+
+    def written_params(self, node):
+        # written params are only modified by _register(), hence we cache the decoded set
+        attributes = self.node_attributes(node)
+        params = attributes['written_params']
+        if params is None:
+            params = self.decode_params(attributes['written'])
+            attributes['written_params'] = params
+
+        return params
+
+    def add_node(self, layer, obj, operation):
+        node = super().add_node(layer, obj, operation)
+        attributes = self.node_attributes(node)
+        attributes['written_params'] = None
+
+        return node
+
+    def track_read(self, layer, obj, param):
+        self.read.add(self.param_id(layer, obj, param))
+
+    def track_written(self, layer, obj, param):
+        self.written.add(self.param_id(layer, obj, param))
+
+    def check_tracking(self):
+        assert not self.written, "check operation has written params: %s" % self.decode_params(self.written)
+
+    def find_writers(self, layer, obj, param):
+        i = self.param_ids.get((layer, obj, param))
+        if i is None or self.writers[i] is None:
+            return self.Writers()
+
+        return self.writers[i]
+
+    def _register(self, node, written):
+        for i in written:
+            w = self.writers[i]
+            if w is None:
+                w = self.Writers()
+                self.writers[i] = w
+
+            w.register(node)
+
+        attributes = self.node_attributes(node)
+        attributes['written'].update(written)
+        attributes['written_params'] = None
+
+    def _raw_dependencies(self, node, read, written):
+        read_ids = self.node_attributes(node)['read']
+
+        writers = set()
+        for i in read:
+            tmp = self.writers[i]
+            if tmp is not None:
+                read_ids.add(i)
+                writers.update(tmp.all())
+            else:
+                logging.debug("no writer for read dependency %s from %s" % (self.param_objs[i], node))
+
+        # if node.operation is assign, add connection to map operation
+        if isinstance(node.operation, Assign):
+            assert len(written) == 1 or isinstance(node.operation, BatchAssign)
+            for i in written:
+                tmp = self.writers[i]
+                assert tmp is not None and tmp.map is not None, \
+                       "Cannot find map operation for %s" % self.param_objs[i]
+                writers.add(tmp.map)
+
+        self._register(node, written)
+
+        return writers
+
+    def _transform_writers(self, node, written):
+        result = set()
+        if isinstance(node.operation, Transform):
+            for i in written:
+                result.update(self.writers[i].transform - {node})
+
+        return result
+
+    def remove(self, node):
+        for i in self.node_attributes(node)['written']:
+            w = self.writers[i]
+            w.deregister(node)
+
+            if w.empty():
+                self.writers[i] = None
+
+        self.remove_node(node)
+
+
+class IndexedLinearGraph(IndexedTracking, LinearGraph):
+    """ :class:`LinearGraph` with indexed param tracking.
+    """
+
+    def add_dependencies(self, node, read, written, force_sequential, extra=None):
+        # remark: extra dependencies are always predecessors in the chain
+        assert extra is None or all(n in self.nodes() for n in extra)
+
+        self._register(node, written)
+
+        assert self.latest in self.nodes()
+        self.create_edge(self.latest, node)
+        self.latest = node
+
+
+class IndexedTopologicalGraph(IndexedTracking, TopologicalGraph):
+    """ :class:`TopologicalGraph` with indexed param tracking.
+    """
+    pass
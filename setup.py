@@ -13,7 +13,7 @@ setup(
     author_email='schlatow@ida.ing.tu-bs.de',
     description='Multi-Change Controller',
 
-    install_requires=['xdot', 'networkx', 'ortools'],
+    install_requires=['xdot', 'networkx', 'ortools', 'numpy'],
 
     py_modules=['mcc'],
 )
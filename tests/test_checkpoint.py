@@ -0,0 +1,171 @@
+"""
+Description
+-----------
+
+Tests the undo journal of :mod:`mcc.checkpoint`.
+
+:Authors:
+    - Johannes Schlatow
+
+"""
+
+import io
+import logging
+import unittest
+import contextlib
+
+from mcc.framework import Registry, Layer
+from mcc.checkpoint import Journal
+from mcc.graph import Edge
+
+from benchmarks import synthetic
+
+
+class Item:
+    def __init__(self, i):
+        self.i = i
+
+    def __repr__(self):
+        return 'item%d' % self.i
+
+
+class JournalTest(unittest.TestCase):
+
+    compact = False
+
+    def setUp(self):
+        registry = Registry(compact_params=self.compact)
+        self.layer = Layer('layer')
+        self.other = Layer('other')
+        registry.add_layer(self.layer)
+        registry.add_layer(self.other)
+
+        self.a = self.layer._add_node(Layer.Node(Item(0)))
+        self.b = self.layer._add_node(Layer.Node(Item(1)))
+        self.edge = self.layer._add_edge(Edge(self.a, self.b))
+
+        self.layer.untracked_set_param_candidates('colour', self.a, {0, 1, 2})
+        self.layer.untracked_set_param_value('colour', self.a, 0)
+        self.layer.untracked_set_param_value('weight', self.edge, 3)
+        self.layer._set_associated_objects('other', self.a, {'x'})
+
+        self.journal = Journal()
+        self.journal.attach([self.layer, self.other])
+
+    def checkpoint(self, node):
+        self.journal.start_operation()
+        self.journal.checkpoint(node)
+
+    def state(self):
+        layer = self.layer
+        params = dict()
+        for obj in list(layer.graph.nodes()) + list(layer.graph.edges()):
+            for param in ['colour', 'weight']:
+                isset = layer.untracked_isset_param_value(param, obj)
+                params[(obj, param)] = (isset,
+                                        layer.untracked_get_param_value(param, obj) if isset else None,
+                                        frozenset(layer.untracked_get_param_candidates(param, obj)))
+
+        interlayer = { n : frozenset(layer.associated_objects('other', n)) for n in layer.graph.nodes() }
+
+        return (frozenset(layer.graph.nodes()), frozenset(layer.graph.edges()), params, interlayer)
+
+    def test_restore_params(self):
+        before = self.state()
+        self.checkpoint('n1')
+
+        self.layer.untracked_set_param_value('colour', self.a, 2)
+        self.layer.untracked_set_param_candidates('colour', self.a, {2})
+        self.layer.untracked_set_param_value('colour', self.b, 1)
+        self.layer.untracked_clear_param_value('weight', self.edge)
+        self.assertNotEqual(self.state(), before)
+
+        self.journal.restore('n1')
+        self.assertEqual(self.state(), before)
+        self.assertEqual(self.layer.untracked_get_param_value('colour', self.a).data, 0)
+        self.assertFalse(self.layer.untracked_isset_param_value('colour', self.b))
+
+    def test_restore_graph(self):
+        before = self.state()
+        self.checkpoint('n1')
+
+        c = self.layer._add_node(Layer.Node(Item(2)))
+        self.layer.untracked_set_param_value('colour', c, 1)
+        self.layer.create_edge(self.b, c)
+        self.layer.remove_node(self.a)
+        self.assertNotIn(self.edge, self.layer.graph.edges())
+
+        self.journal.restore('n1')
+        self.assertEqual(self.state(), before)
+
+        # the removed node gets back its edges and params, the added node is forgotten
+        self.assertIn(self.edge, self.layer.graph.edges())
+        self.assertEqual(self.layer.untracked_get_param_value('weight', self.edge).data, 3)
+        self.assertNotIn(c, self.layer.graph.nodes())
+
+    def test_restore_interlayer(self):
+        before = self.state()
+        self.checkpoint('n1')
+
+        self.layer._set_associated_objects('other', self.a, {'y'})
+        self.layer._set_associated_objects('other', self.b, {'z'})
+
+        self.journal.restore('n1')
+        self.assertEqual(self.state(), before)
+        self.assertEqual(self.layer.associated_objects('other', self.b), set())
+
+    def test_nested_checkpoints(self):
+        first = self.state()
+        self.checkpoint('n1')
+        self.layer.untracked_set_param_value('colour', self.a, 1)
+
+        second = self.state()
+        self.checkpoint('n2')
+        self.layer.untracked_set_param_value('colour', self.a, 2)
+        self.layer._add_node(Layer.Node(Item(2)))
+
+        self.journal.restore('n2')
+        self.assertEqual(self.state(), second)
+
+        self.journal.restore('n1')
+        self.assertEqual(self.state(), first)
+        self.assertEqual(self.journal.stats['restores'], 2)
+
+    def test_detach(self):
+        self.journal.detach([self.layer, self.other])
+        self.layer.untracked_set_param_value('colour', self.a, 1)
+        self.assertEqual(self.journal.entries, [])
+
+
+class CompactJournalTest(JournalTest):
+
+    compact = True
+
+
+class SnapshotTest(unittest.TestCase):
+
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
+
+    def solve(self, snapshots, seed):
+        model = synthetic.ColouringModel(6, 8, colours=3, seed=seed, copies=0)
+        with contextlib.redirect_stdout(io.StringIO()):
+            model.execute(nonchronological=False, snapshots=snapshots)
+
+        layer = model.by_name['vars']
+        colours = { str(n) : layer.untracked_get_param_value('colour', n).data for n in layer.graph.nodes() }
+        return colours, model.stats['iterations'], model.stats['rolled-back operations']
+
+    def test_same_search(self):
+        # restoring checkpoints must result in the same search as rolling back operations
+        for seed in range(2):
+            colours, iterations, rolledback = self.solve(False, seed)
+            self.assertGreater(iterations, 1)
+            self.assertEqual(self.solve(True, seed)[:2], (colours, iterations))
+
+
+if __name__ == '__main__':
+    unittest.main()
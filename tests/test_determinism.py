@@ -0,0 +1,80 @@
+"""
+Description
+-----------
+
+Tests that the random decisions only depend on the seed (see
+:func:`mcc.framework.deterministic_order` and :class:`mcc.graph.DeterministicHash`).
+
+:Authors:
+    - Johannes Schlatow
+
+"""
+
+import os
+import sys
+import random
+import unittest
+import subprocess
+
+from types import SimpleNamespace
+
+from mcc.framework import Layer, AnalysisEngine, deterministic_order
+from mcc.parser import Repository
+
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+SOLVE = """
+import io, logging, contextlib
+logging.disable(logging.CRITICAL)
+from benchmarks import synthetic
+
+model = synthetic.ColouringModel(6, 8, colours=3, seed=1, copies=1)
+with contextlib.redirect_stdout(io.StringIO()):
+    model.execute()
+
+layer = model.by_name['copy0']
+print(model.stats['iterations'], model.stats['rolled-back operations'])
+print([(str(n), layer.untracked_get_param_value('colour', n).data) for n in layer.graph.nodes()])
+print([str(n) for n in set(layer.graph.nodes())])
+"""
+
+
+class DeterministicOrderTest(unittest.TestCase):
+
+    def test_ties(self):
+        # equal representations are ordered by creation
+        a = Layer.Node('x')
+        b = Layer.Node('x')
+        self.assertEqual(deterministic_order({b, a}), [a, b])
+        self.assertEqual(deterministic_order([b, a]), [a, b])
+
+    def test_random_choice(self):
+        candidates = [Layer.Node('x') for i in range(5)]
+
+        choices = set()
+        for ordered in (candidates, list(reversed(candidates))):
+            ae = AnalysisEngine(Layer('layer'), 'param')
+            ae.rng = random.Random(42)
+            choices.add(ae.random_choice(ordered))
+
+        self.assertEqual(len(choices), 1)
+
+    def test_pattern_repr(self):
+        component = SimpleNamespace(repo=None, label=lambda: 'comp')
+        pattern = Repository.ComponentPattern(component, None)
+        self.assertEqual(repr(pattern), 'comp')
+
+    def test_processes(self):
+        # the same seed results in the same search in different processes
+        env = dict(os.environ, PYTHONPATH=ROOT, PYTHONHASHSEED='0')
+        outputs = [subprocess.run([sys.executable, '-c', SOLVE], cwd=ROOT, env=env,
+                                  capture_output=True, text=True, check=True).stdout
+                   for i in range(2)]
+
+        self.assertTrue(outputs[0])
+        self.assertEqual(outputs[0], outputs[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
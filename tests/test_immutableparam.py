@@ -0,0 +1,93 @@
+"""
+Description
+-----------
+
+Tests interning, pickling and copying of :class:`mcc.framework.ImmutableParam`.
+
+:Authors:
+    - Johannes Schlatow
+
+"""
+
+import copy
+import pickle
+import unittest
+
+from mcc.framework import ImmutableParam
+
+
+class Item:
+    def __init__(self, i):
+        self.i = i
+
+
+class ImmutableParamTest(unittest.TestCase):
+
+    def test_interning(self):
+        self.assertIs(ImmutableParam('a'), ImmutableParam('a'))
+        self.assertIs(ImmutableParam(3), ImmutableParam(3))
+        self.assertIs(ImmutableParam(None), ImmutableParam(None))
+
+        item = Item(0)
+        self.assertIs(ImmutableParam(item), ImmutableParam(item))
+        self.assertIsNot(ImmutableParam(item), ImmutableParam(Item(0)))
+
+        # int and bool compare equal but must not share a wrapper
+        self.assertIsNot(ImmutableParam(1), ImmutableParam(True))
+        self.assertIs(ImmutableParam(True).data, True)
+
+    def test_not_interned(self):
+        # containers are compared by value and thus not interned
+        self.assertEqual(ImmutableParam((1, 2)), ImmutableParam((1, 2)))
+        self.assertIsNot(ImmutableParam([1]), ImmutableParam([1]))
+
+    def test_immutable(self):
+        param = ImmutableParam('a')
+        with self.assertRaises(Exception):
+            param.data = 'b'
+
+        self.assertEqual(ImmutableParam('a').data, 'a')
+
+    def test_pickle(self):
+        item   = Item(0)
+        params = [ImmutableParam('a'), ImmutableParam('b'), ImmutableParam(None), ImmutableParam(item)]
+
+        result = pickle.loads(pickle.dumps(params))
+        self.assertEqual([p.data for p in result[:3]], ['a', 'b', None])
+        for p, q in zip(result[:3], params):
+            self.assertIs(p, q)
+
+        # objects are copied by pickle and thus wrapped by a new param
+        self.assertIsNot(result[3].data, item)
+        self.assertEqual(result[3].data.i, item.i)
+        self.assertIs(result[3], ImmutableParam(result[3].data))
+
+        self.assertIsNone(ImmutableParam(None).data)
+        self.assertEqual(ImmutableParam('a').data, 'a')
+
+    def test_copy(self):
+        item = Item(0)
+        self.assertIs(copy.copy(ImmutableParam('zz')), ImmutableParam('zz'))
+        self.assertIs(copy.deepcopy(ImmutableParam('zz')), ImmutableParam('zz'))
+        self.assertIs(copy.copy(ImmutableParam(item)), ImmutableParam(item))
+
+        copied = copy.deepcopy(ImmutableParam(item))
+        self.assertIsNot(copied.data, item)
+
+        self.assertIsNone(ImmutableParam(None).data)
+        self.assertEqual(ImmutableParam('zz').data, 'zz')
+
+    def test_old_pickle_state(self):
+        # wrappers created without data are not interned and get their data from __setstate__
+        param = ImmutableParam.__new__(ImmutableParam)
+        param.__setstate__({'data' : 'x'})
+        self.assertEqual(param.data, 'x')
+        self.assertIsNot(param, ImmutableParam('x'))
+        self.assertIsNone(ImmutableParam(None).data)
+
+        with self.assertRaises(AssertionError):
+            ImmutableParam('x').__setstate__('y')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+"""
+Description
+-----------
+
+Tests the learned nogoods (see :class:`mcc.framework.DecisionGraph.Nogoods`).
+
+:Authors:
+    - Johannes Schlatow
+
+"""
+
+import io
+import logging
+import unittest
+import contextlib
+
+from mcc.framework import Registry, Layer, DecisionGraph
+
+from benchmarks import synthetic
+
+
+class Item:
+    def __init__(self, i):
+        self.i = i
+
+    def __repr__(self):
+        return 'item%d' % self.i
+
+
+class NogoodsTest(unittest.TestCase):
+
+    def setUp(self):
+        registry = Registry()
+        self.layer = Layer('layer')
+        registry.add_layer(self.layer)
+
+        self.nodes = [self.layer._add_node(Layer.Node(Item(i))) for i in range(3)]
+        for i, n in enumerate(self.nodes):
+            self.layer.untracked_set_param_value('colour', n, i)
+
+        self.a, self.b, self.c = [DecisionGraph.Param(self.layer, n, 'colour') for n in self.nodes]
+        self.nogoods = DecisionGraph.Nogoods(10)
+
+    def clear(self, p):
+        self.layer.untracked_clear_param_value(p.param, p.obj)
+
+    def set(self, p, value):
+        self.layer.untracked_set_param_value(p.param, p.obj, value)
+
+    def test_bad_values(self):
+        self.assertTrue(self.nogoods.learn({self.a, self.b}))
+
+        # b=1 completes the nogood as long as a=0
+        self.clear(self.b)
+        self.assertEqual(self.nogoods.bad_values(self.b), { 1 : {self.a} })
+        self.assertEqual(self.nogoods.bad_values(self.c), dict())
+
+        self.set(self.a, 2)
+        self.assertEqual(self.nogoods.bad_values(self.b), dict())
+
+    def test_incomplete(self):
+        self.assertTrue(self.nogoods.learn({self.a, self.b, self.c}))
+
+        # two params differ from the nogood
+        self.clear(self.b)
+        self.clear(self.c)
+        self.assertEqual(self.nogoods.bad_values(self.b), dict())
+
+    def test_unset_param(self):
+        self.clear(self.b)
+        self.assertFalse(self.nogoods.learn({self.a, self.b}))
+        self.assertFalse(self.nogoods.learn(set()))
+        self.assertEqual(self.nogoods.stats['learned'], 0)
+
+    def test_removed_object(self):
+        self.assertTrue(self.nogoods.learn({self.a, self.b}))
+
+        self.clear(self.b)
+        self.layer.remove_node(self.nodes[0])
+        self.assertEqual(self.nogoods.bad_values(self.b), dict())
+
+    def test_subsumed(self):
+        self.assertTrue(self.nogoods.learn({self.a, self.b}))
+        self.assertFalse(self.nogoods.learn({self.a, self.b, self.c}))
+
+        # a smaller nogood replaces its supersets
+        self.assertTrue(self.nogoods.learn({self.a}))
+        self.assertEqual(list(self.nogoods.nogoods), [frozenset({(self.a, 0)})])
+        self.assertEqual(self.nogoods.stats['subsumed'], 2)
+
+    def test_eviction(self):
+        nogoods = DecisionGraph.Nogoods(1)
+        self.assertTrue(nogoods.learn({self.a, self.b}))
+        self.assertTrue(nogoods.learn({self.b, self.c}))
+
+        self.assertEqual(len(nogoods.nogoods), 1)
+        self.assertEqual(nogoods.stats['evictions'], 1)
+        self.assertNotIn(self.a, nogoods.by_param)
+        self.assertEqual(set(nogoods.related[self.b]), {self.b, self.c})
+
+        self.clear(self.b)
+        self.assertEqual(nogoods.bad_values(self.b), { 1 : {self.c} })
+
+
+class SearchTest(unittest.TestCase):
+
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
+
+    def test_valid_colouring(self):
+        learned = 0
+        for seed in range(3):
+            for batch_check in [False, True]:
+                model = synthetic.ColouringModel(6, 8, colours=3, seed=seed,
+                                                 batch_check=batch_check, culprits=batch_check)
+                with contextlib.redirect_stdout(io.StringIO()):
+                    model.execute(nonchronological=True, nogoods=10)
+
+                layer = model.by_name['vars']
+                for e in layer.graph.edges():
+                    self.assertNotEqual(layer.untracked_get_param_value('colour', e.source),
+                                        layer.untracked_get_param_value('colour', e.target))
+
+                learned += model.stats['nogoods']['learned']
+
+        self.assertGreater(learned, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+"""
+Description
+-----------
+
+Tests the partitioning of the design space (see :class:`mcc.simulation.Partition`).
+
+:Authors:
+    - Johannes Schlatow
+
+"""
+
+import io
+import logging
+import unittest
+import contextlib
+
+from mcc.simulation import Partition
+
+from benchmarks import synthetic
+
+
+class PartitionTest(unittest.TestCase):
+
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
+
+    def solve(self, model, partition):
+        with contextlib.redirect_stdout(io.StringIO()):
+            model.execute(nonchronological=True, partition=partition)
+
+        layer = model.by_name['vars']
+        return { str(n.obj(layer)) : layer.untracked_get_param_value('colour', n).data for n in layer.graph.nodes() }
+
+    def test_disjoint_subspaces(self):
+        solutions = [self.solve(synthetic.ColouringModel(6, 8, colours=3), Partition(i, 3)) for i in range(3)]
+
+        # the first decision got a different colour in every subspace
+        first = [s['v0'] for s in solutions]
+        self.assertEqual(sorted(first), [0, 1, 2])
+
+    def test_nothing_to_split(self):
+        # with a single colour, there is no decision to split
+        self.assertEqual(self.solve(synthetic.ColouringModel(4, 0, colours=1), Partition(0, 2)),
+                         { 'v%d' % i : 0 for i in range(4) })
+
+        with self.assertRaisesRegex(Exception, 'No config could be found'):
+            self.solve(synthetic.ColouringModel(4, 0, colours=1), Partition(1, 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -14,6 +14,7 @@ from mcc.framework import *
 from mcc.model import SimplePlatformModel
 from mcc import parser as cfgparser
 from mcc import lib
+from mcc.modelcache import ModelCache
 from mcc.configurator import GenodeConfigurator
 
 from xml.etree import ElementTree as ET
@@ -162,10 +163,11 @@ class EnvironmentModel:
         return True
 
 class Mcc:
-    def __init__(self, filename, basepath='mcc/models/', outpath='mcc/run/'):
+    def __init__(self, filename, basepath='mcc/models/', outpath='mcc/run/', cachepath=None):
         self._filename = filename
         self._basepath = basepath
         self._outpath  = outpath
+        self._cache    = ModelCache(cachepath) if cachepath is not None else None
 
         self._parser = ControlParser(filename, basepath)
         self._devices = dict()
@@ -185,22 +187,22 @@ class Mcc:
         # find configurations
         for name, device in self._devices.items():
             pffile   = device.platform_filename()
-            pf       = cfgparser.PlatformParser(pffile)
+            pf       = cfgparser.PlatformParser(pffile, cache=self._cache)
             pf_model = SimplePlatformModel(pf)
 
             env      = EnvironmentModel(device)
 
             # try to create repositories from given files
             repos = list()
-            repos.append(cfgparser.Repository(pffile))
-            repos.append(cfgparser.Repository(device.repo_filename()))
+            repos.append(cfgparser.Repository(pffile, cache=self._cache))
+            repos.append(cfgparser.Repository(device.repo_filename(), cache=self._cache))
 
             cfg = cfgparser.AggregateRepository(repos)
             mcc = lib.SimpleMcc(repo=cfg, test_backtracking=False)
 
             base = lib.BaseModelQuery()
 
-            basesys   = cfgparser.SystemParser(pffile)
+            basesys   = cfgparser.SystemParser(pffile, cache=self._cache)
             query, basemodel = mcc.search_config(pf_model, basesys,
                                    outpath=self._outpath+name+'-'+basesys.name()+'-',
                                    with_da=False, envmodel=env)
@@ -211,7 +213,7 @@ class Mcc:
                         comp_inst=basemodel.by_name['comp_inst'],
                         filename=pffile)
 
-            sys = cfgparser.SystemParser(device.query_filename())
+            sys = cfgparser.SystemParser(device.query_filename(), cache=self._cache)
             try:
                 query, model = mcc.search_config(pf_model, sys, base,
                                           outpath=self._outpath+name+'-',
@@ -10,6 +10,8 @@ def get_args():
     parser.add_argument('filename', default='mcc_control.xml', nargs='?')
     parser.add_argument('--basepath', default='../../models/')
     parser.add_argument('-o', '--outpath', default='/tmp/test-')
+    parser.add_argument('--cache', type=str, default=None,
+                        help='directory for caching the parsed XML files')
     return parser.parse_args()
 
 if __name__ == '__main__':
@@ -19,5 +21,5 @@ if __name__ == '__main__':
     logging.basicConfig(format='%(levelname)s: %(message)s')
     logging.getLogger().setLevel(logging.INFO)
 
-    mcc = c1.Mcc(args.filename, basepath=args.basepath, outpath=args.outpath)
+    mcc = c1.Mcc(args.filename, basepath=args.basepath, outpath=args.outpath, cachepath=args.cache)
     mcc.execute()
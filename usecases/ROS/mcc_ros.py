@@ -11,6 +11,10 @@ def get_args():
     parser.add_argument('--queryfile', default='../../models/ros/query.xml')
     parser.add_argument('-o', '--outpath', default='./run/ros')
     parser.add_argument('--chronological', action='store_true', default=False)
+    parser.add_argument('--budget_workers', type=int, default=None,
+                        help='number of CP-SAT search workers for the budget calculation')
+    parser.add_argument('--budget_time_limit', type=float, default=None,
+                        help='time limit (in seconds) for the budget calculation')
     return parser.parse_args()
 
 if __name__ == '__main__':
@@ -21,4 +25,6 @@ if __name__ == '__main__':
     logging.getLogger().setLevel(logging.INFO)
 
     mcc = Mcc(repofile=args.repofile, queryfile=args.queryfile, outpath=args.outpath)
-    mcc.execute(chronological=args.chronological)
+    mcc.execute(chronological=args.chronological,
+                budget_workers=args.budget_workers,
+                budget_time_limit=args.budget_time_limit)
@@ -23,7 +23,7 @@ class Mcc:
         self._queryfile = queryfile
         self._outpath   = outpath
 
-    def execute(self, chronological=False):
+    def execute(self, chronological=False, budget_workers=None, budget_time_limit=None):
         failed  = False
 
         # find configurations
@@ -33,7 +33,9 @@ class Mcc:
 
         mcc = rosmodel.MccBase(repo=repo,
                                ecus={"ECU1", "ECU2"},
-                               chronologicaltracking=chronological)
+                               chronologicaltracking=chronological,
+                               budget_workers=budget_workers,
+                               budget_time_limit=budget_time_limit)
 
         try:
             model = mcc.search_config(sys, outpath=self._outpath+'-')
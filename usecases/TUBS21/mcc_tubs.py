@@ -15,7 +15,31 @@ def get_args():
     parser.add_argument('--replay_adapt', type=str, default=None)
     parser.add_argument('--from_scratch', action='store_true')
     parser.add_argument('--wcet_factor', default=1.1, type=float)
+    parser.add_argument('--incremental_cpa', action='store_true', default=False,
+                        help='only rebuild resources with changed tasks and reuse previous CPA results')
+    parser.add_argument('--cpa_workers', type=int, default=None,
+                        help='number of worker processes for analysing independent groups of resources')
+    parser.add_argument('--memo_size', type=int, default=0,
+                        help='number of memoised results per check (e.g. CPA), reused if the read params are unchanged')
+    parser.add_argument('--nogoods', type=int, default=0,
+                        help='maximum number of learned nogoods (combinations of failed decisions)')
     parser.add_argument('--chronological', action='store_true', default=False)
+    parser.add_argument('--indexed_tracking', action='store_true', default=False,
+                        help='use the decision graph with numbered params (see mcc.tracking.IndexedTracking)')
+    parser.add_argument('--compact_params', action='store_true', default=False,
+                        help='store params in columnar arrays (see mcc.paramstore)')
+    parser.add_argument('--snapshots', action='store_true', default=False,
+                        help='restore checkpoints instead of rolling back operations (requires --chronological)')
+    parser.add_argument('-j', '--workers', type=int, default=1,
+                        help='number of worker processes for exploring the design space (requires --explore)')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='seed for the random decisions of the analysis engines')
+    parser.add_argument('--profile', action='store_true', default=False,
+                        help='profile operations and analysis engines (writes *profile.json and *profile.folded)')
+    parser.add_argument('--trace', action='store_true', default=False,
+                        help='record a timeline of the search (writes *trace.json, see chrome://tracing or Perfetto)')
+    parser.add_argument('--cache', type=str, default=None,
+                        help='directory for caching the parsed XML files')
     return parser.parse_args()
 
 if __name__ == '__main__':
@@ -25,9 +49,21 @@ if __name__ == '__main__':
     logging.basicConfig(format='%(levelname)s: %(message)s')
     logging.getLogger().setLevel(logging.INFO)
 
-    mcc = Mcc(args.filename, basepath=args.basepath, outpath=args.outpath)
     if args.replay_adapt:
         adapt = args.replay_adapt
     else:
         adapt = False if not args.adapt else args.wcet_factor
-    mcc.execute(explore=args.explore, chronological=args.chronological, adapt=adapt, from_scratch=args.from_scratch)
+
+    options = dict(chronological=args.chronological, adapt=adapt, from_scratch=args.from_scratch,
+                   compact_params=args.compact_params, snapshots=args.snapshots,
+                   seed=args.seed, profile=args.profile,
+                   trace=args.trace, incremental_cpa=args.incremental_cpa,
+                   cpa_workers=args.cpa_workers, memo_size=args.memo_size,
+                   nogoods=args.nogoods, indexed_tracking=args.indexed_tracking)
+
+    mcc = Mcc(args.filename, basepath=args.basepath, outpath=args.outpath, cachepath=args.cache)
+    if args.workers > 1:
+        assert args.explore, "--workers requires --explore"
+        mcc.explore_parallel(args.workers, **options)
+    else:
+        mcc.execute(explore=args.explore, **options)
@@ -28,6 +28,9 @@ EXPERIMENTS=(
 
 JOBS=2
 
+# number of worker processes per experiment (see mcc_tubs.py --workers)
+WORKERS=1
+
 if [ $# -ge 1 ]; then
 	if [ "$1" == "clean" ]; then
 		for exp in "${EXPERIMENTS[@]}"; do
@@ -43,7 +46,7 @@ run_chronological() {
 	OUTPATH="./run/$(basename $exp)/sweep/chrono/"
 	mkdir -p "${OUTPATH}"
 
-	cmd="./mcc_tubs.py --explore --chronological --basepath \"${BASEPATH}\" --outpath \"${OUTPATH}\" \"$exp\" 2>&1"
+	cmd="./mcc_tubs.py --explore --chronological --workers ${WORKERS} --basepath \"${BASEPATH}\" --outpath \"${OUTPATH}\" \"$exp\" 2>&1"
 	echo "Running $cmd"
 	unbuffer sh -c "$cmd" > "${OUTPATH}output.log"
 	succ=$(cat "${OUTPATH}output.log" | grep 'Stats' | wc -l)
@@ -59,7 +62,7 @@ run_nonchronological() {
 	OUTPATH="./run/$(basename $exp)/sweep/nonchrono/"
 	mkdir -p "${OUTPATH}"
 
-	cmd="./mcc_tubs.py --explore --basepath \"${BASEPATH}\" --outpath \"${OUTPATH}\" \"$exp\" 2>&1"
+	cmd="./mcc_tubs.py --explore --workers ${WORKERS} --basepath \"${BASEPATH}\" --outpath \"${OUTPATH}\" \"$exp\" 2>&1"
 	echo "Running $cmd"
 	unbuffer sh -c "$cmd" > "${OUTPATH}output.log"
 	succ=$(cat "${OUTPATH}output.log" | grep 'Stats' | wc -l)
@@ -73,6 +76,7 @@ run_nonchronological() {
 export -f run_chronological
 export -f run_nonchronological
 export BASEPATH
+export WORKERS
 
 if which parallel &> /dev/null; then
 	# first run, nonchronological BT
@@ -9,11 +9,15 @@ Implements query and status report functionality for TUBS use cases.
 
 """
 
+import os
 import logging
+from concurrent.futures import ProcessPoolExecutor
 from mcc.framework import *
 from mcc.model import SimplePlatformModel
+from mcc.simulation import Partition, merge_stats
 from mcc import parser as cfgparser
 from mcc import lib
+from mcc.modelcache import ModelCache
 from mcc.configurator import GenodeConfigurator
 
 from xml.etree import ElementTree as ET
@@ -148,11 +152,29 @@ class ConstraintsModel:
         return self._unreliable_components
 
 
+def _explore_subspace(filename, basepath, outpath, partition, cachepath=None, **kwargs):
+    """ Explores a subspace of the design space in a worker process (see :func:`Mcc.explore_parallel`).
+
+    Returns:
+        path of the written solutions.csv
+    """
+    outdir = outpath[:outpath.rfind('/')]
+    os.makedirs(outdir, exist_ok=True)
+
+    Mcc(filename, basepath=basepath, outpath=outpath, cachepath=cachepath).execute(explore=True,
+                                                                                 partition=partition,
+                                                                                 **kwargs)
+
+    return outdir + '/solutions.csv'
+
+
 class Mcc:
-    def __init__(self, filename, basepath='mcc/models/', outpath='mcc/run/'):
-        self._filename = filename
-        self._basepath = basepath
-        self._outpath  = outpath
+    def __init__(self, filename, basepath='mcc/models/', outpath='mcc/run/', cachepath=None):
+        self._filename  = filename
+        self._basepath  = basepath
+        self._outpath   = outpath
+        self._cachepath = cachepath
+        self._cache     = ModelCache(cachepath) if cachepath is not None else None
 
         self._parser = ControlParser(filename, basepath)
         self._devices = dict()
@@ -160,32 +182,46 @@ class Mcc:
             name = dev.name()
             self._devices[name] = dev
 
-    def execute(self, explore=False, chronological=False, adapt=False, from_scratch=False):
+    def execute(self, explore=False, chronological=False, adapt=False, from_scratch=False,
+                compact_params=False, snapshots=False, partition=None, seed=None, profile=False,
+                trace=False, incremental_cpa=False, cpa_workers=None, memo_size=0,
+                nogoods=0, indexed_tracking=False):
         results = dict()
         failed  = False
 
         # find configurations
         for name, device in self._devices.items():
             pffile   = device.platform_filename()
-            pf       = cfgparser.PlatformParser(pffile)
+            pf       = cfgparser.PlatformParser(pffile, cache=self._cache)
             pf_model = SimplePlatformModel(pf)
 
             constr   = ConstraintsModel(device)
 
             # try to create repositories from given files
             repos = list()
-            repos.append(cfgparser.Repository(pffile))
-            repos.append(cfgparser.Repository(device.repo_filename()))
+            repos.append(cfgparser.Repository(pffile, cache=self._cache))
+            repos.append(cfgparser.Repository(device.repo_filename(), cache=self._cache))
 
             cfg = cfgparser.AggregateRepository(repos)
             mcc = lib.SimpleMcc(repo=cfg, test_backtracking=explore,
                                           chronologicaltracking=chronological,
                                           test_adaptation=adapt,
-                                          from_scratch=from_scratch)
+                                          from_scratch=from_scratch,
+                                          compact_params=compact_params,
+                                          snapshots=snapshots,
+                                          partition=partition,
+                                          seed=seed,
+                                          profile=profile,
+                                          trace=trace,
+                                          incremental_cpa=incremental_cpa,
+                                          cpa_workers=cpa_workers,
+                                          memo_size=memo_size,
+                                          nogoods=nogoods,
+                                          indexed_tracking=indexed_tracking)
 
             base = lib.BaseModelQuery()
 
-            basesys   = cfgparser.SystemParser(pffile)
+            basesys   = cfgparser.SystemParser(pffile, cache=self._cache)
             query, basemodel = mcc.search_config(pf_model, basesys,
                                    outpath=self._outpath+name+'-'+basesys.name()+'-',
                                    with_da=False, constrmodel=None)
@@ -197,7 +233,7 @@ class Mcc:
                         filename=pffile)
 
 
-            sys = cfgparser.SystemParser(device.query_filename())
+            sys = cfgparser.SystemParser(device.query_filename(), cache=self._cache)
             try:
                 query, model = mcc.search_config(pf_model, sys, base,
                                           outpath=self._outpath+name+'-',
@@ -214,3 +250,34 @@ class Mcc:
         if failed:
             logging.error("Do not generate configs because of failed devices.")
             return
+
+    def explore_parallel(self, workers, seed=None, **kwargs):
+        """ Explores the design space with multiple worker processes.
+
+        The candidates of the first revisable decision are split into disjoint
+        subspaces (see :class:`mcc.simulation.Partition`). Every worker explores
+        one subspace and writes its results into a separate directory. The found
+        solutions are merged (in the order of the subspaces) into a single solutions.csv.
+
+        Args:
+            :param workers: number of worker processes
+            :type  workers: int
+            :param seed: seed of the random number generator used by every worker (see :class:`mcc.framework.Registry`)
+            :type  seed: int
+            :param kwargs: further arguments of :func:`execute` passed to every worker (e.g. profile, memo_size)
+        """
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_explore_subspace,
+                                   self._filename,
+                                   self._basepath,
+                                   self._outpath + 'worker-%d/' % i,
+                                   Partition(i, workers),
+                                   seed=seed,
+                                   cachepath=self._cachepath,
+                                   **kwargs) for i in range(workers)]
+
+            results = [f.result() for f in futures]
+
+        outfile = self._outpath[:self._outpath.rfind('/')] + '/solutions.csv'
+        found = merge_stats([r for r in results if os.path.exists(r)], outfile)
+        print("Solutions found: %d" % found)